@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Create the ``records_citations`` table.
+
+It replaces the ``referenced_records`` function, and the GIN index on it,
+which were used to find the records citing a record.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy_utils.types import UUIDType
+
+
+revision = '0aebbb921dc8'
+down_revision = '2dd443feeb63'
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        'records_citations',
+        sa.Column(
+            'citer_id',
+            UUIDType,
+            sa.ForeignKey('records_metadata.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('cited_pid_type', sa.String(3), nullable=False),
+        sa.Column('cited_pid_value', sa.String(255), nullable=False),
+        sa.PrimaryKeyConstraint('citer_id', 'cited_pid_type', 'cited_pid_value'),
+    )
+    op.create_index(
+        'ix_records_citations_cited_pid',
+        'records_citations',
+        ['cited_pid_type', 'cited_pid_value'],
+    )
+
+    # Fill the table from the references of the existing records, with the
+    # same rules applied by ``inspirehep.modules.records.utils.get_cited_pids``.
+    # The PIDs are taken from the last two non-empty parts of the URIs, as
+    # done by ``inspirehep.modules.records.utils.get_pid_from_record_uri``.
+    op.execute('''
+        INSERT INTO records_citations (citer_id, cited_pid_type, cited_pid_value)
+        SELECT DISTINCT
+          citers.id,
+          substring(citers.ref_parts[array_length(citers.ref_parts, 1) - 1] for 3),
+          citers.ref_parts[array_length(citers.ref_parts, 1)]
+        FROM (
+          SELECT
+            records_metadata.id,
+            array_remove(
+              regexp_split_to_array(refs.ref->'record'->>'$ref', '/'),
+              ''
+            ) AS ref_parts
+          FROM
+            records_metadata,
+            jsonb_array_elements(
+              CASE WHEN jsonb_typeof(records_metadata.json->'references') = 'array'
+                THEN records_metadata.json->'references'
+                ELSE '[]'::jsonb
+              END
+            ) AS refs(ref)
+          WHERE
+            records_metadata.json->'_collections' @> '["Literature"]'
+            AND NOT records_metadata.json @> '{"deleted": true}'
+            AND NOT records_metadata.json @> '{"related_records": [{"relation": "successor"}]}'
+        ) AS citers
+        WHERE array_length(citers.ref_parts, 1) >= 2
+    ''')
+
+    op.execute('DROP INDEX IF EXISTS ix_records_metadata_json_referenced_records_2_0')
+    op.execute('DROP FUNCTION IF EXISTS referenced_records(json jsonb)')
+
+
+def downgrade():
+    """Downgrade database."""
+    # Restore the function and the index of ``2dd443feeb63``.
+    op.execute('''
+        CREATE OR REPLACE FUNCTION referenced_records(json jsonb) RETURNS TEXT[] AS $$
+        DECLARE
+          reference_arr jsonb;
+          text_val text;
+          text_arr_val text[];
+          ret_val text[];
+        BEGIN
+          FOR reference_arr IN (SELECT jsonb_array_elements(json->'references')) LOOP
+            text_val := split_part(reference_arr->'record'->>'$ref',E'api/',2);
+            IF text_val != '' THEN
+              text_arr_val := regexp_split_to_array(text_val, E'/');
+              ret_val:=array_append(ret_val, text_arr_val[2]||substring(text_arr_val[1] for 3));
+            END IF;
+          END LOOP;
+        RETURN ret_val;
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE;
+    ''')
+    op.execute('''
+        CREATE INDEX ix_records_metadata_json_referenced_records_2_0
+          ON records_metadata
+          USING gin(referenced_records(json))
+    ''')
+
+    op.drop_index('ix_records_citations_cited_pid', table_name='records_citations')
+    op.drop_table('records_citations')
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Add the metrics of citeable and published papers to ``authors_metrics``."""
+
+from __future__ import absolute_import, division, print_function
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = '184a0d235f11'
+down_revision = '20ce41197865'
+branch_labels = ()
+depends_on = None
+
+VARIANTS_COLUMNS = [
+    '{}_{}'.format(variant, metric)
+    for variant in ('citeable', 'published')
+    for metric in ('citations', 'publications', 'h_index', 'i10_index')
+]
+
+
+def upgrade():
+    """Upgrade database."""
+    for column in VARIANTS_COLUMNS:
+        op.add_column('authors_metrics', sa.Column(column, sa.Integer, nullable=True))
+    op.alter_column('authors_metrics', 'statistics', nullable=True)
+
+
+def downgrade():
+    """Downgrade database."""
+    op.execute('DELETE FROM authors_metrics WHERE statistics IS NULL')
+    op.alter_column('authors_metrics', 'statistics', nullable=False)
+    for column in VARIANTS_COLUMNS:
+        op.drop_column('authors_metrics', column)
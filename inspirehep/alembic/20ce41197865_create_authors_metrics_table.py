@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Create the ``authors_metrics`` table."""
+
+from __future__ import absolute_import, division, print_function
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = '20ce41197865'
+down_revision = '0aebbb921dc8'
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    # The table is filled by the ``update_metrics`` command of ``inspirehep authors``.
+    op.create_table(
+        'authors_metrics',
+        sa.Column('author_recid', sa.Integer, autoincrement=False, nullable=False),
+        sa.Column('citations', sa.Integer, nullable=False),
+        sa.Column('publications', sa.Integer, nullable=False),
+        sa.Column('h_index', sa.Integer, nullable=False),
+        sa.Column('i10_index', sa.Integer, nullable=False),
+        sa.Column('statistics', postgresql.JSONB, nullable=False),
+        sa.Column('updated', sa.DateTime, nullable=False),
+        sa.PrimaryKeyConstraint('author_recid'),
+    )
+    op.create_index('ix_authors_metrics_h_index', 'authors_metrics', ['h_index'])
+    op.create_index('ix_authors_metrics_i10_index', 'authors_metrics', ['i10_index'])
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index('ix_authors_metrics_i10_index', table_name='authors_metrics')
+    op.drop_index('ix_authors_metrics_h_index', table_name='authors_metrics')
+    op.drop_table('authors_metrics')
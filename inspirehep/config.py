@@ -97,7 +97,15 @@ CELERY_BEAT_SCHEDULE = {
     'journal_kb_builder': {
         'task': 'inspirehep.modules.refextract.tasks.create_journal_kb_file',
         'schedule': crontab(minute='0', hour='*/1'),
-    }
+    },
+    'landing_pages_data_refresher': {
+        'task': 'inspirehep.modules.theme.landing_pages.refresh_landing_pages_data',
+        'schedule': crontab(minute='*/5'),
+    },
+    'authors_metrics_refresher': {
+        'task': 'inspirehep.modules.authors.tasks.refresh_pending_authors_metrics',
+        'schedule': crontab(minute='*'),
+    },
 }
 
 # Cache
@@ -109,6 +117,10 @@ ACCOUNTS_SESSION_REDIS_URL = "redis://localhost:6379/2"
 ACCESS_CACHE = "invenio_cache:current_cache"
 RT_USERS_CACHE_TIMEOUT = 86400
 RT_QUEUES_CACHE_TIMEOUT = 86400
+# The data of the collection landing pages is refreshed in the background by
+# the ``landing_pages_data_refresher`` periodic task, and expires after this
+# number of seconds if the task stops refreshing it.
+THEME_LANDING_PAGES_CACHE_TIMEOUT = 3600
 
 # Files
 # =====
@@ -240,6 +252,13 @@ SEARCH_TYPEAHEAD_SPIRES_KEYWORD_TO_HINT = {
 SEARCH_TYPEAHEAD_HINT_URL = '/search/suggest?field=%TYPE&query=%QUERY'
 SEARCH_TYPEAHEAD_DEFAULT_SET = 'invenio'
 
+# Number of parsed query strings cached by each process.
+SEARCH_QUERY_CACHE_SIZE = 10000
+
+# Number of seconds during which the facets of a search are cached. They are
+# invalidated sooner when the documents of the searched index change.
+SEARCH_FACETS_CACHE_TIMEOUT = 60
+
 SEARCH_ELASTIC_HOSTS = ['localhost']
 SEARCH_UI_BASE_TEMPLATE = BASE_TEMPLATE
 SEARCH_UI_SEARCH_TEMPLATE = 'search/search.html'
@@ -274,7 +293,7 @@ LITERATURE_REST_ENDPOINT = {
         'application/marcxml+xml': INSPIRE_SERIALIZERS + ':marcxml_v1_response',
     },
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
         'application/vnd+inspire.record.ui+json': INSPIRE_SERIALIZERS + ':json_literature_ui_v1_search_response',
         'application/x-bibtex': INSPIRE_SERIALIZERS + ':bibtex_v1_search',
         'application/vnd+inspire.ids+json': 'inspirehep.modules.api.v1.common_serializers:json_recids_response',
@@ -320,7 +339,7 @@ LITERATURE_REFERENCES_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'inspirehep.modules.records.serializers:json_literature_references_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_literature_references_v1_search',
     },
     'list_route': '/literature/references',
     'item_route': '/literature/<pid(lit,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/references',
@@ -340,7 +359,7 @@ LITERATURE_AUTHORS_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'inspirehep.modules.records.serializers:json_literature_authors_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_literature_authors_v1_search',
     },
     'list_route': '/literature/authors',
     'item_route': '/literature/<pid(lit,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/authors',
@@ -362,9 +381,9 @@ AUTHORS_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
         'application/vnd+inspire.ids+json': 'inspirehep.modules.api.v1.common_serializers:json_recids_response',
-        'application/vnd+inspire.record.ui+json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/vnd+inspire.record.ui+json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'suggesters': {
         'author': {
@@ -393,7 +412,7 @@ AUTHORS_DB_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/authors/db',
     'item_route': '/authors/<pid(aut,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/db',
@@ -402,6 +421,11 @@ AUTHORS_DB_REST_ENDPOINT = {
     'update_permission_factory_imp': "inspirehep.modules.records.permissions:record_update_permission_factory",
 }
 
+# Number of publications returned by default, and at most, in a page of the
+# citations of an author. All of them are returned if no page is requested.
+AUTHORS_CITATIONS_DEFAULT_SIZE = 25
+AUTHORS_CITATIONS_MAX_SIZE = 250
+
 AUTHORS_CITATION_REST_ENDPOINT = {
     'pid_type': 'aut',
     'pid_minter': 'inspire_recid_minter',
@@ -412,7 +436,7 @@ AUTHORS_CITATION_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/authors/citations',
     'item_route': '/authors/<pid(aut,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/citations',
@@ -421,6 +445,20 @@ AUTHORS_CITATION_REST_ENDPOINT = {
     'search_factory_imp': 'inspirehep.modules.search.search_factory:inspire_search_factory',
 }
 
+# Number of co-authors returned by default, and at most, in a page of the
+# co-authors of an author.
+AUTHORS_COAUTHORS_DEFAULT_SIZE = 10
+AUTHORS_COAUTHORS_MAX_SIZE = 100
+# Number of co-authors up to which pages can be requested, as all of the
+# co-authors before the requested page are aggregated by ES.
+AUTHORS_COAUTHORS_MAX_RESULTS = 1000
+# Number of seconds during which the pages of co-authors are cached, or
+# ``None`` not to cache them.
+AUTHORS_COAUTHORS_CACHE_TIMEOUT = 3600
+# Number of authors whose metrics are updated at once by the
+# ``authors_metrics_refresher`` periodic task, once their publications changed.
+AUTHORS_METRICS_UPDATE_BATCH_SIZE = 100
+
 AUTHORS_COAUTHORS_REST_ENDPOINT = {
     'pid_type': 'aut',
     'pid_minter': 'inspire_recid_minter',
@@ -431,7 +469,7 @@ AUTHORS_COAUTHORS_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/authors/coauthors',
     'item_route': '/authors/<pid(aut,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/coauthors',
@@ -450,7 +488,7 @@ AUTHORS_PUBLICATIONS_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/authors/publications',
     'item_route': '/authors/<pid(aut,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/publications',
@@ -469,7 +507,7 @@ AUTHORS_STATS_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/authors/stats',
     'item_route': '/authors/<pid(aut,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/stats',
@@ -489,7 +527,7 @@ DATA_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/data/',
     'item_route': '/data/<pid(dat,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>',
@@ -506,7 +544,7 @@ DATA_DB_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/data/db',
     'item_route': '/data/<pid(dat,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/db',
@@ -526,7 +564,7 @@ CONFERENCES_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
         'application/vnd+inspire.ids+json': 'inspirehep.modules.api.v1.common_serializers:json_recids_response',
     },
     'suggesters': {
@@ -560,7 +598,7 @@ CONFERENCES_DB_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/conferences/db',
     'item_route': '/conferences/<pid(con,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/db',
@@ -580,7 +618,7 @@ JOBS_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
         'application/vnd+inspire.ids+json': 'inspirehep.modules.api.v1.common_serializers:json_recids_response',
     },
     'list_route': '/jobs/',
@@ -598,7 +636,7 @@ JOBS_DB_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/jobs/db',
     'item_route': '/jobs/<pid(job,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/db',
@@ -618,7 +656,7 @@ INSTITUTIONS_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
         'application/vnd+inspire.ids+json': 'inspirehep.modules.api.v1.common_serializers:json_recids_response',
     },
     'suggesters': {
@@ -648,7 +686,7 @@ INSTITUTIONS_DB_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/institutions/db',
     'item_route': '/institutions/<pid(ins,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/db',
@@ -668,7 +706,7 @@ EXPERIMENTS_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
         'application/vnd+inspire.ids+json': 'inspirehep.modules.api.v1.common_serializers:json_recids_response',
     },
     'suggesters': {
@@ -698,7 +736,7 @@ EXPERIMENTS_DB_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/experiments/db',
     'item_route': '/experiments/<pid(exp,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/db',
@@ -718,7 +756,7 @@ JOURNALS_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
         'application/vnd+inspire.ids+json': 'inspirehep.modules.api.v1.common_serializers:json_recids_response',
     },
     'suggesters': {
@@ -750,7 +788,7 @@ JOURNALS_DB_REST_ENDPOINT = {
     },
     'record_class': 'inspirehep.modules.records.api:InspireRecord',
     'search_serializers': {
-        'application/json': 'invenio_records_rest.serializers:json_v1_search',
+        'application/json': INSPIRE_SERIALIZERS + ':json_v1_search',
     },
     'list_route': '/journals/db',
     'item_route': '/journals/<pid(jou,record_class="inspirehep.modules.records.api:InspireRecord"):pid_value>/db',
@@ -1162,10 +1200,47 @@ JSONSCHEMAS_HOST = "localhost:5000"
 JSONSCHEMAS_REPLACE_REFS = True
 JSONSCHEMAS_LOADER_CLS = 'inspirehep.modules.records.json_ref_loader.SCHEMA_LOADER_CLS'
 
+# Records resolved from JSON references are cached per request or task, and
+# in a cache of this size shared by the requests of each process. Its entries
+# are keyed by a generation of the record kept in Redis, which is bumped when
+# the record is updated, and they also expire after the given number of
+# seconds.
+RECORDS_JSON_REF_CACHE_SIZE = 5000
+RECORDS_JSON_REF_CACHE_TTL = 300
+# The records resolved in a request or task are also kept until its end, in a
+# cache of this size, as the application context of a CLI command or of a
+# long task can live long.
+RECORDS_JSON_REF_REQUEST_CACHE_SIZE = 2000
+
+# The UUIDs of the objects of PIDs, used to get records, are cached in each
+# process and, if ``RECORD_GETTER_PID_CACHE_REDIS`` is set, in Redis to share
+# them between processes. The PIDs changed by other processes are removed from
+# Redis, but not from the cache of this process, whose entries expire after
+# the given number of seconds.
+RECORD_GETTER_PID_CACHE_SIZE = 10000
+RECORD_GETTER_PID_CACHE_TTL = 300
+RECORD_GETTER_PID_CACHE_REDIS = False
+RECORD_GETTER_PID_CACHE_REDIS_TTL = 86400
+
 INDEXER_DEFAULT_INDEX = "records-hep"
 INDEXER_DEFAULT_DOC_TYPE = "hep"
 INDEXER_REPLACE_REFS = False
 INDEXER_BULK_REQUEST_TIMEOUT = float(900)
+# When the references of a record change, only update the ``citation_count``
+# of the cited records in ES instead of fully reindexing them.
+INDEXER_PARTIAL_CITATIONS_UPDATE = True
+# When reindexing records in bulk, skip those whose document in ES has the
+# same content fingerprint as the one that would be indexed.
+INDEXER_SKIP_UNCHANGED = True
+# Write-behind indexing: instead of indexing records right after they are
+# committed, queue them and index them in bulk once per coalescing window
+# (in seconds), so that records committed several times are indexed once.
+INDEXER_WRITE_BEHIND = False
+INDEXER_WRITE_BEHIND_WINDOW = 5
+INDEXER_WRITE_BEHIND_BATCH_SIZE = 200
+# Number of seconds after the coalescing window after which a drain which was
+# scheduled but never started is considered lost, and another one can be.
+INDEXER_WRITE_BEHIND_SCHEDULED_TIMEOUT = 600
 
 # OAuthclient
 # ===========
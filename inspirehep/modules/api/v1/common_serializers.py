@@ -28,6 +28,8 @@ import json
 
 from invenio_records_rest.serializers.response import search_responsify
 
+from inspirehep.modules.records.serializers.response import cursor_paginated
+
 
 class APIRecidsSerializer(object):
     """Recids serializer."""
@@ -43,7 +45,7 @@ class APIRecidsSerializer(object):
 
 
 json_recids = APIRecidsSerializer()
-json_recids_response = search_responsify(
+json_recids_response = cursor_paginated(search_responsify(
     json_recids,
     'application/vnd+inspire.ids+json'
-)
+))
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Authors CLI."""
+
+from __future__ import absolute_import, division, print_function
+
+from time import time
+
+import click
+from flask.cli import with_appcontext
+from six.moves import range
+
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+
+from .metrics import recompute_all_authors_metrics, update_authors_metrics
+from .tasks import refresh_authors_metrics
+
+
+@click.group()
+def authors():
+    """Commands related to authors."""
+
+
+@authors.command()
+@click.option('-s', '--batch-size', default=100)
+@click.option('-q', '--queue-name', default=None,
+              help='Send the batches to this Celery queue instead.')
+@with_appcontext
+def update_metrics(batch_size, queue_name):
+    """Compute and store the metrics of all the authors.
+
+    The metrics are computed in batches of authors, each stored with a
+    single statement. They are kept up to date afterwards when the
+    publications of the authors change.
+    """
+    author_recids = sorted(
+        int(pid_value) for pid_value, in db.session.query(
+            PersistentIdentifier.pid_value,
+        ).filter(
+            PersistentIdentifier.pid_type == 'aut',
+            PersistentIdentifier.status == PIDStatus.REGISTERED,
+        )
+    )
+
+    with click.progressbar(
+        length=len(author_recids),
+        label='Updating the metrics of {} authors'.format(len(author_recids)),
+    ) as progress:
+        for start in range(0, len(author_recids), batch_size):
+            batch = author_recids[start:start + batch_size]
+            if queue_name:
+                refresh_authors_metrics.apply_async(args=(batch,), queue=queue_name)
+            else:
+                update_authors_metrics(batch)
+                db.session.commit()
+            progress.update(len(batch))
+
+    click.secho('Metrics of {} authors updated.'.format(len(author_recids)), fg='green')
+
+
+@authors.command()
+@click.option('-s', '--batch-size', default=1000)
+@with_appcontext
+def recompute_metrics(batch_size):
+    """Recompute the metrics of all the authors at once from the DB.
+
+    The papers of all the authors and their citation counts are loaded in
+    arrays, from which the citations, publications, h-index and i10-index
+    of every author, of their citeable papers and of their published
+    papers are computed together, see ``recompute_all_authors_metrics``.
+    """
+    start = time()
+    authors_count = recompute_all_authors_metrics(batch_size=batch_size)
+    click.secho('Metrics of {} authors recomputed in {:.1f}s.'.format(
+        authors_count, time() - start), fg='green')
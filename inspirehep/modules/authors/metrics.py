@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Authors metrics."""
+
+from __future__ import absolute_import, division, print_function
+
+from array import array
+from datetime import datetime
+
+import numpy as np
+from elasticsearch_dsl import Q
+from six.moves import range
+from sqlalchemy import distinct, func, not_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, insert
+
+from invenio_db import db
+from invenio_records.models import RecordMetadata
+
+from inspire_dojson.utils import get_recid_from_ref
+from inspire_utils.record import get_value
+
+from inspirehep.modules.authors.models import AuthorMetrics
+from inspirehep.modules.records.models import RecordCitations
+from inspirehep.modules.search import LiteratureSearch
+from inspirehep.utils.record_getter import get_db_records_fields
+from inspirehep.utils.stats import (
+    calculate_authors_metrics,
+    calculate_h_index_from_histogram,
+    calculate_i10_index_from_histogram,
+)
+
+METRICS_COLUMNS = {
+    'citations': 'citations',
+    'publications': 'publications',
+    'hindex': 'h_index',
+    'i10index': 'i10_index',
+}
+"""Columns of ``AuthorMetrics`` in which each metric is stored."""
+
+METRICS_FIELDS = ('citeable', 'deleted', 'document_type', 'inspire_categories', 'keywords', 'refereed')
+"""Fields of the papers from which the statistics of their authors are computed."""
+
+METRICS_VARIANTS = ('citeable', 'published')
+"""Subsets of the papers of the authors whose metrics are also stored."""
+
+
+VARIANTS_FILTERS = {
+    'citeable': Q('term', citeable=True),
+    'published': Q('term', refereed=True),
+}
+"""Filters of the papers of each of the ``METRICS_VARIANTS`` in ES."""
+
+
+def _add_metrics_aggregations(aggs):
+    aggs.metric('citations', 'sum', field='citation_count')
+    # Citation counts with the number of publications having each of
+    # them, from which the h-index and i10-index are computed.
+    aggs.bucket(
+        'citation_counts', 'histogram',
+        field='citation_count', interval=1, min_doc_count=1,
+    )
+
+
+def _get_metrics(aggregations, publications):
+    citation_counts = {
+        int(bucket.key): bucket.doc_count
+        for bucket in aggregations.citation_counts.buckets
+    }
+    return {
+        'citations': int(aggregations.citations.value or 0),
+        'publications': publications,
+        'hindex': calculate_h_index_from_histogram(citation_counts),
+        'i10index': calculate_i10_index_from_histogram(citation_counts),
+    }
+
+
+def _search_author_statistics(author_recid, variants=()):
+    """Compute the statistics of an author, and the metrics of variants.
+
+    Args:
+        author_recid (Union[int, str]): the recid of the author.
+        variants (Iterable[str]): the ``METRICS_VARIANTS`` whose metrics are
+            also computed, with the same search.
+
+    Returns:
+        Tuple[dict, dict]: the statistics, see ``get_author_statistics``, and
+        the metrics of each variant, keyed by its name.
+    """
+    query = Q('match', authors__recid=author_recid)
+    search = LiteratureSearch().query('nested', path='authors', query=query)\
+                               .extra(size=0)
+    _add_metrics_aggregations(search.aggs)
+    for variant in variants:
+        _add_metrics_aggregations(search.aggs.bucket(variant, 'filter', VARIANTS_FILTERS[variant]))
+    search.aggs.bucket('types', 'terms', field='document_type', size=100)
+    search.aggs.bucket('fields', 'terms', field='facet_inspire_categories', size=100)
+    search.aggs.bucket(
+        'keywords', 'terms',
+        field='keywords.value.raw', size=25, exclude='* Automatic Keywords *',
+    )
+    results = search.execute()
+    aggregations = results.aggregations
+
+    statistics = _get_metrics(aggregations, results.hits.total)
+    statistics['types'] = {
+        bucket.key: bucket.doc_count for bucket in aggregations.types.buckets
+    }
+
+    fields = [bucket.key for bucket in aggregations.fields.buckets]
+    if fields:
+        statistics['fields'] = fields
+
+    # Return the top 25 keywords.
+    keywords = [{
+        'count': bucket.doc_count,
+        'keyword': bucket.key,
+    } for bucket in aggregations.keywords.buckets]
+    if keywords:
+        statistics['keywords'] = keywords
+
+    variants_metrics = {
+        variant: _get_metrics(aggregations[variant], aggregations[variant].doc_count)
+        for variant in variants
+    }
+
+    return statistics, variants_metrics
+
+
+def get_author_statistics(author_recid):
+    """Compute the statistics of an author.
+
+    The statistics are computed by ES with aggregations over the
+    publications of the author, so that they are not fetched.
+
+    Args:
+        author_recid (Union[int, str]): the recid of the author.
+
+    Returns:
+        dict: the statistics, as served by the stats endpoint of the author.
+    """
+    statistics, _ = _search_author_statistics(author_recid)
+    return statistics
+
+
+def get_stored_author_statistics(author_recid):
+    """Get the precomputed statistics of an author.
+
+    Args:
+        author_recid (Union[int, str]): the recid of the author.
+
+    Returns:
+        Optional[dict]: the statistics, or ``None`` if they were never
+        computed, or only their metrics were computed from the DB.
+    """
+    metrics = AuthorMetrics.query.get(int(author_recid))
+    if metrics is None:
+        return None
+
+    return metrics.statistics
+
+
+def update_authors_metrics(author_recids):
+    """Compute the metrics of authors and store them.
+
+    The metrics of all the authors, including those of the
+    ``METRICS_VARIANTS``, are written with a single statement, replacing
+    those already stored. The session is not committed.
+
+    Args:
+        author_recids (Iterable[Union[int, str]]): the recids of the authors.
+
+    Returns:
+        dict: the statistics of the authors, keyed by their recid.
+    """
+    rows = []
+    authors_statistics = {}
+    updated = datetime.utcnow()
+    for author_recid in set(int(author_recid) for author_recid in author_recids):
+        statistics, variants_metrics = _search_author_statistics(author_recid, METRICS_VARIANTS)
+        row = {column: statistics[metric] for metric, column in METRICS_COLUMNS.items()}
+        for variant, metrics in variants_metrics.items():
+            for metric, column in METRICS_COLUMNS.items():
+                row['{}_{}'.format(variant, column)] = metrics[metric]
+        row['author_recid'] = author_recid
+        row['statistics'] = statistics
+        row['updated'] = updated
+        rows.append(row)
+        authors_statistics[author_recid] = statistics
+
+    if not rows:
+        return authors_statistics
+
+    statement = insert(AuthorMetrics.__table__)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['author_recid'],
+        set_={
+            column: statement.excluded[column]
+            for column in rows[0] if column != 'author_recid'
+        },
+    ), rows)
+
+    return authors_statistics
+
+
+def get_authors_recids(record):
+    """Get the recids of the authors linked to the signatures of a record.
+
+    Args:
+        record (dict): the JSON of a record, as stored in the DB.
+
+    Returns:
+        Set[int]: the recids of the authors.
+    """
+    recids = (
+        get_recid_from_ref(ref)
+        for ref in get_value(record, 'authors.record', default=[])
+    )
+    return set(recid for recid in recids if recid is not None)
+
+
+def get_authors_recids_with_changed_metrics(record, previous_record):
+    """Get the recids of the authors whose statistics change with a record.
+
+    The authors added to or removed from the record have their number of
+    publications changed. When one of the ``METRICS_FIELDS`` changed, the
+    statistics of all the authors of the record change.
+
+    Args:
+        record (dict): the JSON of the record.
+        previous_record (dict): the JSON of its previous version, empty if
+            the record is new.
+
+    Returns:
+        Set[int]: the recids of the authors.
+    """
+    authors_recids = get_authors_recids(record)
+    previous_authors_recids = get_authors_recids(previous_record)
+    if any(record.get(field) != previous_record.get(field) for field in METRICS_FIELDS):
+        return authors_recids | previous_authors_recids
+
+    return authors_recids ^ previous_authors_recids
+
+
+def get_authors_papers_arrays():
+    """Get the papers of all the authors from the DB, as arrays.
+
+    The citation counts of all the Literature records are read from the
+    ``records_citations`` table, and the authors, ``citeable`` and
+    ``refereed`` fields of the records are streamed from their JSON. The
+    triples are accumulated in compact arrays instead of one object per
+    signature.
+
+    Returns:
+        dict: the ``authors``, ``papers``, ``citation_counts``, ``citeable``
+        and ``published`` arrays, with one element per (author, paper) pair.
+    """
+    cited_recids = array('l')
+    cited_counts = array('l')
+    query = db.session.query(
+        RecordCitations.cited_pid_value,
+        func.count(distinct(RecordMetadata.json['control_number'])),
+    ).join(
+        RecordMetadata, RecordCitations.citer_id == RecordMetadata.id
+    ).filter(
+        RecordCitations.cited_pid_type == 'lit'
+    ).group_by(
+        RecordCitations.cited_pid_value
+    )
+    for pid_value, count in query.yield_per(10000):
+        cited_recids.append(int(pid_value))
+        cited_counts.append(count)
+
+    authors = array('l')
+    papers = array('l')
+    citeable = array('b')
+    published = array('b')
+    json = type_coerce(RecordMetadata.json, JSONB)
+    records = get_db_records_fields(
+        ['authors.record', 'citeable', 'control_number', 'refereed'],
+        [json['_collections'].contains(['Literature']), not_(json.contains({'deleted': True}))],
+    )
+    for record in records:
+        author_recids = get_authors_recids(record)
+        authors.extend(author_recids)
+        papers.extend([record['control_number']] * len(author_recids))
+        citeable.extend([record.get('citeable', False)] * len(author_recids))
+        published.extend([record.get('refereed', False)] * len(author_recids))
+
+    papers = np.array(papers, dtype=np.int64)
+    cited_recids = np.array(cited_recids, dtype=np.int64)
+    cited_counts = np.array(cited_counts, dtype=np.int64)
+    order = np.argsort(cited_recids)
+    cited_recids = cited_recids[order]
+    cited_counts = cited_counts[order]
+
+    citation_counts = np.zeros(len(papers), dtype=np.int64)
+    if len(cited_recids):
+        positions = np.minimum(np.searchsorted(cited_recids, papers), len(cited_recids) - 1)
+        cited = cited_recids[positions] == papers
+        citation_counts[cited] = cited_counts[positions[cited]]
+
+    return {
+        'authors': np.array(authors, dtype=np.int64),
+        'papers': papers,
+        'citation_counts': citation_counts,
+        'citeable': np.array(citeable, dtype=bool),
+        'published': np.array(published, dtype=bool),
+    }
+
+
+def calculate_all_authors_metrics(arrays):
+    """Calculate the metrics of all the authors at once.
+
+    Args:
+        arrays (dict): the papers of the authors, as returned by
+            ``get_authors_papers_arrays``.
+
+    Returns:
+        Tuple[numpy.ndarray, dict]: the sorted recids of the authors, and
+        the arrays of their metrics, aligned with them, for each column of
+        ``AuthorMetrics``. Authors without any paper of a variant have
+        metrics of 0 for it.
+    """
+    authors, metrics = calculate_authors_metrics(
+        arrays['authors'], arrays['papers'], arrays['citation_counts'])
+    columns = {METRICS_COLUMNS[metric]: values for metric, values in metrics.items()}
+
+    for variant in METRICS_VARIANTS:
+        mask = arrays[variant]
+        variant_authors, variant_metrics = calculate_authors_metrics(
+            arrays['authors'][mask], arrays['papers'][mask], arrays['citation_counts'][mask])
+        positions = np.searchsorted(authors, variant_authors)
+        for metric, values in variant_metrics.items():
+            column = np.zeros(len(authors), dtype=np.int64)
+            column[positions] = values
+            columns['{}_{}'.format(variant, METRICS_COLUMNS[metric])] = column
+
+    return authors, columns
+
+
+def recompute_all_authors_metrics(batch_size=1000):
+    """Recompute the metrics of all the authors from the DB and store them.
+
+    The metrics are computed at once with ``calculate_authors_metrics``
+    and written in batches of ``batch_size`` authors, each with a single
+    statement, which also updates the metrics in the ``statistics`` of the
+    authors already having some. The session is committed after each batch.
+
+    Args:
+        batch_size (int): the number of authors written at once.
+
+    Returns:
+        int: the number of authors whose metrics were stored.
+    """
+    authors, columns = calculate_all_authors_metrics(get_authors_papers_arrays())
+    authors = authors.tolist()
+    columns = {column: values.tolist() for column, values in columns.items()}
+    updated = datetime.utcnow()
+
+    table = AuthorMetrics.__table__
+    statement = insert(table)
+    set_ = {column: statement.excluded[column] for column in columns}
+    set_['updated'] = statement.excluded.updated
+    set_['statistics'] = table.c.statistics.op('||')(func.jsonb_build_object(*[
+        value
+        for metric, column in sorted(METRICS_COLUMNS.items())
+        for value in (metric, statement.excluded[column])
+    ]))
+    statement = statement.on_conflict_do_update(index_elements=['author_recid'], set_=set_)
+
+    for start in range(0, len(authors), batch_size):
+        rows = []
+        for index in range(start, min(start + batch_size, len(authors))):
+            row = {column: values[index] for column, values in columns.items()}
+            row['author_recid'] = authors[index]
+            row['updated'] = updated
+            rows.append(row)
+        db.session.execute(statement, rows)
+        db.session.commit()
+
+    return len(authors)
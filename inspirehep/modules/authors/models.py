@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Models for Authors."""
+
+from __future__ import absolute_import, division, print_function
+
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from invenio_db import db
+
+
+class AuthorMetrics(db.Model):
+    """Precomputed metrics of an author.
+
+    The ``statistics`` are served as they are by the stats endpoint of the
+    author, while the metrics used to rank authors are also stored in their
+    own indexed columns.
+
+    The rows are updated by the ``refresh_pending_authors_metrics`` task when
+    the publications of an author, or their citations, change, and they are
+    created for all the authors with the ``update_metrics`` command of
+    ``inspirehep authors``.
+
+    The metrics of all the authors, including those restricted to citeable
+    and to published papers, are also recomputed at once from the DB by the
+    ``recompute_metrics`` command. The ``statistics`` of the rows it creates
+    are empty, and they are computed and stored in the background when the
+    stats endpoint is first requested.
+    """
+
+    __tablename__ = 'authors_metrics'
+
+    author_recid = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    citations = db.Column(db.Integer, default=0, nullable=False)
+    publications = db.Column(db.Integer, default=0, nullable=False)
+    h_index = db.Column(db.Integer, default=0, nullable=False, index=True)
+    i10_index = db.Column(db.Integer, default=0, nullable=False, index=True)
+    citeable_citations = db.Column(db.Integer, nullable=True)
+    citeable_publications = db.Column(db.Integer, nullable=True)
+    citeable_h_index = db.Column(db.Integer, nullable=True)
+    citeable_i10_index = db.Column(db.Integer, nullable=True)
+    published_citations = db.Column(db.Integer, nullable=True)
+    published_publications = db.Column(db.Integer, nullable=True)
+    published_h_index = db.Column(db.Integer, nullable=True)
+    published_i10_index = db.Column(db.Integer, nullable=True)
+    statistics = db.Column(postgresql.JSONB, nullable=True)
+    updated = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -25,6 +25,10 @@ from __future__ import absolute_import, division, print_function
 import json
 
 from elasticsearch_dsl import Q
+from flask import current_app, request
+from six.moves import range
+
+from invenio_records_rest.errors import InvalidQueryRESTError
 
 from inspirehep.modules.search import LiteratureSearch
 
@@ -35,6 +39,10 @@ class AuthorAPICitations(object):
     def serialize(self, pid, record, links_factory=None):
         """Return a list of citations for a given author recid.
 
+        The publications of the author are sorted by recid. If the ``page``
+        request argument is passed, only the citations of a page of ``size``
+        publications are returned.
+
         :param pid:
             Persistent identifier instance.
 
@@ -45,83 +53,121 @@ class AuthorAPICitations(object):
             Factory function for the link generation, which are added to
             the response.
         """
-        author_pid = pid.pid_value
+        publications = get_author_publications(pid.pid_value)
+
+        page = request.values.get('page', type=int)
+        if page is not None:
+            size = request.values.get(
+                'size', current_app.config['AUTHORS_CITATIONS_DEFAULT_SIZE'], type=int)
+            if page < 1 or size < 1:
+                raise InvalidQueryRESTError()
+            size = min(size, current_app.config['AUTHORS_CITATIONS_MAX_SIZE'])
+            publications = publications[(page - 1) * size:page * size]
+
+        return json.dumps(list(get_citations(publications)))
+
+
+def get_author_publications(author_recid):
+    """Get the publications of an author, sorted by recid.
+
+    Args:
+        author_recid (Union[int, str]): the recid of the author.
+
+    Returns:
+        List[dict]: the recid, the ``self`` reference and the recids of the
+        authors of each publication.
+    """
+    query = Q('match', authors__recid=author_recid)
+    search = LiteratureSearch().query('nested', path='authors', query=query)\
+                               .params(_source=[
+                                   'authors.recid',
+                                   'control_number',
+                                   'self',
+                               ])
+
+    publications = [result.to_dict() for result in search.scan()]
+    return sorted(publications, key=lambda publication: publication['control_number'])
+
+
+def get_citations(publications, batch_size=500):
+    """Get the citations of publications, with their self-citations.
+
+    The publications citing a batch of publications are found with a single
+    search, instead of one search per cited publication, and each citation is
+    classified as a self-citation when the citing and cited publications
+    share an author.
+
+    Args:
+        publications (List[dict]): the publications, as returned by
+            ``get_author_publications``.
+        batch_size (int): the number of publications whose citations are
+            searched at once.
+
+    Yields:
+        dict: the cited publication and its citations, in the order of
+        ``publications``.
+    """
+    for start in range(0, len(publications), batch_size):
+        batch = publications[start:start + batch_size]
         citations = {}
+        authors = {}
+        for publication in batch:
+            recid = publication['control_number']
+            authors[recid] = _get_authors_recids(publication)
+            citations[recid] = {
+                'citee': {
+                    'id': recid,
+                    'record': publication['self'],
+                },
+                'citers': [],
+            }
+
+        search = LiteratureSearch().query(
+            'terms', references__recid=list(citations)
+        ).params(_source=[
+            'authors.recid',
+            'collections',
+            'control_number',
+            'earliest_date',
+            'references.recid',
+            'self',
+        ])
 
-        query = Q('match', authors__recid=author_pid)
-        search = LiteratureSearch().query('nested', path='authors', query=query)\
-                                   .params(_source=[
-                                       'authors.recid',
-                                       'control_number',
-                                       'self',
-                                   ])
-
-        # For each publication co-authored by a given author...
         for result in search.scan():
-            result_source = result.to_dict()
-
-            recid = result_source['control_number']
-            authors = set([i['recid'] for i in result_source['authors']])
-            citations[recid] = {}
-
-            nested_search = LiteratureSearch().query({
-                "match": {
-                    "references.recid": recid
-                }
-            }).params(
-                _source=[
-                    "authors.recid",
-                    "collections",
-                    "control_number",
-                    "earliest_date",
-                    "self",
-                ]
+            citer = result.to_dict()
+            citer_authors = _get_authors_recids(citer)
+            cited_recids = set(
+                reference['recid'] for reference in citer.get('references', [])
+                if reference.get('recid') in citations
             )
 
-            # The source record that is being cited.
-            citations[recid]['citee'] = dict(
-                id=recid,
-                record=result_source['self'],
-            )
-            citations[recid]['citers'] = []
-
-            # Check all publications, which cite the parent record.
-            for nested_result in nested_search.scan():
-                nested_result_source = nested_result.to_dict()
-
-                # Not every signature has a recid (at least for demo records).
-                try:
-                    nested_authors = set(
-                        [i['recid'] for i in nested_result_source['authors']]
-                    )
-                except KeyError:
-                    nested_authors = set()
-
-                citation = dict(
-                    citer=dict(
-                        id=int(nested_result_source['control_number']),
-                        record=nested_result_source['self']
-                    ),
+            for recid in cited_recids:
+                citation = {
+                    'citer': {
+                        'id': int(citer['control_number']),
+                        'record': citer['self'],
+                    },
                     # If at least one author is shared, it's a self-citation.
-                    self_citation=len(authors & nested_authors) > 0,
-                )
-
-                # Get the earliest date of a citer.
-                try:
-                    citation['date'] = nested_result_source['earliest_date']
-                except KeyError:
-                    pass
-
-                # Get status if a citer is published.
-                # FIXME: As discussed with Sam, we should have a boolean flag
-                #        for this type of information.
-                try:
-                    citation['published_paper'] = "Published" in [
-                        i['primary'] for i in nested_result_source[
-                            'collections']]
-                except KeyError:
-                    citation['published_paper'] = False
+                    'self_citation': bool(authors[recid] & citer_authors),
+                    # FIXME: As discussed with Sam, we should have a boolean flag
+                    #        for this type of information.
+                    'published_paper': 'Published' in [
+                        collection['primary']
+                        for collection in citer.get('collections', [])
+                    ],
+                }
+                if 'earliest_date' in citer:
+                    citation['date'] = citer['earliest_date']
 
                 citations[recid]['citers'].append(citation)
 
-        return json.dumps(citations.values())
+        for publication in batch:
+            yield citations[publication['control_number']]
+
+
+def _get_authors_recids(record):
+    # Not every signature has a recid (at least for demo records).
+    return set(
+        author['recid'] for author in record.get('authors', [])
+        if 'recid' in author
+    )
@@ -25,7 +25,13 @@ from __future__ import absolute_import, division, print_function
 import json
 
 from elasticsearch_dsl import Q
+from flask import current_app, request
+from redis import RedisError
 
+from invenio_cache import current_cache
+from invenio_records_rest.errors import InvalidQueryRESTError
+
+from inspirehep.modules.records.indexer import get_index_generation
 from inspirehep.modules.search import LiteratureSearch
 
 
@@ -33,7 +39,12 @@ class AuthorAPICoauthors(object):
     """API endpoint for author collection returning co-authors."""
 
     def serialize(self, pid, record, links_factory=None):
-        """Return a list of co-authors for a given author recid.
+        """Return a page of the co-authors of a given author recid.
+
+        The co-authors are sorted by the number of times they appear on the
+        publications of the author. The page is selected with the ``page``
+        and ``size`` request arguments, and the pages are cached for
+        ``AUTHORS_COAUTHORS_CACHE_TIMEOUT`` seconds if it is set.
 
         :param pid:
             Persistent identifier instance.
@@ -45,34 +56,108 @@ class AuthorAPICoauthors(object):
             Factory function for the link generation, which are added to
             the response.
         """
-        author_pid = pid.pid_value
-        coauthors = {}
-
-        query = Q('match', authors__recid=author_pid)
-        search = LiteratureSearch().query('nested', path='authors', query=query)\
-                                   .params(_source=[
-                                       'authors.full_name',
-                                       'authors.recid',
-                                       'authors.record',
-                                   ])
-
-        for result in search.scan():
-            result_source = result.to_dict()['authors']
-
-            for author in result_source:
-                try:
-                    # Don't add the reference author.
-                    if author['recid'] != author_pid:
-                        if author['recid'] in coauthors:
-                            coauthors[author['recid']]['count'] += 1
-                        else:
-                            coauthors[author['recid']] = dict(
-                                count=1,
-                                full_name=author['full_name'],
-                                id=author['recid'],
-                                record=author['record'],
-                            )
-                except KeyError:
-                    pass
-
-        return json.dumps(coauthors.values())
+        page, size = get_coauthors_page_and_size()
+        timeout = current_app.config['AUTHORS_COAUTHORS_CACHE_TIMEOUT']
+        if not timeout:
+            return json.dumps(get_coauthors(pid.pid_value, page, size))
+
+        try:
+            key = get_coauthors_cache_key(pid.pid_value, record, page, size)
+            coauthors = current_cache.get(key)
+        except RedisError:
+            current_app.logger.exception('Cannot get the cached co-authors.')
+            return json.dumps(get_coauthors(pid.pid_value, page, size))
+
+        if coauthors is None:
+            coauthors = get_coauthors(pid.pid_value, page, size)
+            try:
+                current_cache.set(key, coauthors, timeout=timeout)
+            except RedisError:
+                current_app.logger.exception('Cannot cache the co-authors.')
+
+        return json.dumps(coauthors)
+
+
+def get_coauthors_page_and_size():
+    """Get the requested page of co-authors and its size.
+
+    Raises:
+        InvalidQueryRESTError: if the page or the size is not a positive
+            integer, or if the page ends after the first
+            ``AUTHORS_COAUTHORS_MAX_RESULTS`` co-authors.
+    """
+    page = request.values.get('page', 1, type=int)
+    size = request.values.get(
+        'size', current_app.config['AUTHORS_COAUTHORS_DEFAULT_SIZE'], type=int)
+    if page < 1 or size < 1:
+        raise InvalidQueryRESTError()
+
+    size = min(size, current_app.config['AUTHORS_COAUTHORS_MAX_SIZE'])
+    if page * size > current_app.config['AUTHORS_COAUTHORS_MAX_RESULTS']:
+        raise InvalidQueryRESTError()
+
+    return page, size
+
+
+def get_coauthors_cache_key(author_recid, record, page, size):
+    """Get the key under which a page of co-authors is cached.
+
+    The key contains the revision of the author record and the generation
+    of the Literature index, so that it changes when either the author or
+    the publications change.
+    """
+    index = LiteratureSearch.Meta.index
+    return 'authors:coauthors:{}:{}:{}:{}:{}'.format(
+        author_recid,
+        record.revision_id,
+        get_index_generation(index),
+        page,
+        size,
+    )
+
+
+def get_coauthors(author_recid, page, size):
+    """Get a page of the co-authors of an author.
+
+    The co-authors are counted by ES with a ``terms`` aggregation on the
+    nested authors of the publications of the author, so that neither the
+    publications nor all of their authors are fetched.
+
+    Args:
+        author_recid (Union[int, str]): the recid of the author.
+        page (int): the page of co-authors, starting at 1.
+        size (int): the number of co-authors in a page.
+
+    Returns:
+        List[dict]: the co-authors, with the number of times they appear on
+        the publications of the author.
+    """
+    start = (page - 1) * size
+
+    query = Q('match', authors__recid=author_recid)
+    search = LiteratureSearch().query('nested', path='authors', query=query)\
+                               .extra(size=0)
+    # The author is among the buckets, one more is needed to fill the page.
+    search.aggs.bucket('authors', 'nested', path='authors')\
+               .bucket('coauthors', 'terms', field='authors.recid', size=start + size + 1)\
+               .metric('author', 'top_hits', size=1, _source=[
+                   'authors.full_name',
+                   'authors.recid',
+                   'authors.record',
+               ])
+    aggregations = search.execute().to_dict()['aggregations']
+
+    coauthors = []
+    for bucket in aggregations['authors']['coauthors']['buckets']:
+        # Don't add the reference author.
+        if str(bucket['key']) == str(author_recid):
+            continue
+        author = bucket['author']['hits']['hits'][0]['_source']
+        coauthors.append({
+            'count': bucket['doc_count'],
+            'full_name': author.get('full_name'),
+            'id': bucket['key'],
+            'record': author.get('record'),
+        })
+
+    return coauthors[start:start + size]
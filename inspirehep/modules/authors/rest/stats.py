@@ -23,14 +23,12 @@
 from __future__ import absolute_import, division, print_function
 
 import json
-from collections import Counter
 
-from elasticsearch_dsl import Q
-
-from inspire_utils.helpers import force_list
-from inspire_utils.record import get_value
-from inspirehep.modules.search import LiteratureSearch
-from inspirehep.utils.stats import calculate_h_index, calculate_i10_index
+from inspirehep.modules.authors.metrics import (
+    get_author_statistics,
+    get_stored_author_statistics,
+)
+from inspirehep.modules.authors.tasks import refresh_authors_metrics
 
 
 class AuthorAPIStats(object):
@@ -39,6 +37,11 @@ class AuthorAPIStats(object):
     def serialize(self, pid, record, links_factory=None):
         """Return a different metrics for a given author recid.
 
+        The metrics precomputed in the ``authors_metrics`` table are
+        returned. For the authors missing from it, or whose statistics were
+        never computed, see ``recompute_all_authors_metrics``, they are
+        computed on the fly, and stored in the background.
+
         :param pid:
             Persistent identifier instance.
 
@@ -49,77 +52,9 @@ class AuthorAPIStats(object):
             Factory function for the link generation, which are added to
             the response.
         """
-        author_pid = pid.pid_value
-
-        fields = set()
-        keywords = []
-
-        statistics = {}
-        statistics['citations'] = 0
-        statistics['publications'] = 0
-        statistics['types'] = {}
-
-        statistics_citations = {}
-
-        query = Q('match', authors__recid=author_pid)
-        search = LiteratureSearch().query('nested', path='authors', query=query)\
-                                   .params(_source=[
-                                       'citation_count',
-                                       'control_number',
-                                       'facet_inspire_doc_type',
-                                       'facet_inspire_categories',
-                                       'keywords',
-                                   ])
-
-        for result in search.scan():
-            result_source = result.to_dict()
-
-            # Increment the count of the total number of publications.
-            statistics['publications'] += 1
-
-            # Increment the count of citations.
-            citation_count = result_source.get('citation_count', 0)
-
-            statistics['citations'] += citation_count
-            statistics_citations[result_source['control_number']] = \
-                citation_count
-
-            # Count how many times certain type of publication was published.
-            try:
-                publication_type = result_source.get(
-                    'facet_inspire_doc_type', [])[0]
-            except IndexError:
-                pass
-
-            if publication_type:
-                if publication_type in statistics['types']:
-                    statistics['types'][publication_type] += 1
-                else:
-                    statistics['types'][publication_type] = 1
-
-            # Get fields.
-            for field in result_source.get('facet_inspire_categories', []):
-                fields.add(field)
-
-            # Get keywords.
-            keywords.extend([
-                k for k in force_list(
-                    get_value(result_source, 'keywords.value'))
-                if k != '* Automatic Keywords *'])
-
-        # Calculate h-index together with i10-index.
-        statistics['hindex'] = calculate_h_index(statistics_citations)
-        statistics['i10index'] = calculate_i10_index(statistics_citations)
-
-        if fields:
-            statistics['fields'] = list(fields)
-
-        # Return the top 25 keywords.
-        if keywords:
-            counter = Counter(keywords)
-            statistics['keywords'] = [{
-                'count': i[1],
-                'keyword': i[0]
-            } for i in counter.most_common(25)]
+        statistics = get_stored_author_statistics(pid.pid_value)
+        if statistics is None:
+            statistics = get_author_statistics(pid.pid_value)
+            refresh_authors_metrics.delay([int(pid.pid_value)])
 
         return json.dumps(statistics)
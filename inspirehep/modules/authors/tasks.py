@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Authors tasks."""
+
+from __future__ import absolute_import, division, print_function
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from flask import current_app
+
+from invenio_db import db
+
+from inspirehep.modules.authors.metrics import update_authors_metrics
+from inspirehep.utils.cache import get_redis_client
+
+
+logger = get_task_logger(__name__)
+
+AUTHORS_METRICS_PENDING_KEY = 'authors:metrics:pending'
+"""Key of the Redis set of the recids of the authors whose metrics must be updated."""
+
+
+@shared_task(ignore_result=True)
+def refresh_authors_metrics(author_recids):
+    """Update the precomputed metrics of authors.
+
+    Args:
+        author_recids (List[int]): the recids of the authors.
+    """
+    update_authors_metrics(author_recids)
+    db.session.commit()
+    logger.info('Updated the metrics of %s authors', len(author_recids))
+
+
+@shared_task(ignore_result=True)
+def refresh_pending_authors_metrics():
+    """Update the metrics of the authors queued by ``schedule_authors_metrics_update``.
+
+    This task is run periodically, see ``CELERY_BEAT_SCHEDULE``. The authors
+    are updated in batches of ``AUTHORS_METRICS_UPDATE_BATCH_SIZE``, and
+    those of a batch which failed are queued again.
+    """
+    redis = get_redis_client()
+    batch_size = current_app.config['AUTHORS_METRICS_UPDATE_BATCH_SIZE']
+
+    count = 0
+    author_recids = redis.srandmember(AUTHORS_METRICS_PENDING_KEY, batch_size)
+    while author_recids:
+        pipeline = redis.pipeline()
+        for author_recid in author_recids:
+            pipeline.srem(AUTHORS_METRICS_PENDING_KEY, author_recid)
+        # Authors removed meanwhile by another run are left to it.
+        author_recids = [
+            int(author_recid)
+            for author_recid, removed in zip(author_recids, pipeline.execute()) if removed
+        ]
+
+        if author_recids:
+            try:
+                refresh_authors_metrics(author_recids)
+            except Exception:
+                redis.sadd(AUTHORS_METRICS_PENDING_KEY, *author_recids)
+                raise
+            count += len(author_recids)
+
+        author_recids = redis.srandmember(AUTHORS_METRICS_PENDING_KEY, batch_size)
+
+    return count
+
+
+def schedule_authors_metrics_update(author_recids):
+    """Queue the update of the metrics of authors.
+
+    The recids are added to a set in Redis, so that the metrics of an author
+    whose publications change several times are updated once, by the next
+    run of ``refresh_pending_authors_metrics``. As the metrics are computed
+    from ES, it must be called once the changes were indexed.
+
+    Args:
+        author_recids (Iterable[int]): the recids of the authors.
+    """
+    author_recids = sorted(author_recids)
+    if not author_recids:
+        return
+
+    get_redis_client().sadd(AUTHORS_METRICS_PENDING_KEY, *author_recids)
@@ -34,6 +34,7 @@ from invenio_records.models import RecordMetadata
 from inspire_dojson.utils import get_recid_from_ref
 from inspire_utils.record import get_value
 from inspirehep.modules.search.api import LiteratureSearch
+from inspirehep.utils.record_getter import get_db_records_fields
 
 
 SIGNATURE_FIELDS = [
@@ -46,6 +47,23 @@ SIGNATURE_FIELDS = [
     'control_number',
 ]
 
+PUBLICATION_FIELDS = [
+    'abstracts.value',
+    'authors.full_name',
+    'collaborations.value',
+    'control_number',
+    'inspire_categories.term',
+    'keywords.value',
+    'titles.title',
+]
+
+
+def _get_all_literature_records(paths):
+    return get_db_records_fields(
+        paths,
+        [type_coerce(RecordMetadata.json, JSONB)['_collections'].contains(['Literature'])],
+    )
+
 
 def get_all_signatures():
     """Get all signatures from the DB.
@@ -57,12 +75,9 @@ def get_all_signatures():
         dict: a signature.
 
     """
-    query = RecordMetadata.query.with_entities(RecordMetadata.json).filter(
-        type_coerce(RecordMetadata.json, JSONB)['_collections'].contains(['Literature']))
-
-    for record in query.yield_per(1000):
-        publication_id = record.json['control_number']
-        for author in record.json.get('authors', []):
+    for record in _get_all_literature_records(SIGNATURE_FIELDS):
+        publication_id = record['control_number']
+        for author in record.get('authors', []):
             yield _build_signature(author, publication_id)
 
 
@@ -77,12 +92,9 @@ def get_all_curated_signatures():
         dict: a curated signature.
 
     """
-    query = RecordMetadata.query.with_entities(RecordMetadata.json).filter(
-        type_coerce(RecordMetadata.json, JSONB)['_collections'].contains(['Literature']))
-
-    for record in query.yield_per(1000):
-        publication_id = record.json['control_number']
-        for author in record.json.get('authors', []):
+    for record in _get_all_literature_records(SIGNATURE_FIELDS):
+        publication_id = record['control_number']
+        for author in record.get('authors', []):
             if author.get('curated_relation'):
                 yield _build_signature(author, publication_id)
 
@@ -119,11 +131,8 @@ def get_all_publications():
         dict: a publication.
 
     """
-    query = RecordMetadata.query.with_entities(RecordMetadata.json).filter(
-        type_coerce(RecordMetadata.json, JSONB)['_collections'].contains(['Literature']))
-
-    for record in query.yield_per(1000):
-        yield _build_publication(record.json)
+    for record in _get_all_literature_records(PUBLICATION_FIELDS):
+        yield _build_publication(record)
 
 
 def _build_publication(record):
@@ -35,32 +35,31 @@ from six.moves.urllib.parse import urlparse, unquote
 from invenio_records.api import RecordMetadata
 
 from inspire_dojson.utils import get_recid_from_ref, strip_empty_values, absolute_url
-from inspire_schemas.api import validate
 from inspire_schemas.builders import LiteratureBuilder
 from invenio_files_rest.models import Bucket
 from invenio_pidstore.errors import PIDDoesNotExistError
 from invenio_pidstore.models import PersistentIdentifier
 from invenio_records_files.api import Record
 from invenio_db import db
-from sqlalchemy import Text, or_, not_, cast, type_coerce
-from sqlalchemy.dialects.postgresql import JSONB, ARRAY
-from sqlalchemy.sql.functions import GenericFunction
+from sqlalchemy import distinct, func, tuple_
 
 from inspirehep.modules.pidstore.minters import inspire_recid_minter
 from inspirehep.modules.pidstore.utils import get_pid_type_from_schema, get_endpoint_from_pid_type
-from inspirehep.modules.records.utils import get_pid_from_record_uri, populate_earliest_date
+from inspirehep.modules.records.models import RecordCitations
+from inspirehep.modules.records.utils import (
+    get_pid_for_citations,
+    get_pid_from_record_uri,
+    populate_earliest_date,
+)
 from inspirehep.utils.record_getter import (
     RecordGetterError,
     get_es_record_by_uuid
 )
+from inspirehep.utils.schema import validate
 
 MAX_UNIQUE_KEY_COUNT = 50000
 
 
-class referenced_records(GenericFunction):
-    type = ARRAY(Text)
-
-
 class InspireRecord(Record):
     """Record class that fetches records from DataBase."""
 
@@ -600,34 +599,18 @@ class InspireRecord(Record):
         return absolute_url(u'/api/{endpoint}/{control_number}'.format(endpoint=endpoint,
                                                                        control_number=pid_value))
 
-    def _get_index_ref(self):
-        """Return shorten version of pid_value/pid_type for proper querying with index"""
-        pid_value = self.get('control_number')
-        pid_type = get_pid_type_from_schema(self.get('$schema'))
-        endpoint = get_endpoint_from_pid_type(pid_type)
-        shorten_endpoint = endpoint[:3]
-        return "{pid_value}{shorten_endpoint}".format(pid_value=pid_value,
-                                                      shorten_endpoint=shorten_endpoint)
-
     def _query_citing_records(self, show_duplicates=False):
         """Returns records which cites this one."""
-        index_ref = self._get_index_ref()
-        if not index_ref:
-            raise Exception("There is no index_ref for this object")
-        citation_query = RecordMetadata.query.with_entities(RecordMetadata.id,
-                                                            RecordMetadata.json['control_number'])
-        citation_filter = referenced_records(RecordMetadata.json).contains([index_ref])
-        filter_deleted_records = or_(not_(type_coerce(RecordMetadata.json, JSONB).has_key('deleted')),  # noqa: W601
-                                     not_(RecordMetadata.json['deleted'] == cast(True, JSONB)))
-        only_literature_collection = type_coerce(RecordMetadata.json, JSONB)['_collections'].contains(['Literature'])
-        filter_superseded_records = or_(
-            not_(type_coerce(RecordMetadata.json, JSONB).has_key('related_records')),  # noqa: W601
-            not_(type_coerce(RecordMetadata.json, JSONB)['related_records'].contains([{'relation': 'successor'}]))
+        cited_pid_type, cited_pid_value = get_pid_for_citations(self)
+        citations = RecordMetadata.query.join(
+            RecordCitations, RecordCitations.citer_id == RecordMetadata.id
+        ).filter(
+            RecordCitations.cited_pid_type == cited_pid_type,
+            RecordCitations.cited_pid_value == cited_pid_value,
+        ).with_entities(
+            RecordMetadata.id,
+            RecordMetadata.json['control_number'],
         )
-        citations = citation_query.filter(citation_filter,
-                                          filter_deleted_records,
-                                          filter_superseded_records,
-                                          only_literature_collection)
         if not show_duplicates:
             # It just hides duplicates, and still can show citations
             # which do not have proper PID in PID store
@@ -645,6 +628,43 @@ class InspireRecord(Record):
         count = self._query_citing_records(show_duplicates).count()
         return count
 
+    @staticmethod
+    def get_citations_counts(pids):
+        """Returns citations count for many records with a single query.
+
+        Duplicated citing records are counted once, as in
+        ``get_citations_count``.
+
+        Args:
+            pids (Iterable[Tuple[str, str]]): pids of the cited records, as
+                returned by ``get_pid_for_citations``.
+
+        Returns:
+            dict: the citations count of each pid.
+        """
+        pids = [(pid_type, str(pid_value)) for (pid_type, pid_value) in pids]
+        counts = dict.fromkeys(pids, 0)
+        if not pids:
+            return counts
+
+        query = db.session.query(
+            RecordCitations.cited_pid_type,
+            RecordCitations.cited_pid_value,
+            func.count(distinct(RecordMetadata.json['control_number'])),
+        ).join(
+            RecordMetadata, RecordCitations.citer_id == RecordMetadata.id
+        ).filter(
+            tuple_(RecordCitations.cited_pid_type, RecordCitations.cited_pid_value).in_(pids)
+        ).group_by(
+            RecordCitations.cited_pid_type,
+            RecordCitations.cited_pid_value,
+        )
+
+        for pid_type, pid_value, count in query:
+            counts[(pid_type, pid_value)] = count
+
+        return counts
+
     def dumps(self):
         """Returns a dict 'representation' of the record.
 
@@ -660,7 +680,26 @@ class InspireRecord(Record):
         """Gets a deep copy of the record's json."""
         return deepcopy(dict(self))
 
-    def get_modified_references(self):
+    def get_previous_version(self, version_id=None):
+        """Return the JSON of the previous version of the record.
+
+        Note: record should be committed to DB in order to correctly get the
+        previous version.
+
+        Args:
+            version_id (Optional[int]): the version whose previous version is
+                returned, the current one if not passed.
+
+        Returns:
+            dict: the previous version, empty if there is none.
+        """
+        try:
+            return self.model.versions.filter_by(
+                version_id=version_id or self.model.version_id).one().previous.json
+        except AttributeError:
+            return {}
+
+    def get_modified_references(self, since_version_id=None):
         """Return the ids of the references diff between the latest and the
         previous version.
 
@@ -676,6 +715,10 @@ class InspireRecord(Record):
         Note: record should be committed to DB in order to correctly get the
         previous version.
 
+        Args:
+            since_version_id (Optional[int]): if passed, the diff is computed
+                against the version previous to this one instead, so that it
+                covers all the changes made since.
 
         Returns:
             Set[Tuple[str, int]]: pids of references changed from the previous
@@ -688,11 +731,7 @@ class InspireRecord(Record):
                 if 'record' in ref
             ])
 
-        try:
-            prev_version = self.model.versions.filter_by(
-                version_id=self.model.version_id).one().previous.json
-        except AttributeError:
-            prev_version = {}
+        prev_version = self.get_previous_version(since_version_id)
 
         changed_deleted_status = self.get('deleted', False) ^ prev_version.get('deleted', False)
 
@@ -728,3 +767,36 @@ class ESRecord(InspireRecord):
             return arrow.get(self['_updated']).naive
         else:
             return datetime.utcnow()
+
+
+class EnhancedInspireRecord(InspireRecord):
+    """Record class holding the fields added for ElasticSearch.
+
+    Instead of a deep copy of the record, it is an overlay on top of its
+    JSON: it shares with it all the values that are not changed when the
+    record is enhanced with ``enhance_before_index``. It must therefore be
+    treated as read-only once enhanced.
+    """
+
+    copied_fields = ('abstracts', 'authors')
+    """Lists of objects to which the enhancement adds fields in place."""
+
+    @classmethod
+    def from_record(cls, record):
+        """Create the overlay of an ``InspireRecord``."""
+        data = dict(record)
+        for field in cls.copied_fields:
+            if field in data:
+                data[field] = [dict(item) for item in data[field]]
+
+        return cls(data, model=record.model)
+
+    def dumps(self):
+        """Returns a shallow dict 'representation' of the record.
+
+        Unlike ``InspireRecord.dumps``, the record is not deep copied, which
+        is only safe as long as the representation is not modified in place.
+        """
+        base_dict = dict(self)
+        populate_earliest_date(base_dict)
+        return base_dict
@@ -32,6 +32,8 @@ from sqlalchemy.dialects.postgresql import JSONB
 from invenio_records.models import RecordMetadata
 from inspire_utils.record import get_value
 
+from inspirehep.utils.record_getter import get_db_records_fields
+
 
 def increase_cited_count(result, identifier, core):
     """Increases the number of times a reference with the same identifier has appeared"""
@@ -75,18 +77,19 @@ def add_linked_ids(dois, arxiv_ids, linked_ids):
 def get_all_unlinked_references():
     """Return a list of dict, in which each dictionary corresponds to one reference object
     and the status of core or non core"""
-    query = (
-        RecordMetadata.query
-        .filter(
-            type_coerce(RecordMetadata.json, JSONB)['_collections']
-            .contains(['Literature'])
-        )
-        .with_entities(RecordMetadata.json)
+    records = get_db_records_fields(
+        [
+            'core',
+            'references.record',
+            'references.reference.arxiv_eprint',
+            'references.reference.dois',
+        ],
+        [type_coerce(RecordMetadata.json, JSONB)['_collections'].contains(['Literature'])],
     )
 
-    for record in query.yield_per(1000):
-        core = record.json.get('core')
-        for reference in record.json.get('references', []):
+    for record in records:
+        core = record.get('core')
+        for reference in record.get('references', []):
             if 'record' not in reference:
                 yield {'core': core, 'reference': reference}
 
@@ -22,25 +22,32 @@
 
 from __future__ import absolute_import, division, print_function
 
-from time import sleep
+from copy import deepcopy
+from collections import deque
+from time import sleep, time
 
 import click
 import click_spinner
 import csv
 import json
 import pprint
+import sys
 
 from os import path, makedirs
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from multiprocessing.pool import mapstar, RUN, ThreadPool, IMapUnorderedIterator, Pool
 
+from elasticsearch.helpers import bulk
 from invenio_db import db
 from invenio_files_rest.models import ObjectVersion
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from flask import current_app
 from flask.cli import with_appcontext
+from inspire_schemas.utils import validate as validate_without_cache
+from jsonschema import ValidationError
 from invenio_records_files.models import RecordsBuckets
+from invenio_search import current_search_client as es
 from invenio_workflows import workflow_object_class, ObjectStatus
 from invenio_workflows.models import WorkflowObjectModel
 
@@ -50,15 +57,38 @@ from inspirehep.utils.record_getter import (
     get_es_record,
     RecordGetterError,
 )
+from inspirehep.modules.authors.metrics import (
+    METRICS_VARIANTS,
+    get_authors_papers_arrays,
+)
+from inspirehep.modules.records.api import EnhancedInspireRecord, InspireRecord
 from inspirehep.modules.records.checkers import check_unlinked_references
+from inspirehep.modules.records.indexer import (
+    ReindexJob,
+    create_versioned_index,
+    finish_versioned_index,
+    get_index_from_pid_type,
+    swap_index_alias,
+)
+from inspirehep.modules.records.pipeline import BulkIndexPipeline
+from inspirehep.modules.records.receivers import enhance_before_index
+from inspirehep.modules.records.utils import populate_recid_from_ref
 from inspirehep.modules.records.tasks import batch_reindex
 
 from invenio_records.models import RecordMetadata
 from inspirehep.modules.search.api import LiteratureSearch
+from inspirehep.utils.schema import validate
+from inspirehep.utils.stats import (
+    calculate_authors_metrics,
+    calculate_h_index,
+    calculate_i10_index,
+)
 
 
 from sqlalchemy import (
     cast,
+    func,
+    type_coerce,
 )
 
 from sqlalchemy.dialects.postgresql import JSONB
@@ -95,24 +125,6 @@ def unlinked_references(doi_file_name, arxiv_file_name):
         arxiv_file_name.write(u'{i[0]}: {i[1]}\n'.format(i=item))
 
 
-def next_batch(iterator, batch_size):
-    """Get first batch_size elements from the iterable, or remaining if less.
-
-    :param iterator: the iterator for the iterable
-    :param batch_size: size of the requested batch
-    :return: batch (list)
-    """
-    batch = []
-
-    try:
-        for idx in range(batch_size):
-            batch.append(next(iterator))
-    except StopIteration:
-        pass
-
-    return batch
-
-
 def get_query_records_to_index(pid_types):
     """Return a query for retrieving all records by pid_type.
 
@@ -166,19 +178,255 @@ def _dump_errors_to_file(errors, log_file_path, tasks_uuids, msg='Check errors i
         click.secho('{}: {}'.format(msg, log_file_path))
 
 
+CATCH_UP_MARGIN = 60
+"""Seconds by which the records updated before a new index was started to be
+filled are considered as changed since then."""
+
+
+def _get_batches_to_index(job, pid_types, batch_size):
+    """Get the batches of records to index, starting from the job checkpoints.
+
+    The records of each PID type are taken in order of the ``id`` of their
+    persistent identifier, using it as a keyset instead of an offset.
+
+    Yields:
+        Tuple[str, int, List[str]]: the PID type of the records of the batch,
+        the ``id`` of its last persistent identifier and the record UUIDs.
+    """
+    for pid_type in pid_types:
+        checkpoint = job.get_checkpoint(pid_type)
+        while True:
+            batch = get_query_records_to_index([pid_type]).add_columns(
+                PersistentIdentifier.id,
+            ).filter(
+                PersistentIdentifier.id > checkpoint,
+            ).order_by(
+                PersistentIdentifier.id,
+            ).limit(batch_size).all()
+            if not batch:
+                break
+
+            checkpoint = batch[-1][1]
+            yield pid_type, checkpoint, [str(item[0]) for item in batch]
+
+
+def _get_failed_batches(job, batch_size):
+    """Get the batches of records that failed during the previous reindex."""
+    uuids = job.pop_failed(batch_size)
+    while uuids:
+        yield None, None, uuids
+        uuids = job.pop_failed(batch_size)
+
+
+def _get_index_to_replace(pid_types):
+    """Get the index and document type shared by the records of the PID types."""
+    indexes = set(get_index_from_pid_type(pid_type) for pid_type in pid_types)
+    if len(indexes) != 1:
+        raise click.UsageError(
+            'The records of {} are not in the same index.'.format(', '.join(pid_types)),
+        )
+    return indexes.pop()
+
+
+def _count_records_to_index(pid_types):
+    """Count the records which are expected in the index of the PID types."""
+    return get_query_records_to_index(pid_types).join(
+        RecordMetadata,
+        RecordMetadata.id == PersistentIdentifier.object_uuid,
+    ).filter(
+        func.coalesce(type_coerce(RecordMetadata.json, JSONB)['deleted'].astext, 'false') != 'true',
+    ).count()
+
+
+def _catch_up_new_index(pid_types, new_index, doc_type, since, batch_size, request_timeout):
+    """Apply to the new index the changes to the records since a given time.
+
+    While the new index is being filled, the records which are modified are
+    indexed into the live index only, so they are indexed again into the new
+    one, and the deleted records are removed from it.
+
+    Returns:
+        int: the number of records changed since then.
+    """
+    records = db.session.query(
+        RecordMetadata.id,
+        type_coerce(RecordMetadata.json, JSONB)['deleted'].astext,
+    ).join(
+        PersistentIdentifier,
+        PersistentIdentifier.object_uuid == RecordMetadata.id,
+    ).filter(
+        PersistentIdentifier.pid_type.in_(pid_types),
+        PersistentIdentifier.object_type == 'rec',
+        RecordMetadata.updated >= datetime.utcfromtimestamp(since),
+    ).distinct().all()
+
+    uuids_to_index = [str(uuid) for uuid, deleted in records if deleted != 'true']
+    uuids_to_delete = [str(uuid) for uuid, deleted in records if deleted == 'true']
+
+    for start in range(0, len(uuids_to_index), batch_size):
+        batch_reindex(
+            uuids_to_index[start:start + batch_size],
+            request_timeout=request_timeout,
+            index=new_index,
+        )
+    bulk(
+        es,
+        (
+            {'_op_type': 'delete', '_index': new_index, '_type': doc_type, '_id': uuid}
+            for uuid in uuids_to_delete
+        ),
+        request_timeout=request_timeout,
+        raise_on_error=False,
+    )
+
+    return len(records)
+
+
+def _replace_index(pid_types, index, doc_type, new_index, started, batch_size,
+                   request_timeout, yes_i_know, keep_old_index):
+    """Validate the new index filled by ``simpleindex`` and make it live.
+
+    Returns:
+        bool: whether the new index replaced the live one.
+    """
+    click.secho('Restoring the settings of {}...'.format(new_index), fg='green')
+    finish_versioned_index(index, new_index)
+
+    # The changes made while the new index was filled only went to the live one.
+    expected = _count_records_to_index(pid_types)
+    catch_up_start = time()
+    changed = _catch_up_new_index(
+        pid_types, new_index, doc_type, started - CATCH_UP_MARGIN, batch_size, request_timeout,
+    )
+    click.secho('Reindexed {} records changed in the meantime.'.format(changed), fg='green')
+
+    es.indices.refresh(index=new_index)
+    indexed = es.count(index=new_index)['count']
+    if indexed != expected:
+        click.secho(
+            '{} has {} records instead of {}: the live index is not replaced, '
+            'run the same command again to resume.'.format(new_index, indexed, expected),
+            fg='red',
+        )
+        return False
+
+    delete_live_index = not es.indices.exists_alias(name=index)
+    if delete_live_index and not yes_i_know:
+        click.confirm(
+            '{} is an index, not an alias, so it has to be deleted when '
+            'the alias to {} is created. Continue?'.format(index, new_index),
+            abort=True,
+        )
+    old_indexes = swap_index_alias(index, new_index, delete_live_index=delete_live_index)
+    click.secho('{} now points to {}.'.format(index, new_index), fg='green')
+
+    _catch_up_new_index(
+        pid_types, new_index, doc_type, catch_up_start - CATCH_UP_MARGIN, batch_size,
+        request_timeout,
+    )
+
+    if old_indexes and not keep_old_index:
+        es.indices.delete(index=','.join(old_indexes))
+        click.secho('Deleted {}.'.format(', '.join(old_indexes)), fg='green')
+
+    return True
+
+
+class ReindexProgress(object):
+    """Results of the reindexing tasks of ``simpleindex``."""
+
+    def __init__(self, job, total, report_interval):
+        self.job = job
+        self.total = total
+        self.report_interval = report_interval
+        self.success = 0
+        self.skipped = 0
+        self.failures = []
+        self.batch_errors = []
+        self.failed_batches_uuids = {}
+        self.start = self.last_report = time()
+
+    @property
+    def errors(self):
+        return len(self.failures) + sum(
+            len(uuids) for uuids in self.failed_batches_uuids.values()
+        )
+
+    def collect(self, pid_type, checkpoint, task, uuids):
+        """Collect the results of a finished task and record them in the job."""
+        if task.failed():
+            self.batch_errors.append({
+                'task_id': task.id,
+                'error': task.result,
+            })
+            self.failed_batches_uuids[task.id] = uuids
+            success, skipped, failed_uuids = 0, 0, uuids
+        else:
+            result = task.result
+            self.failures += result['failures']
+            success, skipped = result['success'], result['skipped']
+            failed_uuids = [
+                op_result['_id']
+                for failure in result['failures']
+                for op_result in failure.values()
+                if isinstance(op_result, dict) and '_id' in op_result
+            ]
+
+        self.success += success
+        self.skipped += skipped
+        if checkpoint is None:
+            self.job.ack_retried(uuids, failed_uuids)
+        else:
+            self.job.add_results(pid_type, checkpoint, success, skipped, failed_uuids)
+
+    def report(self, force=False):
+        """Echo the throughput, the ETA and the number of errors so far."""
+        now = time()
+        if not force and now - self.last_report < self.report_interval:
+            return
+        self.last_report = now
+
+        processed = self.success + self.skipped + self.errors
+        rate = processed / (now - self.start) if now > self.start else 0.0
+        eta = timedelta(seconds=int((self.total - processed) / rate)) if rate else 'unknown'
+        click.echo('Progress: {}/{} records, {:.1f} docs/s, ETA {}, {} errors'.format(
+            processed, self.total, rate, eta, self.errors,
+        ))
+
+
 @click.command()
 @click.option('--yes-i-know', is_flag=True)
 @click.option('-t', '--pid-type', multiple=True, required=True)
 @click.option('-s', '--batch-size', default=200)
 @click.option('-q', '--queue-name', default='indexer_task')
 @click.option('-l', '--log-path', default='/tmp/inspire/')
+@click.option('-w', '--max-in-flight', default=50)
+@click.option('-i', '--report-interval', default=10)
+@click.option('--restart', is_flag=True)
+@click.option('--retry-failed', is_flag=True)
+@click.option('--new-index', is_flag=True)
+@click.option('--keep-old-index', is_flag=True)
 @with_appcontext
-def simpleindex(yes_i_know, pid_type, batch_size, queue_name, log_path):
+def simpleindex(yes_i_know, pid_type, batch_size, queue_name, log_path,
+                max_in_flight, report_interval, restart, retry_failed,
+                new_index, keep_old_index):
     """Bulk reindex all records in a parallel manner.
 
     Indexes in batches all articles belonging to the given pid_types.
     Indexing errors are saved in the log_path folder.
 
+    The progress is checkpointed in Redis, see ``ReindexJob``: if the
+    reindexing is interrupted, running the same command again resumes it
+    where it stopped. The UUIDs of the records which failed are kept, and
+    can be reindexed again with ``--retry-failed``.
+
+    With ``--new-index``, the records are not reindexed in place but into a
+    new index, created with refresh and replicas turned off. Once all the
+    records are indexed without failures, the records changed in the
+    meantime are indexed again, the number of documents is checked against
+    the DB and the alias under which the index is searched is atomically
+    moved to the new index.
+
     Args:
         yes_i_know (bool): if True, skip confirmation screen
         pid_type (List[str]): array of PID types, allowed: lit, con, exp, jou,
@@ -186,6 +434,17 @@ def simpleindex(yes_i_know, pid_type, batch_size, queue_name, log_path):
         batch_size (int): number of documents per batch sent to workers.
         queue_name (str): name of the celery queue
         log_path (str): path of the indexing logs
+        max_in_flight (int): maximum number of batches sent to workers and
+            not yet indexed.
+        report_interval (int): number of seconds between progress reports.
+        restart (bool): if True, start over instead of resuming an
+            interrupted reindexing.
+        retry_failed (bool): if True, only reindex the records which failed
+            during the previous reindexing.
+        new_index (bool): if True, reindex into a new index which replaces
+            the live one at the end.
+        keep_old_index (bool): if True, do not delete the index replaced by
+            the new one.
 
     Returns:
         None
@@ -196,78 +455,176 @@ def simpleindex(yes_i_know, pid_type, batch_size, queue_name, log_path):
             abort=True,
         )
 
-    click.secho('Sending record UUIDs to the indexing queue...', fg='green')
-
-    query = get_query_records_to_index(pid_type)
-
-    request_timeout = current_app.config.get('INDEXER_BULK_REQUEST_TIMEOUT')
-    all_tasks = []
-    uuid_records_per_tasks = {}
-
-    with click.progressbar(
-        query.yield_per(2000),
-        length=query.count(),
-        label='Scheduling indexing tasks'
-    ) as items:
-        batch = next_batch(items, batch_size)
-
-        while batch:
-            uuids = [str(item[0]) for item in batch]
-            indexer_task = batch_reindex.apply_async(
-                kwargs={
-                    'uuids': uuids,
-                    'request_timeout': request_timeout,
-                },
-                queue=queue_name,
+    job = ReindexJob(pid_type)
+    if retry_failed:
+        recovered = job.recover_retrying()
+        if recovered:
+            click.secho(
+                'Retrying again {} records of an interrupted retrying.'.format(recovered),
+                fg='yellow',
             )
+        total = job.failed_count()
+        batches = _get_failed_batches(job, batch_size)
+    else:
+        unfinished_index, _ = job.get_index()
+        resume = job.exists() and not restart
+        if resume and new_index and not unfinished_index:
+            click.secho(
+                'Starting over, as the interrupted reindexing was not into a new index.',
+                fg='yellow',
+            )
+            resume = False
 
-            uuid_records_per_tasks[indexer_task.id] = uuids
-            all_tasks.append(indexer_task)
-            batch = next_batch(items, batch_size)
-
-    click.secho('Created {} tasks.'.format(len(all_tasks)), fg='green')
+        if not resume:
+            if unfinished_index:
+                es.indices.delete(index=unfinished_index, ignore=404)
+            job.reset()
+        else:
+            click.secho(
+                'Resuming the interrupted reindexing: {success} succeeded, '
+                '{skipped} unchanged and {failures} failed so far.'.format(**job.get_counts()),
+                fg='yellow',
+            )
+        total = sum(
+            get_query_records_to_index([pid_type_]).filter(
+                PersistentIdentifier.id > job.get_checkpoint(pid_type_),
+            ).count() for pid_type_ in pid_type
+        )
+        batches = _get_batches_to_index(job, pid_type, batch_size)
 
-    with click.progressbar(
-        length=len(all_tasks),
-        label='Indexing records'
-    ) as progressbar:
-        def _finished_tasks_count():
-            return len(filter(lambda task: task.ready(), all_tasks))
+    target_index, started = job.get_index()
+    if new_index and not target_index and not retry_failed:
+        started = time()
+        index, _ = _get_index_to_replace(pid_type)
+        target_index = create_versioned_index(index)
+        job.set_index(target_index, started)
+    if target_index:
+        click.secho('Indexing into {}.'.format(target_index), fg='green')
 
-        while len(all_tasks) != _finished_tasks_count():
-            sleep(0.5)
-            # this is so click doesn't divide by 0:
-            progressbar.pos = _finished_tasks_count() or 1
-            progressbar.update(0)
+    click.secho('Sending {} record UUIDs to the indexing queue...'.format(total), fg='green')
 
-    failures = []
-    successes = 0
-    batch_errors = []
+    request_timeout = current_app.config.get('INDEXER_BULK_REQUEST_TIMEOUT')
+    progress = ReindexProgress(job, total, report_interval)
+    in_flight = deque()
+
+    def _wait_for_tasks(max_tasks):
+        # Only the oldest task is polled, so that the checkpoint only moves
+        # past batches which are all done.
+        while len(in_flight) > max_tasks:
+            if not in_flight[0][2].ready():
+                sleep(0.5)
+                continue
+            progress.collect(*in_flight.popleft())
+            progress.report()
+
+    for pid_type_, checkpoint, uuids in batches:
+        indexer_task = batch_reindex.apply_async(
+            kwargs={
+                'uuids': uuids,
+                'request_timeout': request_timeout,
+                'index': target_index,
+            },
+            queue=queue_name,
+        )
+        in_flight.append((pid_type_, checkpoint, indexer_task, uuids))
+        _wait_for_tasks(max_in_flight - 1)
 
-    for task in all_tasks:
-        result = task.result
-        if task.failed():
-            batch_errors.append({
-                'task_id': task.id,
-                'error': result,
-            })
-        else:
-            successes += result['success']
-            failures += result['failures']
+    _wait_for_tasks(0)
+    progress.report(force=True)
 
-    color = 'red' if failures or batch_errors else 'green'
+    color = 'red' if progress.failures or progress.batch_errors else 'green'
     click.secho(
-        'Reindexing finished: {} failed, {} succeeded, additionally {} batches errored.'.format(
-            len(failures), successes, len(batch_errors),
+        'Reindexing finished: {} failed, {} succeeded, {} unchanged, additionally {} batches errored.'.format(
+            len(progress.failures), progress.success, progress.skipped, len(progress.batch_errors),
         ),
         fg=color,
     )
+    if job.failed_count():
+        click.secho(
+            '{} records to retry with --retry-failed.'.format(job.failed_count()),
+            fg='yellow',
+        )
 
     failures_log_path = path.join(log_path, 'records_index_failures.log')
     errors_log_path = path.join(log_path, 'records_index_errors.log')
 
-    _dump_errors_to_file(failures, failures_log_path, uuid_records_per_tasks, msg='Failed index tasks')
-    _dump_errors_to_file(batch_errors, errors_log_path, uuid_records_per_tasks, msg='Failed batches')
+    _dump_errors_to_file(progress.failures, failures_log_path, progress.failed_batches_uuids, msg='Failed index tasks')
+    _dump_errors_to_file(progress.batch_errors, errors_log_path, progress.failed_batches_uuids, msg='Failed batches')
+
+    if target_index:
+        if job.failed_count():
+            click.secho('The live index is not replaced until no records fail.', fg='red')
+            return
+        index, doc_type = _get_index_to_replace(pid_type)
+        if _replace_index(pid_type, index, doc_type, target_index, started, batch_size,
+                          request_timeout, yes_i_know, keep_old_index):
+            job.finish()
+    elif not retry_failed:
+        job.finish()
+
+
+@click.command()
+@click.option('--yes-i-know', is_flag=True)
+@click.option('-t', '--pid-type', multiple=True, required=True)
+@click.option('-s', '--batch-size', default=200)
+@click.option('-p', '--processes', default=0, help='Defaults to the number of CPUs.')
+@click.option('-c', '--senders', default=4)
+@click.option('-l', '--log-path', default='/tmp/inspire/')
+@with_appcontext
+def bulkindex(yes_i_know, pid_type, batch_size, processes, senders, log_path):
+    """Bulk reindex all records from this process.
+
+    Unlike ``simpleindex``, the records are not sent to Celery: they are
+    fetched from the DB, enhanced in a pool of processes and sent to ES by
+    several threads at the same time, see ``BulkIndexPipeline``.
+
+    Args:
+        yes_i_know (bool): if True, skip confirmation screen
+        pid_type (List[str]): array of PID types, allowed: lit, con, exp, jou,
+            aut, job, ins
+        batch_size (int): number of documents per batch.
+        processes (int): number of processes enhancing the records.
+        senders (int): number of threads sending the records to ES.
+        log_path (str): path of the indexing logs
+
+    Returns:
+        None
+    """
+    if not yes_i_know:
+        click.confirm(
+            'Do you really want to reindex the record?',
+            abort=True,
+        )
+
+    uuids = [str(item[0]) for item in get_query_records_to_index(pid_type)]
+    click.secho('Indexing {} records...'.format(len(uuids)), fg='green')
+
+    pipeline = BulkIndexPipeline(
+        batch_size=batch_size,
+        processes=processes or None,
+        senders=senders,
+    )
+    result = pipeline.run(uuids)
+
+    for stage in pipeline.stages:
+        click.echo('{}: {} records in {:.1f}s of work, {:.1f} records/s per worker'.format(
+            stage,
+            result['stages'][stage]['records'],
+            result['stages'][stage]['seconds'],
+            result['stages'][stage]['rate'],
+        ))
+
+    color = 'red' if result['failures'] else 'green'
+    click.secho(
+        'Reindexing finished in {:.1f}s ({:.1f} records/s): {} failed, {} succeeded, {} unchanged.'.format(
+            result['elapsed'], result['rate'], len(result['failures']),
+            result['success'], result['skipped'],
+        ),
+        fg=color,
+    )
+
+    failures_log_path = path.join(log_path, 'records_bulkindex_failures.log')
+    _dump_errors_to_file(result['failures'], failures_log_path, {}, msg='Failed records')
 
 
 @click.command()
@@ -721,3 +1078,305 @@ def find_citations_inconsistencies(from_page, to_page, pagesize, output, pool_si
             click.echo(output_msg)
             click.echo("Additional statistics for incosistent records"
                        "was saved in %s file" % output)
+
+
+def _get_new_objects_size(obj, shared_ids):
+    """Return the size in bytes of the objects in ``obj`` not in ``shared_ids``."""
+    if id(obj) in shared_ids:
+        return 0
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _get_new_objects_size(key, shared_ids)
+            size += _get_new_objects_size(value, shared_ids)
+    elif isinstance(obj, list):
+        for value in obj:
+            size += _get_new_objects_size(value, shared_ids)
+
+    return size
+
+
+def _get_objects_ids(obj):
+    """Return the ids of all the objects in ``obj``."""
+    ids = {id(obj)}
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            ids.add(id(key))
+            ids.update(_get_objects_ids(value))
+    elif isinstance(obj, list):
+        for value in obj:
+            ids.update(_get_objects_ids(value))
+
+    return ids
+
+
+def _get_records_with_most_authors(number_of_records):
+    """Return the UUIDs of the records with the most authors."""
+    authors = type_coerce(RecordMetadata.json, JSONB)['authors']
+    return [
+        uuid for uuid, in db.session.query(RecordMetadata.id).filter(
+            authors.isnot(None),
+        ).order_by(
+            func.jsonb_array_length(authors).desc()
+        ).limit(number_of_records)
+    ]
+
+
+def _enhance_with_deepcopy(record, citations_count):
+    enhanced_record = InspireRecord(deepcopy(dict(record)), model=record.model)
+    enhance_before_index(enhanced_record, citations_count=citations_count)
+    return InspireRecord.dumps(enhanced_record)
+
+
+def _enhance_with_overlay(record, citations_count):
+    enhanced_record = EnhancedInspireRecord.from_record(record)
+    enhance_before_index(enhanced_record, citations_count=citations_count)
+    return enhanced_record.dumps()
+
+
+@check.command()
+@click.option('-n', '--number-of-records', default=10)
+@click.option('-r', '--repeat', default=5)
+@click.option('-o', '--data-output', default='/tmp/inspire/enhancement_benchmark.csv')
+@with_appcontext
+def benchmark_enhancement(number_of_records, repeat, data_output):
+    """Compare enhancing records for ES on a deep copy and on an overlay.
+
+    The Literature records with the most authors are enhanced ``repeat``
+    times in both ways. For each of them, the average time and the memory
+    taken by the objects that are not shared with the stored JSON are
+    saved in the output file.
+    """
+    uuids = _get_records_with_most_authors(number_of_records)
+
+    _prepare_logdir(data_output)
+    click.echo("All benchmark data will be saved in %s csv file" % data_output)
+
+    with open(data_output, 'w') as data_file:
+        keys = ['control_number', 'authors', 'deepcopy_time', 'overlay_time',
+                'deepcopy_memory', 'overlay_memory']
+        out = csv.DictWriter(data_file, keys)
+        out.writeheader()
+
+        for record in InspireRecord.get_records(uuids):
+            citations_count = record.get_citations_count()
+            shared_ids = _get_objects_ids(dict(record))
+            data = {
+                'control_number': record.get('control_number'),
+                'authors': len(record.get('authors', [])),
+            }
+
+            for method, enhance in (
+                ('deepcopy', _enhance_with_deepcopy),
+                ('overlay', _enhance_with_overlay),
+            ):
+                start = datetime.now()
+                for _ in range(repeat):
+                    enhanced_record = enhance(record, citations_count)
+                data[method + '_time'] = (datetime.now() - start).total_seconds() / repeat
+                data[method + '_memory'] = _get_new_objects_size(enhanced_record, shared_ids)
+
+            out.writerow(data)
+            click.echo(
+                "Record {control_number} ({authors} authors): "
+                "{deepcopy_time:.4f}s and {deepcopy_memory} bytes with a deep copy, "
+                "{overlay_time:.4f}s and {overlay_memory} bytes with an overlay".format(**data)
+            )
+
+    click.echo("Results saved in %s" % data_output)
+
+
+@check.command()
+@click.option('-n', '--number-of-records', default=10)
+@click.option('-r', '--repeat', default=5)
+@click.option('-o', '--data-output', default='/tmp/inspire/recid_from_ref_benchmark.csv')
+@with_appcontext
+def benchmark_recid_from_ref(number_of_records, repeat, data_output):
+    """Compare extracting recids from the schema paths and recursively.
+
+    The Literature records with the most authors go through
+    ``populate_recid_from_ref`` ``repeat`` times in both ways. For each of
+    them, the average time and whether both ways give the same result are
+    saved in the output file.
+    """
+    uuids = _get_records_with_most_authors(number_of_records)
+
+    _prepare_logdir(data_output)
+    click.echo("All benchmark data will be saved in %s csv file" % data_output)
+
+    with open(data_output, 'w') as data_file:
+        keys = ['control_number', 'authors', 'schema_time', 'recursive_time', 'same_result']
+        out = csv.DictWriter(data_file, keys)
+        out.writeheader()
+
+        for record in InspireRecord.get_records(uuids):
+            data = {
+                'control_number': record.get('control_number'),
+                'authors': len(record.get('authors', [])),
+            }
+            results = {}
+
+            for method, from_schema in (('schema', True), ('recursive', False)):
+                start = datetime.now()
+                for _ in range(repeat):
+                    results[method] = dict(record)
+                    populate_recid_from_ref(results[method], from_schema=from_schema)
+                data[method + '_time'] = (datetime.now() - start).total_seconds() / repeat
+
+            data['same_result'] = results['schema'] == results['recursive']
+            out.writerow(data)
+            click.secho(
+                "Record {control_number} ({authors} authors): {schema_time:.4f}s "
+                "from the schema, {recursive_time:.4f}s recursively".format(**data),
+                fg='green' if data['same_result'] else 'red',
+            )
+
+    click.echo("Results saved in %s" % data_output)
+
+
+def _get_validation_error(validate_function, record):
+    try:
+        validate_function(record)
+    except ValidationError as err:
+        return err.message
+
+
+@check.command()
+@click.option('-n', '--number-of-records', default=10)
+@click.option('-r', '--repeat', default=5)
+@click.option('-o', '--data-output', default='/tmp/inspire/validation_benchmark.csv')
+@with_appcontext
+def benchmark_validation(number_of_records, repeat, data_output):
+    """Compare validating records with cached validators and without.
+
+    The Literature records with the most authors are validated ``repeat``
+    times against their schema, by ``inspire_schemas`` and with the
+    validators cached by ``inspirehep.utils.schema``. For each of them, the
+    average time and whether both give the same result are saved in the
+    output file.
+    """
+    uuids = _get_records_with_most_authors(number_of_records)
+
+    _prepare_logdir(data_output)
+    click.echo("All benchmark data will be saved in %s csv file" % data_output)
+
+    with open(data_output, 'w') as data_file:
+        keys = ['control_number', 'authors', 'uncached_time', 'cached_time', 'same_result']
+        out = csv.DictWriter(data_file, keys)
+        out.writeheader()
+
+        for record in InspireRecord.get_records(uuids):
+            data = {
+                'control_number': record.get('control_number'),
+                'authors': len(record.get('authors', [])),
+            }
+            results = {}
+
+            for method, validate_function in (
+                ('uncached', validate_without_cache),
+                ('cached', validate),
+            ):
+                start = datetime.now()
+                for _ in range(repeat):
+                    results[method] = _get_validation_error(validate_function, record)
+                data[method + '_time'] = (datetime.now() - start).total_seconds() / repeat
+
+            data['same_result'] = results['uncached'] == results['cached']
+            out.writerow(data)
+            click.secho(
+                "Record {control_number} ({authors} authors): {uncached_time:.4f}s "
+                "without cache, {cached_time:.4f}s with cached validators".format(**data),
+                fg='green' if data['same_result'] else 'red',
+            )
+
+    click.echo("Results saved in %s" % data_output)
+
+
+def _calculate_authors_metrics_with_dicts(authors, papers, citation_counts):
+    citations = {}
+    for author, paper, citation_count in zip(authors, papers, citation_counts):
+        citations.setdefault(author, {})[paper] = citation_count
+
+    return {
+        author: {
+            'citations': sum(author_citations.values()),
+            'publications': len(author_citations),
+            'hindex': calculate_h_index(author_citations),
+            'i10index': calculate_i10_index(author_citations),
+        } for author, author_citations in citations.items()
+    }
+
+
+def _calculate_authors_metrics_with_arrays(authors, papers, citation_counts):
+    authors, metrics = calculate_authors_metrics(authors, papers, citation_counts)
+    metrics = {metric: values.tolist() for metric, values in metrics.items()}
+
+    return {
+        author: {metric: values[index] for metric, values in metrics.items()}
+        for index, author in enumerate(authors.tolist())
+    }
+
+
+@check.command()
+@click.option('-o', '--data-output', default='/tmp/inspire/authors_metrics_benchmark.csv')
+@with_appcontext
+def benchmark_authors_metrics(data_output):
+    """Compare computing the metrics of all authors with arrays and with dicts.
+
+    The papers of all the authors are loaded once from the DB. Their
+    metrics, and those restricted to each variant of ``METRICS_VARIANTS``,
+    are then computed at once by ``calculate_authors_metrics``, and with one
+    dict of citations per author, as done by ``calculate_h_index`` and
+    ``calculate_i10_index``. The time taken by both and the number of
+    authors with different results are saved in the output file.
+    """
+    start = datetime.now()
+    arrays = get_authors_papers_arrays()
+    click.echo('Loaded {} (author, paper) pairs in {:.1f}s'.format(
+        len(arrays['authors']), (datetime.now() - start).total_seconds()))
+
+    _prepare_logdir(data_output)
+    click.echo("All benchmark data will be saved in %s csv file" % data_output)
+
+    with open(data_output, 'w') as data_file:
+        keys = ['variant', 'authors', 'dicts_time', 'arrays_time', 'differences']
+        out = csv.DictWriter(data_file, keys)
+        out.writeheader()
+
+        for variant in ('all',) + METRICS_VARIANTS:
+            if variant == 'all':
+                triples = (arrays['authors'], arrays['papers'], arrays['citation_counts'])
+            else:
+                mask = arrays[variant]
+                triples = (
+                    arrays['authors'][mask],
+                    arrays['papers'][mask],
+                    arrays['citation_counts'][mask],
+                )
+
+            data = {'variant': variant}
+            results = {}
+            for method, calculate, method_triples in (
+                ('dicts', _calculate_authors_metrics_with_dicts, [
+                    values.tolist() for values in triples
+                ]),
+                ('arrays', _calculate_authors_metrics_with_arrays, triples),
+            ):
+                start = datetime.now()
+                results[method] = calculate(*method_triples)
+                data[method + '_time'] = (datetime.now() - start).total_seconds()
+
+            data['authors'] = len(results['dicts'])
+            data['differences'] = sum(
+                1 for author in set(results['dicts']) | set(results['arrays'])
+                if results['dicts'].get(author) != results['arrays'].get(author)
+            )
+            out.writerow(data)
+            click.secho(
+                "{variant}: {authors} authors, {dicts_time:.1f}s with dicts, "
+                "{arrays_time:.1f}s with arrays, {differences} differences".format(**data),
+                fg='red' if data['differences'] else 'green',
+            )
+
+    click.echo("Results saved in %s" % data_output)
@@ -24,7 +24,10 @@
 
 from __future__ import absolute_import, division, print_function
 
-from .cli import check, simpleindex, handle_duplicates
+from inspirehep.utils.cache import LRUCache
+
+from .cli import bulkindex, check, simpleindex, handle_duplicates
+from .json_ref_loader import report_resolved_records_cache
 
 
 class InspireRecords(object):
@@ -33,8 +36,14 @@ class InspireRecords(object):
             self.init_app(app)
 
     def init_app(self, app):
+        self.resolved_records_cache = LRUCache(
+            app.config.get('RECORDS_JSON_REF_CACHE_SIZE', 0),
+            ttl=app.config.get('RECORDS_JSON_REF_CACHE_TTL'),
+        )
+        app.teardown_appcontext(report_resolved_records_cache)
         app.cli.add_command(check)
         app.cli.add_command(simpleindex)
+        app.cli.add_command(bulkindex)
         app.cli.add_command(handle_duplicates)
         app.extensions['inspire-records'] = self
 
@@ -0,0 +1,681 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Records indexing helpers."""
+
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+
+from flask import current_app
+from redis import RedisError
+from werkzeug.utils import import_string
+
+from invenio_search import current_search, current_search_client as es
+
+from inspirehep.modules.pidstore.utils import get_endpoint_from_pid_type
+from inspirehep.utils.cache import get_redis_client
+
+
+FINGERPRINT_FIELD = '_fingerprint'
+"""Field of the ES documents holding the fingerprint of their content."""
+
+FINGERPRINT_EXCLUDED_FIELDS = (FINGERPRINT_FIELD, '_updated')
+"""Fields of the ES documents not taken into account in their fingerprint.
+
+``_updated`` changes with every update of the record, even when its content
+stays the same, so taking it into account would defeat the purpose. It is
+updated on its own instead, see ``filter_unchanged_index_ops``.
+"""
+
+LOAD_INDEX_SETTINGS = {'refresh_interval': '-1', 'number_of_replicas': 0}
+"""Settings of a new index while it is being filled, to speed up indexing."""
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def compute_fingerprint(source):
+    """Compute the fingerprint of the content of an ES document.
+
+    Args:
+        source (dict): the ``_source`` of the document.
+
+    Returns:
+        str: the SHA-1 of the canonical JSON serialization of the document.
+    """
+    content = {
+        key: value for key, value in source.items()
+        if key not in FINGERPRINT_EXCLUDED_FIELDS
+    }
+    serialized = json.dumps(content, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+def get_indexed_fingerprints(index_ops):
+    """Get the fingerprints of the documents currently in ES.
+
+    Args:
+        index_ops (List[dict]): bulk index operations, as returned by
+            ``create_index_op``.
+
+    Returns:
+        dict: the fingerprint and the ``_updated`` of each document in ES,
+        as a tuple keyed by its ``_id``. Documents which are missing from
+        ES, or were indexed without a fingerprint, are left out.
+    """
+    if not index_ops:
+        return {}
+
+    docs = [
+        {'_index': op['_index'], '_type': op['_type'], '_id': op['_id']}
+        for op in index_ops
+    ]
+    response = es.mget(body={'docs': docs}, _source=[FINGERPRINT_FIELD, '_updated'])
+
+    return {
+        doc['_id']: (doc['_source'][FINGERPRINT_FIELD], doc['_source'].get('_updated'))
+        for doc in response['docs']
+        if doc.get('found') and FINGERPRINT_FIELD in doc.get('_source', {})
+    }
+
+
+def filter_unchanged_index_ops(index_ops):
+    """Leave out the operations indexing the same document as the one in ES.
+
+    Nothing is left out unless ``INDEXER_SKIP_UNCHANGED`` is set. When only
+    the ``_updated`` of a document changed, the operation is replaced by a
+    partial update of this field, instead of rewriting the whole document.
+
+    Args:
+        index_ops (List[dict]): bulk index operations, as returned by
+            ``create_index_op``.
+
+    Returns:
+        Tuple[List[dict], int]: the operations changing the document in ES,
+        and the number of documents which are not rewritten.
+    """
+    if not current_app.config.get('INDEXER_SKIP_UNCHANGED'):
+        return index_ops, 0
+
+    indexed_fingerprints = get_indexed_fingerprints(index_ops)
+    changed_index_ops = []
+    skipped = 0
+    for op in index_ops:
+        fingerprint, updated = indexed_fingerprints.get(op['_id'], (None, None))
+        if fingerprint != op['_source'][FINGERPRINT_FIELD]:
+            changed_index_ops.append(op)
+            continue
+
+        skipped += 1
+        if updated != op['_source'].get('_updated'):
+            changed_index_ops.append({
+                '_op_type': 'update',
+                '_index': op['_index'],
+                '_type': op['_type'],
+                '_id': op['_id'],
+                'doc': {'_updated': op['_source']['_updated']},
+            })
+
+    return changed_index_ops, skipped
+
+
+def get_index_generation(index):
+    """Get the generation of an index.
+
+    The generation is increased each time documents of the index are
+    changed, see ``bump_index_generation``, so that the results of searches
+    can be cached until it changes.
+
+    Args:
+        index (str): the name of the index, as searched.
+
+    Returns:
+        int: the generation of the index.
+
+    Raises:
+        RedisError: if the generation cannot be read, in which case the
+            results of searches must not be cached.
+    """
+    return int(get_redis_client().get('indexer:generation:{}'.format(index)) or 0)
+
+
+def bump_index_generation(indexes):
+    """Increase the generation of indexes whose documents were changed.
+
+    The errors of Redis are logged but not raised, as the documents are
+    already indexed: the cached results of searches are then only refreshed
+    when they expire.
+
+    Args:
+        indexes (Iterable[str]): the names of the indexes.
+    """
+    indexes = set(indexes)
+    if not indexes:
+        return
+
+    try:
+        pipeline = get_redis_client().pipeline()
+        for index in sorted(indexes):
+            pipeline.incr('indexer:generation:{}'.format(index))
+        pipeline.execute()
+    except RedisError:
+        LOGGER.exception('Cannot bump the generation of %s.', ', '.join(sorted(indexes)))
+
+
+class WriteBehindQueue(object):
+    """Deduplicating queue of records waiting to be indexed.
+
+    Records committed several times before the queue is drained are indexed
+    only once, in their latest version. The queue is stored in Redis, so that
+    it is shared by all the processes committing records:
+
+    * a set holds the UUIDs of the records to be indexed;
+    * a set holds the UUIDs of the records being indexed, which are only
+      removed from it once they were indexed, so that they are not lost if
+      the indexing fails;
+    * a hash holds the time at which each record was first queued, which is
+      used to measure the indexing latency;
+    * two hashes hold, for each record whose citations must be updated, the
+      first and the last of its versions committed since they were last
+      updated, and are moved aside while the citations are being updated;
+    * a flag marks that a drain has been scheduled and has not started yet,
+      so that the records committed meanwhile do not schedule another one.
+
+    Only one drain runs at a time, holding the lock named ``drain_lock_name``.
+    """
+
+    key_prefix = 'indexer:write_behind'
+
+    @property
+    def redis(self):
+        return get_redis_client()
+
+    @property
+    def _queue_key(self):
+        return '{}:queue'.format(self.key_prefix)
+
+    @property
+    def _processing_key(self):
+        return '{}:processing'.format(self.key_prefix)
+
+    @property
+    def _times_key(self):
+        return '{}:queued_at'.format(self.key_prefix)
+
+    @property
+    def _citations_since_key(self):
+        return '{}:citations:since'.format(self.key_prefix)
+
+    @property
+    def _citations_version_key(self):
+        return '{}:citations:version'.format(self.key_prefix)
+
+    @property
+    def _processing_citations_since_key(self):
+        return '{}:processing_citations:since'.format(self.key_prefix)
+
+    @property
+    def _processing_citations_version_key(self):
+        return '{}:processing_citations:version'.format(self.key_prefix)
+
+    @property
+    def _scheduled_key(self):
+        return '{}:scheduled'.format(self.key_prefix)
+
+    @property
+    def drain_lock_name(self):
+        return '{}:drain'.format(self.key_prefix)
+
+    def push(self, uuids):
+        """Queue records to be indexed.
+
+        Args:
+            uuids (Iterable[str]): UUIDs of the records.
+        """
+        uuids = [str(uuid) for uuid in uuids]
+        if not uuids:
+            return
+
+        now = time.time()
+        pipeline = self.redis.pipeline()
+        pipeline.sadd(self._queue_key, *uuids)
+        for uuid in uuids:
+            pipeline.hsetnx(self._times_key, uuid, now)
+        pipeline.execute()
+
+    def push_citations(self, versions):
+        """Queue records whose citations must be updated.
+
+        A record committed several times before the queue is drained has its
+        citations updated only once, from the first to the last version.
+
+        Args:
+            versions (Iterable[Tuple[str, str, int]]): the PID type, the PID
+                value and the committed version of each record.
+        """
+        versions = list(versions)
+        if not versions:
+            return
+
+        pipeline = self.redis.pipeline()
+        for pid_type, pid_value, version in versions:
+            field = '{}:{}'.format(pid_type, pid_value)
+            pipeline.hsetnx(self._citations_since_key, field, version)
+            pipeline.hset(self._citations_version_key, field, version)
+        pipeline.execute()
+
+    def pop_citations(self):
+        """Move all the queued records to the records whose citations are being updated.
+
+        The records left by a drain that crashed are returned instead, if
+        any. It must only be called while holding the drain lock, and the
+        records must then be removed with ``ack_citations`` once their
+        citations were updated.
+
+        Returns:
+            List[Tuple[str, str, int, int]]: the PID type, the PID value, the
+            first and the last version to update the citations from of each
+            record.
+        """
+        if not self.redis.exists(self._processing_citations_version_key):
+            if not self.redis.exists(self._citations_version_key):
+                return []
+            pipeline = self.redis.pipeline()
+            pipeline.rename(self._citations_since_key, self._processing_citations_since_key)
+            pipeline.rename(self._citations_version_key, self._processing_citations_version_key)
+            pipeline.execute()
+
+        pipeline = self.redis.pipeline()
+        pipeline.hgetall(self._processing_citations_since_key)
+        pipeline.hgetall(self._processing_citations_version_key)
+        since_versions, versions = [
+            {
+                field.decode('utf-8') if isinstance(field, bytes) else field: int(version)
+                for field, version in fields.items()
+            } for fields in pipeline.execute()
+        ]
+
+        citations = []
+        for field, version in sorted(versions.items()):
+            pid_type, pid_value = field.split(':', 1)
+            citations.append((pid_type, pid_value, since_versions.get(field, version), version))
+        return citations
+
+    def ack_citations(self):
+        """Remove the records whose citations were updated."""
+        self.redis.delete(
+            self._processing_citations_since_key,
+            self._processing_citations_version_key,
+        )
+
+    def mark_scheduled(self):
+        """Mark that a drain is scheduled for the current coalescing window.
+
+        The mark is removed by the drain when it starts, see ``unschedule``.
+        It also expires, in case the drain is lost, once the drain should
+        have been long done.
+
+        Returns:
+            bool: ``True`` if no drain was already scheduled, in which case
+            the caller is responsible for scheduling one.
+        """
+        timeout = (
+            current_app.config['INDEXER_WRITE_BEHIND_WINDOW'] +
+            current_app.config['INDEXER_WRITE_BEHIND_SCHEDULED_TIMEOUT']
+        )
+        return bool(self.redis.set(self._scheduled_key, time.time(), ex=timeout, nx=True))
+
+    def pop(self, count):
+        """Move up to ``count`` records from the queue to the records being indexed.
+
+        The records must then be either removed with ``ack`` once they were
+        indexed, or put back in the queue with ``requeue``.
+
+        Returns:
+            List[Tuple[str, float]]: the UUIDs of the records, each with the
+            time at which it was first queued.
+        """
+        uuids = self.redis.srandmember(self._queue_key, count)
+        if not uuids:
+            return []
+
+        pipeline = self.redis.pipeline()
+        for uuid in uuids:
+            pipeline.smove(self._queue_key, self._processing_key, uuid)
+        # Records moved meanwhile by another drain are left to it.
+        uuids = [uuid for uuid, moved in zip(uuids, pipeline.execute()) if moved]
+        if not uuids:
+            return []
+
+        queued_at = self.redis.hmget(self._times_key, uuids)
+
+        now = time.time()
+        return [
+            (uuid.decode('utf-8') if isinstance(uuid, bytes) else uuid, float(time_ or now))
+            for uuid, time_ in zip(uuids, queued_at)
+        ]
+
+    def ack(self, uuids):
+        """Remove records that were indexed from the records being indexed.
+
+        Args:
+            uuids (Iterable[str]): UUIDs of the records.
+        """
+        uuids = [str(uuid) for uuid in uuids]
+        if not uuids:
+            return
+
+        pipeline = self.redis.pipeline()
+        pipeline.srem(self._processing_key, *uuids)
+        for uuid in uuids:
+            pipeline.sismember(self._queue_key, uuid)
+        queued_again = pipeline.execute()[1:]
+
+        # Records queued again while being indexed keep their queuing time.
+        indexed_uuids = [uuid for uuid, queued in zip(uuids, queued_again) if not queued]
+        if indexed_uuids:
+            self.redis.hdel(self._times_key, *indexed_uuids)
+
+    def requeue(self, uuids):
+        """Put records being indexed back in the queue.
+
+        Args:
+            uuids (Iterable[str]): UUIDs of the records.
+        """
+        uuids = [str(uuid) for uuid in uuids]
+        if not uuids:
+            return
+
+        pipeline = self.redis.pipeline()
+        for uuid in uuids:
+            pipeline.smove(self._processing_key, self._queue_key, uuid)
+        pipeline.execute()
+
+    def recover(self):
+        """Put back in the queue the records left by drains that crashed.
+
+        It must only be called while holding the drain lock, as the records
+        being indexed by a running drain would be queued again as well.
+
+        Returns:
+            int: the number of records put back in the queue.
+        """
+        uuids = self.redis.smembers(self._processing_key)
+        self.requeue(uuid.decode('utf-8') if isinstance(uuid, bytes) else uuid for uuid in uuids)
+        return len(uuids)
+
+    def size(self):
+        """Return the number of records waiting to be indexed."""
+        return self.redis.scard(self._queue_key)
+
+    def unschedule(self):
+        """Mark that the scheduled drain started.
+
+        The records queued from then on schedule another drain, while those
+        queued before are indexed by the one starting.
+        """
+        self.redis.delete(self._scheduled_key)
+
+
+class ReindexJob(object):
+    """Progress of the reindexing of all the records of some PID types.
+
+    The progress is stored in Redis, so that a reindexing interrupted midway
+    can be resumed where it stopped:
+
+    * a hash holds, for each PID type, the ``id`` of the last persistent
+      identifier whose record has been reindexed (the records are reindexed
+      in order of ``id``), as well as the counts of indexed, skipped and
+      failed records;
+    * a list holds the UUIDs of the records that failed to be reindexed, so
+      that they can be retried. While they are being retried, they are moved
+      to another list, from which they are only removed once their batch is
+      done, so that they are not lost if the retrying is interrupted.
+
+    When the records are reindexed into a new index, its name and the time
+    at which the reindexing started are kept in the hash as well.
+    """
+
+    key_prefix = 'indexer:reindex'
+    counters = ('success', 'skipped', 'failures')
+
+    def __init__(self, pid_types):
+        self.name = ','.join(sorted(pid_types))
+
+    @property
+    def redis(self):
+        return get_redis_client()
+
+    @property
+    def _progress_key(self):
+        return '{}:{}:progress'.format(self.key_prefix, self.name)
+
+    @property
+    def _failed_key(self):
+        return '{}:{}:failed'.format(self.key_prefix, self.name)
+
+    @property
+    def _retrying_key(self):
+        return '{}:{}:retrying'.format(self.key_prefix, self.name)
+
+    def exists(self):
+        """Return whether an interrupted job can be resumed."""
+        return bool(self.redis.exists(self._progress_key))
+
+    def reset(self):
+        """Forget the progress of the job and the records to retry."""
+        self.redis.delete(self._progress_key, self._failed_key, self._retrying_key)
+
+    def finish(self):
+        """Forget the progress of the job, keeping the records to retry."""
+        self.redis.delete(self._progress_key)
+
+    def set_index(self, index, started):
+        """Record the new index the records are reindexed into."""
+        self.redis.hmset(self._progress_key, {'index': index, 'started': started})
+
+    def get_index(self):
+        """Return the new index and the time at which the reindexing started.
+
+        Returns:
+            Tuple[str, float]: the name of the index and the timestamp, or
+            ``(None, None)`` if the records are reindexed in place.
+        """
+        index, started = self.redis.hmget(self._progress_key, 'index', 'started')
+        if index is None:
+            return None, None
+        return index.decode('utf-8') if isinstance(index, bytes) else index, float(started)
+
+    def get_checkpoint(self, pid_type):
+        """Return the ``id`` of the last persistent identifier reindexed."""
+        checkpoint = self.redis.hget(self._progress_key, 'checkpoint:{}'.format(pid_type))
+        return int(checkpoint or 0)
+
+    def add_results(self, pid_type, checkpoint, success=0, skipped=0, failed_uuids=()):
+        """Record the results of a batch and advance the checkpoint.
+
+        Args:
+            pid_type (str): the PID type of the records of the batch.
+            checkpoint (int): the ``id`` of the last persistent identifier
+                of the batch.
+            success (int): the number of records indexed.
+            skipped (int): the number of records left unchanged.
+            failed_uuids (List[str]): the UUIDs of the records which failed.
+        """
+        pipeline = self.redis.pipeline()
+        pipeline.hset(self._progress_key, 'checkpoint:{}'.format(pid_type), checkpoint)
+        pipeline.hincrby(self._progress_key, 'success', success)
+        pipeline.hincrby(self._progress_key, 'skipped', skipped)
+        pipeline.hincrby(self._progress_key, 'failures', len(failed_uuids))
+        if failed_uuids:
+            pipeline.rpush(self._failed_key, *failed_uuids)
+        pipeline.execute()
+
+    def get_counts(self):
+        """Return the counts of indexed, skipped and failed records so far."""
+        counts = self.redis.hmget(self._progress_key, *self.counters)
+        return {
+            counter: int(count or 0)
+            for counter, count in zip(self.counters, counts)
+        }
+
+    def add_failed(self, uuids):
+        """Add records to retry."""
+        if uuids:
+            self.redis.rpush(self._failed_key, *uuids)
+
+    def pop_failed(self, count):
+        """Move up to ``count`` UUIDs from the records to retry to those being retried.
+
+        They stay there until ``ack_retried`` is called, once their batch is
+        done.
+        """
+        pipeline = self.redis.pipeline()
+        for _ in range(count):
+            pipeline.rpoplpush(self._failed_key, self._retrying_key)
+        uuids = [uuid for uuid in pipeline.execute() if uuid is not None]
+        return [uuid.decode('utf-8') if isinstance(uuid, bytes) else uuid for uuid in uuids]
+
+    def ack_retried(self, uuids, failed_uuids=()):
+        """Forget records which were retried, keeping those which failed again.
+
+        Args:
+            uuids (List[str]): the UUIDs of the records of the batch.
+            failed_uuids (List[str]): the UUIDs of the records which failed
+                again, and are to be retried.
+        """
+        pipeline = self.redis.pipeline()
+        for uuid in uuids:
+            pipeline.lrem(self._retrying_key, 1, uuid)
+        if failed_uuids:
+            pipeline.rpush(self._failed_key, *failed_uuids)
+        pipeline.execute()
+
+    def recover_retrying(self):
+        """Put back the records being retried by an interrupted retrying.
+
+        Returns:
+            int: the number of records put back with the records to retry.
+        """
+        recovered = 0
+        while self.redis.rpoplpush(self._retrying_key, self._failed_key) is not None:
+            recovered += 1
+        return recovered
+
+    def failed_count(self):
+        """Return the number of records to retry."""
+        return self.redis.llen(self._failed_key)
+
+
+def get_index_from_pid_type(pid_type):
+    """Return the index and the document type of the records of a PID type.
+
+    The index is the one searched by the search class of the REST endpoint
+    of the PID type, which can be an alias.
+    """
+    endpoint = get_endpoint_from_pid_type(pid_type)
+    search_conf = current_app.config['RECORDS_REST_ENDPOINTS'][endpoint]
+    search_class = import_string(search_conf['search_class'])
+
+    return search_class.Meta.index, search_class.Meta.doc_types
+
+
+def create_versioned_index(index):
+    """Create a new empty index to replace ``index``.
+
+    The new index is created from the mapping of ``index``, with refresh and
+    replicas turned off until ``finish_versioned_index`` is called.
+
+    Args:
+        index (str): the name under which the index is searched.
+
+    Returns:
+        str: the name of the new index, ``index`` followed by a timestamp.
+    """
+    new_index = '{}-{}'.format(index, datetime.utcnow().strftime('%Y%m%d%H%M%S'))
+    with open(current_search.mappings[index]) as mapping_file:
+        body = json.load(mapping_file)
+    body.setdefault('settings', {})['index'] = LOAD_INDEX_SETTINGS
+
+    es.indices.create(index=new_index, body=body)
+    return new_index
+
+
+def finish_versioned_index(index, new_index):
+    """Restore the settings of the live index on a new index and refresh it."""
+    live_settings = [
+        settings['settings']['index']
+        for settings in es.indices.get_settings(index=index).values()
+    ]
+    es.indices.put_settings(index=new_index, body={
+        'index': {
+            'refresh_interval': live_settings[0].get('refresh_interval', '1s'),
+            'number_of_replicas': live_settings[0]['number_of_replicas'],
+        },
+    })
+    es.indices.refresh(index=new_index)
+
+
+def swap_index_alias(index, new_index, delete_live_index=False):
+    """Make ``index`` an alias of ``new_index`` instead of the live indexes.
+
+    The other aliases of the live indexes, such as ``records``, are moved to
+    the new index as well, all in a single atomic request.
+
+    The first time, ``index`` is an actual index and not an alias, and it
+    has to be deleted in the same request that creates the alias, so that
+    there is no moment when it cannot be searched. This is only done when
+    ``delete_live_index`` is set.
+
+    Args:
+        index (str): the name under which the index is searched.
+        new_index (str): the index which replaces the live one.
+        delete_live_index (bool): whether ``index`` can be deleted if it is
+            an actual index.
+
+    Returns:
+        List[str]: the indexes which are not searched anymore.
+    """
+    live_indexes = es.indices.get_alias(index=index)
+    aliases = set([index])
+    for live_aliases in live_indexes.values():
+        aliases.update(live_aliases['aliases'])
+
+    actions = [
+        {'remove': {'index': live_index, 'alias': alias}}
+        for live_index, live_aliases in live_indexes.items()
+        for alias in sorted(live_aliases['aliases'])
+    ]
+    if index in live_indexes:
+        if not delete_live_index:
+            raise ValueError('{} is an index, not an alias.'.format(index))
+        actions = [{'remove_index': {'index': index}}]
+    actions.extend({'add': {'index': new_index, 'alias': alias}} for alias in sorted(aliases))
+
+    es.indices.update_aliases(body={'actions': actions})
+    bump_index_generation(aliases)
+    return [live_index for live_index in live_indexes if live_index != index]
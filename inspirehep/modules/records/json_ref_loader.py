@@ -24,8 +24,14 @@
 
 from __future__ import absolute_import, division, print_function
 
+import json
+
 from flask import current_app, url_for
 from jsonref import JsonLoader, JsonRef
+from redis import RedisError
+from six import string_types
+from six.moves.urllib.parse import urldefrag
+from time_execution import write_metric
 from werkzeug.urls import url_parse
 
 import jsonresolver
@@ -33,8 +39,136 @@ from jsonresolver.contrib.jsonref import json_loader_factory
 
 from inspire_schemas.utils import load_schema
 from inspire_utils.urls import ensure_scheme
-from inspirehep.modules.pidstore.utils import get_pid_type_from_endpoint
+from inspirehep.modules.pidstore.utils import (
+    get_pid_type_from_endpoint,
+    get_pid_type_from_schema,
+)
 from inspirehep.utils import record_getter
+from inspirehep.utils.cache import get_redis_client, get_request_cache
+
+try:
+    from functools import lru_cache
+except ImportError:
+    from functools32 import lru_cache
+
+RESOLVED_RECORDS_GENERATION_PREFIX = 'resolved_records:generation:'
+
+
+def _is_local_uri(parsed_uri):
+    # Add http:// protocol so uri.netloc is correctly parsed.
+    server_name = current_app.config.get('SERVER_NAME')
+    parsed_server = url_parse(ensure_scheme(server_name))
+
+    return not parsed_uri.netloc or parsed_uri.netloc == parsed_server.netloc
+
+
+def _get_path_parts(parsed_uri):
+    return parsed_uri.path.strip('/').split('/')
+
+
+def _get_refs(obj):
+    """Get the URIs of all the JSON references in an object."""
+    if isinstance(obj, dict):
+        if isinstance(obj.get('$ref'), string_types):
+            yield obj['$ref']
+            return
+        for value in obj.values():
+            for ref in _get_refs(value):
+                yield ref
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            for ref in _get_refs(value):
+                yield ref
+
+
+def _get_resolved_records_cache():
+    return current_app.extensions['inspire-records'].resolved_records_cache
+
+
+def _get_request_resolved_records_cache():
+    return get_request_cache(
+        'resolved_records',
+        maxsize=current_app.config.get('RECORDS_JSON_REF_REQUEST_CACHE_SIZE'),
+    )
+
+
+def _get_generation_key(pid_type, recid):
+    return '{}{}:{}'.format(RESOLVED_RECORDS_GENERATION_PREFIX, pid_type, recid)
+
+
+def _get_resolved_records_generations(pids):
+    """Get the generations of records, under which they are cached.
+
+    Args:
+        pids (List[Tuple[str, str]]): the (pid_type, recid) of the records.
+
+    Returns:
+        Optional[List[int]]: the generations of the records, or ``None`` if
+        they cannot be read from Redis, in which case the shared cache must
+        not be used.
+    """
+    try:
+        generations = get_redis_client().mget(
+            [_get_generation_key(pid_type, recid) for pid_type, recid in pids])
+    except RedisError:
+        current_app.logger.exception('Cannot get the generations of the resolved records.')
+        return None
+
+    return [int(generation or 0) for generation in generations]
+
+
+def invalidate_resolved_records(pid_type, recid):
+    """Remove a record from the caches of resolved records.
+
+    Its generation is bumped in Redis, so that it is no longer served from
+    the caches shared by the requests of all the processes, and it is
+    removed from the cache of the current request or task, which might be
+    the one updating it.
+
+    The generation expires with the entries cached under the previous ones,
+    after ``RECORDS_JSON_REF_CACHE_TTL`` seconds.
+    """
+    request_cache = _get_request_resolved_records_cache()
+    for source in ('db', 'es'):
+        request_cache.pop((source, pid_type, str(recid)), None)
+
+    key = _get_generation_key(pid_type, recid)
+    ttl = current_app.config.get('RECORDS_JSON_REF_CACHE_TTL')
+    try:
+        pipeline = get_redis_client().pipeline()
+        pipeline.incr(key)
+        if ttl:
+            pipeline.expire(key, ttl)
+        pipeline.execute()
+    except RedisError:
+        current_app.logger.exception(
+            'Cannot bump the generation of the resolved record %s.', (pid_type, recid))
+
+
+def clear_resolved_records():
+    """Empty the caches of resolved records of this process and context."""
+    _get_resolved_records_cache().clear()
+    _get_request_resolved_records_cache().clear()
+    get_request_cache('resolved_records_stats').clear()
+
+
+def report_resolved_records_cache(exception=None):
+    """Write the metrics of the caches of resolved records for this context."""
+    stats = get_request_cache('resolved_records_stats')
+    lookups = sum(stats.values())
+    if not lookups:
+        return
+
+    shared_stats = _get_resolved_records_cache().stats()
+    write_metric(
+        'inspirehep.records.resolved_records_cache',
+        value=(stats.get('hits', 0) + stats.get('shared_hits', 0)) / lookups,
+        hits=stats.get('hits', 0),
+        shared_hits=stats.get('shared_hits', 0),
+        misses=stats.get('misses', 0),
+        shared_hit_rate=shared_stats['hit_rate'],
+        shared_size=shared_stats['size'],
+    )
 
 
 class AbstractRecordLoader(JsonLoader):
@@ -42,21 +176,40 @@ class AbstractRecordLoader(JsonLoader):
 
     Resolves the refered resource by the given uri by first checking against
     local resources.
+
+    When ``source`` is set, the records are cached at two levels:
+
+    * for the current request or task, so that each record is usually
+      fetched only once, without ever being invalidated, in a cache bounded
+      to ``RECORDS_JSON_REF_REQUEST_CACHE_SIZE`` entries;
+    * in a bounded cache shared by all the requests of the process, from
+      which they are removed when they are updated, see
+      ``invalidate_resolved_records``, or expire after a while.
     """
 
+    source = None
+
     def get_record(self, pid_type, recid):
         raise NotImplementedError()
 
+    def get_records(self, pids):
+        """Get several records at once.
+
+        Args:
+            pids (List[Tuple[str, str]]): the (pid_type, recid) of the records.
+
+        Returns:
+            dict: the records found, keyed by their (pid_type, recid).
+        """
+        raise NotImplementedError()
+
     def get_remote_json(self, uri, **kwargs):
         parsed_uri = url_parse(uri)
-        # Add http:// protocol so uri.netloc is correctly parsed.
-        server_name = current_app.config.get('SERVER_NAME')
-        parsed_server = url_parse(ensure_scheme(server_name))
 
-        if parsed_uri.netloc and parsed_uri.netloc != parsed_server.netloc:
+        if not _is_local_uri(parsed_uri):
             return super(AbstractRecordLoader, self).get_remote_json(uri,
                                                                      **kwargs)
-        path_parts = parsed_uri.path.strip('/').split('/')
+        path_parts = _get_path_parts(parsed_uri)
         if len(path_parts) < 2:
             current_app.logger.error('Bad JSONref URI: {0}'.format(uri))
             return None
@@ -64,31 +217,147 @@ class AbstractRecordLoader(JsonLoader):
         endpoint = path_parts[-2]
         pid_type = get_pid_type_from_endpoint(endpoint)
         recid = path_parts[-1]
-        res = self.get_record(pid_type, recid)
-        return res
+        if not self.source:
+            return self.get_record(pid_type, recid)
+
+        pid = (pid_type, recid)
+        records = self._get_cached_records([pid], lambda pids: {pid: self.get_record(*pid)})
+        return records[pid]
+
+    def _get_cached_records(self, pids, fetch):
+        """Get records from the caches, fetching the missing ones.
+
+        The records in the shared cache are serialized, so that the callers
+        cannot modify the cached records, and keyed by their generation, see
+        ``invalidate_resolved_records``.
+
+        Args:
+            pids (Iterable[Tuple[str, str]]): the (pid_type, recid) of the records.
+            fetch (Callable): called with the list of the (pid_type, recid)
+                of the records missing from the caches, returning them in a
+                dict keyed by their (pid_type, recid).
+
+        Returns:
+            dict: the records, or ``None`` for those not found, keyed by
+            their (pid_type, recid).
+        """
+        request_cache = _get_request_resolved_records_cache()
+        stats = get_request_cache('resolved_records_stats')
+        shared_cache = _get_resolved_records_cache()
+
+        records = {}
+        uncached_pids = []
+        for pid in pids:
+            key = (self.source,) + pid
+            if key in request_cache:
+                records[pid] = request_cache[key]
+                stats['hits'] = stats.get('hits', 0) + 1
+            else:
+                uncached_pids.append(pid)
+
+        # The generations are read before the records are fetched, so that
+        # a record updated meanwhile is cached under an older generation.
+        generations = {}
+        if uncached_pids:
+            pids_generations = _get_resolved_records_generations(uncached_pids)
+            if pids_generations is not None:
+                generations = dict(zip(uncached_pids, pids_generations))
+
+        missing_pids = []
+        for pid in uncached_pids:
+            key = (self.source,) + pid
+            if pid in generations:
+                serialized_record = shared_cache.get(key + (generations[pid],))
+                if serialized_record is not None:
+                    records[pid] = request_cache[key] = json.loads(serialized_record)
+                    stats['shared_hits'] = stats.get('shared_hits', 0) + 1
+                    continue
+
+            missing_pids.append(pid)
+            stats['misses'] = stats.get('misses', 0) + 1
+
+        if missing_pids:
+            fetched_records = fetch(missing_pids)
+            for pid in missing_pids:
+                key = (self.source,) + pid
+                record = fetched_records.get(pid)
+                records[pid] = request_cache[key] = record
+                if record is not None and pid in generations:
+                    shared_cache.set(key + (generations[pid],), json.dumps(record))
+
+        return records
+
+    def prefetch(self, uris):
+        """Resolve the references to local records in bulk.
+
+        The records are put in the store of the loader, so that resolving
+        the references afterwards does not fetch them one by one. The
+        references which are not to local records are left to
+        ``get_remote_json``.
+
+        Args:
+            uris (Iterable[str]): the URIs of the references.
+        """
+        pids_by_uri = {}
+        for uri in uris:
+            uri, _ = urldefrag(uri)
+            parsed_uri = url_parse(uri)
+            path_parts = _get_path_parts(parsed_uri)
+            if uri in self.store or not _is_local_uri(parsed_uri) or len(path_parts) < 2:
+                continue
+            try:
+                pids_by_uri[uri] = (get_pid_type_from_endpoint(path_parts[-2]), path_parts[-1])
+            except KeyError:
+                continue
+
+        if not pids_by_uri:
+            return
+
+        pids = set(pids_by_uri.values())
+        if self.source:
+            records = self._get_cached_records(pids, self.get_records)
+        else:
+            records = self.get_records(pids)
+        for uri, pid in pids_by_uri.items():
+            self.store[uri] = records.get(pid)
 
 
 class ESJsonLoader(AbstractRecordLoader):
     """Resolve resources by retrieving them from Elasticsearch."""
 
+    source = 'es'
+
     def get_record(self, pid_type, recid):
         try:
             return record_getter.get_es_record(pid_type, recid)
         except record_getter.RecordGetterError:
             return None
 
+    def get_records(self, pids):
+        return record_getter.get_es_records_by_pids(pids)
+
 
 class DatabaseJsonLoader(AbstractRecordLoader):
 
+    source = 'db'
+
     def get_record(self, pid_type, recid):
         try:
             return record_getter.get_db_record(pid_type, recid)
         except record_getter.RecordGetterError:
             return None
 
+    def get_records(self, pids):
+        return {
+            (get_pid_type_from_schema(record['$schema']), str(record['control_number'])): record
+            for record in record_getter.get_db_records(pids)
+        }
+
 
-es_record_loader = ESJsonLoader()
-db_record_loader = DatabaseJsonLoader()
+# The records are cached by the loaders themselves, and the store of JsonLoader
+# would keep them forever without being invalidated.
+es_record_loader = ESJsonLoader(cache_results=False)
+db_record_loader = DatabaseJsonLoader(cache_results=False)
 SCHEMA_LOADER_CLS = json_loader_factory(
     jsonresolver.JSONResolver(
         plugins=['invenio_jsonschemas.jsonresolver']
@@ -97,9 +366,13 @@ SCHEMA_LOADER_CLS = json_loader_factory(
 """Used in invenio-jsonschemas to resolve relative $ref."""
 
 
+@lru_cache()
 def load_resolved_schema(name):
     """Load a JSON schema with all references resolved.
 
+    The schema is only loaded and resolved once per process, so the returned
+    schema is shared and must not be modified.
+
     Args:
         name(str): name of the schema to load.
 
@@ -118,12 +391,17 @@ def load_resolved_schema(name):
     )
 
 
-def replace_refs(obj, source='db'):
+def replace_refs(obj, source='db', prefetch=False):
     """Replaces record refs in obj by bypassing HTTP requests.
 
     Any reference URI that comes from the same server and references a resource
     will be resolved directly either from the database or from Elasticsearch.
 
+    By default the references are resolved lazily, one at a time. With
+    ``prefetch``, all the references in obj are collected first and the
+    records they point to are fetched in bulk, which is much faster when
+    there are many of them.
+
     :param obj:
         Dict-like object for which '$ref' fields are recursively replaced.
     :param source:
@@ -131,6 +409,8 @@ def replace_refs(obj, source='db'):
             * 'db' - resolve from Database
             * 'es' - resolve from Elasticsearch
             * 'http' - force using HTTP
+    :param prefetch:
+        Whether to fetch all the referenced records at once beforehand.
 
     :returns:
         The same obj structure with the '$ref' fields replaced with the object
@@ -145,4 +425,8 @@ def replace_refs(obj, source='db'):
         raise ValueError('source must be one of {}'.format(loaders.keys()))
 
     loader = loaders[source]
+    if prefetch and loader:
+        # A new loader, so that its store only lives as long as this call.
+        loader = type(loader)()
+        loader.prefetch(_get_refs(obj))
     return JsonRef.replace_refs(obj, loader=loader, load_on_repr=False)
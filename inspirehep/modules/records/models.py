@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Models for Records."""
+
+from __future__ import absolute_import, division, print_function
+
+from invenio_db import db
+from invenio_records.models import RecordMetadata
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy_utils.types import UUIDType
+
+from inspirehep.modules.records.utils import get_cited_pids
+
+
+class RecordCitations(db.Model):
+    """Citation graph between records.
+
+    Every row means that the record ``citer_id`` cites the record identified
+    by ``(cited_pid_type, cited_pid_value)``. Rows are only kept for citing
+    records whose citations count, i.e. non-deleted and non-superseded
+    Literature records, see :func:`get_cited_pids`.
+
+    The table is kept up to date by the ``RecordMetadata`` mapper events
+    below, so it is written in the same transaction as the record itself.
+    """
+
+    __tablename__ = 'records_citations'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('citer_id', 'cited_pid_type', 'cited_pid_value'),
+        db.Index('ix_records_citations_cited_pid', 'cited_pid_type', 'cited_pid_value'),
+    )
+
+    citer_id = db.Column(
+        UUIDType,
+        db.ForeignKey('records_metadata.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    cited_pid_type = db.Column(db.String(3), nullable=False)
+    cited_pid_value = db.Column(db.String(255), nullable=False)
+
+
+@db.event.listens_for(RecordMetadata, 'after_insert')
+@db.event.listens_for(RecordMetadata, 'after_update')
+def update_record_citations(mapper, connection, target):
+    """Synchronize the ``records_citations`` rows of a record with its references.
+
+    Only the difference between the rows already stored for the record and
+    its current references is written, so unchanged references cost nothing.
+    """
+    if not db.inspect(target).attrs.json.history.has_changes():
+        return
+
+    table = RecordCitations.__table__
+    cited_pids = get_cited_pids(target.json)
+    stored_pids = set(
+        (row.cited_pid_type, row.cited_pid_value) for row in connection.execute(
+            select([table.c.cited_pid_type, table.c.cited_pid_value])
+            .where(table.c.citer_id == target.id)
+        )
+    )
+
+    removed_pids = stored_pids - cited_pids
+    added_pids = cited_pids - stored_pids
+
+    if removed_pids:
+        connection.execute(table.delete().where(and_(
+            table.c.citer_id == target.id,
+            tuple_(table.c.cited_pid_type, table.c.cited_pid_value).in_(list(removed_pids)),
+        )))
+
+    if added_pids:
+        connection.execute(table.insert(), [
+            {
+                'citer_id': target.id,
+                'cited_pid_type': pid_type,
+                'cited_pid_value': pid_value,
+            } for pid_type, pid_value in added_pids
+        ])
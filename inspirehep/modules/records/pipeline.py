@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Records bulk indexing pipeline."""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import threading
+import time
+from collections import deque
+from multiprocessing import Pool, cpu_count
+
+from elasticsearch.helpers import bulk
+from flask import current_app
+from six.moves.queue import Queue
+
+from invenio_db import db
+from invenio_records.models import RecordMetadata
+from invenio_search import current_search_client as es
+
+from inspirehep.modules.records.api import InspireRecord
+from inspirehep.modules.records.indexer import (
+    bump_index_generation,
+    filter_unchanged_index_ops,
+)
+from inspirehep.modules.records.utils import get_pid_for_citations
+from inspirehep.utils.record import create_index_op
+
+LOGGER = logging.getLogger(__name__)
+
+_DONE = None
+"""Sentinel put in the queues once a stage has no more work."""
+
+
+def _init_enhancement_worker(app):
+    app.app_context().push()
+
+
+def _enhance_records(items):
+    """Create the index operations of records in a worker process.
+
+    Args:
+        items (List[tuple]): the columns of the records, with their citation
+            count, as put in the queue by the fetch stage.
+
+    Returns:
+        Tuple[List[dict], float]: the index operations and the time it took
+        to create them.
+    """
+    start = time.time()
+    index_ops = []
+    for uuid, version_id, created, updated, json, citations_count in items:
+        model = RecordMetadata(
+            id=uuid,
+            version_id=version_id,
+            created=created,
+            updated=updated,
+            json=json,
+        )
+        record = InspireRecord(json, model=model)
+        index_ops.append(create_index_op(
+            record,
+            version_type='force',
+            citations_count=citations_count,
+        ))
+
+    return index_ops, time.time() - start
+
+
+class BulkIndexPipeline(object):
+    """Index records in bulk with concurrent stages.
+
+    The records go through three stages, connected by bounded queues so
+    that a fast stage waits for the slower ones instead of piling up
+    records in memory:
+
+    * ``fetch``: a thread loads the records of each batch from the DB, with
+      their citation counts;
+    * ``enhance``: a pool of processes enhances the records and creates
+      their index operations, which is CPU bound;
+    * ``send``: threads send the index operations to ES in bulk, leaving
+      out those of unchanged documents.
+
+    The number of records and the time spent working, summed over all the
+    workers of a stage, are collected for each stage.
+    """
+
+    stages = ('fetch', 'enhance', 'send')
+
+    def __init__(self, batch_size=200, processes=None, senders=4, queue_size=None,
+                 request_timeout=None):
+        self.batch_size = batch_size
+        self.processes = processes or cpu_count()
+        self.senders = senders
+        self.queue_size = queue_size or 2 * self.processes
+        self.request_timeout = request_timeout or \
+            current_app.config['INDEXER_BULK_REQUEST_TIMEOUT']
+
+        self.success = 0
+        self.skipped = 0
+        self.failures = []
+        self.stats = {stage: {'records': 0, 'seconds': 0.0} for stage in self.stages}
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def _add_stats(self, stage, records, seconds):
+        with self._lock:
+            self.stats[stage]['records'] += records
+            self.stats[stage]['seconds'] += seconds
+
+    def _add_failure(self, uuids, error):
+        LOGGER.exception('Failed to index records %s', uuids)
+        with self._lock:
+            self.failures.append({'ids': uuids, 'error': repr(error)})
+
+    def _fetch(self, app, uuids, fetch_queue):
+        try:
+            with app.app_context():
+                for start in range(0, len(uuids), self.batch_size):
+                    batch = uuids[start:start + self.batch_size]
+                    try:
+                        fetch_queue.put((batch, self._fetch_batch(batch)))
+                    except Exception as err:
+                        self._add_failure(batch, err)
+                db.session.remove()
+        finally:
+            fetch_queue.put(_DONE)
+
+    def _fetch_batch(self, uuids):
+        start = time.time()
+        records = [
+            record for record in InspireRecord.get_records(uuids)
+            if not record.get('deleted', False)
+        ]
+        citations_counts = InspireRecord.get_citations_counts(
+            get_pid_for_citations(record) for record in records
+        )
+        items = [
+            (
+                record.id,
+                record.model.version_id,
+                record.model.created,
+                record.model.updated,
+                record.model.json,
+                citations_counts.get(get_pid_for_citations(record)),
+            ) for record in records
+        ]
+        self._add_stats('fetch', len(items), time.time() - start)
+        return items
+
+    def _send(self, app, send_queue):
+        with app.app_context():
+            for uuids, index_ops in iter(send_queue.get, _DONE):
+                start = time.time()
+                records = len(index_ops)
+                try:
+                    index_ops, skipped = filter_unchanged_index_ops(index_ops)
+                    success, failures = bulk(
+                        es,
+                        index_ops,
+                        request_timeout=self.request_timeout,
+                        raise_on_error=False,
+                        raise_on_exception=False,
+                    )
+                    bump_index_generation(op['_index'] for op in index_ops)
+                except Exception as err:
+                    self._add_failure(uuids, err)
+                    continue
+
+                with self._lock:
+                    self.success += success
+                    self.skipped += skipped
+                    self.failures += failures or []
+                self._add_stats('send', records, time.time() - start)
+
+    def _collect(self, pending_result, send_queue):
+        uuids, result = pending_result
+        try:
+            index_ops, seconds = result.get()
+        except Exception as err:
+            self._add_failure(uuids, err)
+            return
+
+        self._add_stats('enhance', len(index_ops), seconds)
+        send_queue.put((uuids, index_ops))
+
+    def run(self, uuids):
+        """Index records.
+
+        Args:
+            uuids (List[str]): UUIDs of the records to index.
+
+        Returns:
+            dict: the number of indexed and skipped records, the failures and
+            the statistics of each stage.
+        """
+        start = time.time()
+        app = current_app._get_current_object()
+        uuids = list(uuids)
+
+        # The processes must not share the connections of this one.
+        db.session.remove()
+        db.engine.dispose()
+        pool = Pool(self.processes, _init_enhancement_worker, (app,))
+
+        fetch_queue = Queue(maxsize=self.queue_size)
+        send_queue = Queue(maxsize=self.queue_size)
+
+        fetcher = threading.Thread(target=self._fetch, args=(app, uuids, fetch_queue))
+        senders = [
+            threading.Thread(target=self._send, args=(app, send_queue))
+            for _ in range(self.senders)
+        ]
+        for thread in [fetcher] + senders:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            pending_results = deque()
+            for batch, items in iter(fetch_queue.get, _DONE):
+                pending_results.append((batch, pool.apply_async(_enhance_records, (items,))))
+                if len(pending_results) >= self.queue_size:
+                    self._collect(pending_results.popleft(), send_queue)
+            while pending_results:
+                self._collect(pending_results.popleft(), send_queue)
+        finally:
+            for _ in senders:
+                send_queue.put(_DONE)
+            pool.close()
+            pool.join()
+
+        fetcher.join()
+        for thread in senders:
+            thread.join()
+
+        self.elapsed = time.time() - start
+        return self.report()
+
+    def report(self):
+        """Return the results of the indexing and the statistics of each stage.
+
+        For each stage, ``rate`` is the number of records processed per second
+        of work by a single worker of the stage.
+        """
+        stats = {}
+        for stage, stage_stats in self.stats.items():
+            stats[stage] = dict(stage_stats)
+            seconds = stage_stats['seconds']
+            stats[stage]['rate'] = stage_stats['records'] / seconds if seconds else 0.0
+
+        return {
+            'success': self.success,
+            'skipped': self.skipped,
+            'failures': self.failures,
+            'elapsed': self.elapsed,
+            'rate': self.stats['send']['records'] / self.elapsed if self.elapsed else 0.0,
+            'stages': stats,
+        }
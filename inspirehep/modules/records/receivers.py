@@ -26,7 +26,6 @@ from __future__ import absolute_import, division, print_function
 
 import uuid
 import logging
-from copy import deepcopy
 
 from flask import current_app
 from flask_sqlalchemy import models_committed
@@ -49,10 +48,15 @@ from inspirehep.modules.orcid import (
 )
 from inspirehep.modules.orcid.utils import get_orcids_for_push
 from inspirehep.modules.pidstore.utils import get_pid_type_from_schema
-from inspirehep.modules.records.api import InspireRecord
+from inspirehep.modules.records.api import EnhancedInspireRecord, InspireRecord
 from inspirehep.modules.records.errors import MissingInspireRecordError
+from inspirehep.modules.records.json_ref_loader import invalidate_resolved_records
 from inspirehep.modules.records.serializers.schemas.json import RecordMetadataSchemaV1
-from inspirehep.modules.records.tasks import index_modified_citations_from_record
+from inspirehep.modules.records.indexer import WriteBehindQueue, bump_index_generation
+from inspirehep.modules.records.tasks import (
+    drain_write_behind_queue,
+    index_modified_citations_from_record,
+)
 from inspirehep.modules.records.utils import (
     is_author,
     is_book,
@@ -159,14 +163,46 @@ def push_to_orcid(sender, record, *args, **kwargs):
 
 @after_record_update.connect
 def enhance_record(sender, record, *args, **kwargs):
-    """Enhance the record for ES"""
+    """Enhance the record for ES.
+
+    The fields for ES are added to an overlay of the record instead of a deep
+    copy of it, see ``EnhancedInspireRecord``.
+    """
     if not isinstance(record, InspireRecord):
         raise MissingInspireRecordError("Record is not InspireRecord!")
-    enhanced_record = deepcopy(record)
+    if current_app.config.get('INDEXER_WRITE_BEHIND'):
+        # The record will be enhanced when the write-behind queue is drained.
+        return
+    enhanced_record = EnhancedInspireRecord.from_record(record)
     enhance_before_index(enhanced_record)
     record.model._enhanced_record = enhanced_record
 
 
+@after_record_update.connect
+def invalidate_resolved_record(sender, record, *args, **kwargs):
+    """Remove the record from the caches of records resolved from references."""
+    if 'control_number' in record:
+        invalidate_resolved_records(
+            get_pid_type_from_schema(record['$schema']),
+            record['control_number'],
+        )
+
+
+@models_committed.connect
+def invalidate_resolved_records_after_commit(sender, changes):
+    """Remove the committed records from the caches of resolved records.
+
+    They are removed again after the commit, as the previous version of the
+    records might have been cached again in the meantime.
+    """
+    for model_instance, change in changes:
+        if isinstance(model_instance, RecordMetadata) and 'control_number' in model_instance.json:
+            invalidate_resolved_records(
+                get_pid_type_from_schema(model_instance.json['$schema']),
+                model_instance.json['control_number'],
+            )
+
+
 @models_committed.connect
 def index_after_commit(sender, changes):
     """Index a record in ES after it was committed to the DB.
@@ -174,16 +210,30 @@ def index_after_commit(sender, changes):
     This cannot happen in an ``after_record_commit`` receiver from Invenio-Records
     because, despite the name, at that point we are not yet sure whether the record
     has been really committed to the DB.
+
+    When ``INDEXER_WRITE_BEHIND`` is set, the records are not indexed right
+    away but queued, as well as the update of their citations, and a drain
+    of the queue is scheduled after the coalescing window if none is
+    scheduled yet.
     """
     indexer = RecordIndexer()
+    write_behind = current_app.config.get('INDEXER_WRITE_BEHIND')
+    uuids_to_queue = []
+    citations_to_queue = []
+    changed_indexes = set()
+
     for model_instance, change in changes:
         if isinstance(model_instance, RecordMetadata):
             if change in ('insert', 'update') and not model_instance.json.get("deleted"):
-                if hasattr(model_instance, '_enhanced_record'):
-                    record = model_instance._enhanced_record
+                if write_behind:
+                    uuids_to_queue.append(model_instance.id)
                 else:
-                    record = model_instance.json
-                indexer.index(InspireRecord(record, model_instance))
+                    if hasattr(model_instance, '_enhanced_record'):
+                        record = model_instance._enhanced_record
+                    else:
+                        record = InspireRecord(model_instance.json, model_instance)
+                    indexer.index(record)
+                    changed_indexes.add(indexer.record_to_index(record)[0])
             else:
                 try:
                     indexer.delete(InspireRecord(
@@ -193,17 +243,37 @@ def index_after_commit(sender, changes):
                     LOGGER.debug('Record %s not found in ES',
                                  model_instance.json.get("id"))
                     pass
+                changed_indexes.add(indexer.record_to_index(model_instance.json)[0])
 
             pid_type = get_pid_type_from_schema(model_instance.json['$schema'])
             pid_value = model_instance.json['control_number']
             db_version = model_instance.version_id
 
-            index_modified_citations_from_record.delay(pid_type, pid_value, db_version)
+            if write_behind:
+                citations_to_queue.append((pid_type, pid_value, db_version))
+            else:
+                index_modified_citations_from_record.delay(pid_type, pid_value, db_version)
+
+    bump_index_generation(changed_indexes)
 
+    if uuids_to_queue or citations_to_queue:
+        queue = WriteBehindQueue()
+        queue.push(uuids_to_queue)
+        queue.push_citations(citations_to_queue)
+        if queue.mark_scheduled():
+            drain_write_behind_queue.apply_async(
+                countdown=current_app.config['INDEXER_WRITE_BEHIND_WINDOW'],
+            )
 
-def enhance_before_index(record):
+
+def enhance_before_index(record, citations_count=None):
     """Run all the receivers that enhance the record for ES in the right order.
 
+    Args:
+        record (InspireRecord): the record to enhance.
+        citations_count (int): if passed, it is used as the citation count of
+            the record instead of querying it from the DB.
+
     .. note::
 
        ``populate_recid_from_ref`` **MUST** come before ``populate_bookautocomplete``
@@ -221,7 +291,7 @@ def enhance_before_index(record):
         populate_inspire_document_type(record)
         populate_name_variations(record)
         populate_number_of_references(record)
-        populate_citations_count(record)
+        populate_citations_count(record, citations_count)
         populate_facet_author_name(record)
         populate_ui_display(record, RecordMetadataSchemaV1)
 
@@ -242,4 +312,4 @@ def enhance_before_index(record):
         populate_title_suggest(record)
 
     elif is_data(record):
-        populate_citations_count(record)
+        populate_citations_count(record, citations_count)
@@ -24,6 +24,7 @@
 
 from __future__ import absolute_import, division, print_function
 
+from invenio_records_rest.serializers import json_v1_search as records_rest_json_v1_search
 from invenio_records_rest.serializers.response import search_responsify
 from invenio_records_rest.serializers.json import JSONSerializer
 
@@ -46,7 +47,7 @@ from .schemas.json import (
 )
 from .marcxml import MARCXMLSerializer
 from .latex import LatexSerializer
-from .response import record_responsify_nocache, facets_responsify
+from .response import cursor_paginated, facets_responsify, record_responsify_nocache
 
 json_literature_ui_v1 = LiteratureJSONUISerializer(
     LiteratureRecordSchemaJSONUIV1
@@ -56,10 +57,10 @@ json_literature_ui_v1_search = LiteratureJSONUISerializer(
     UIDisplayLiteratureRecordJsonUIV1
 )
 
-json_literature_ui_v1_search_response = search_responsify(
+json_literature_ui_v1_search_response = cursor_paginated(search_responsify(
     json_literature_ui_v1_search,
     'application/vnd+inspire.literature.ui+json'
-)
+))
 
 json_literature_ui_v1_response = record_responsify_nocache(
     json_literature_ui_v1,
@@ -69,10 +70,10 @@ json_literature_ui_v1_response = record_responsify_nocache(
 json_literature_references_v1 = JSONSerializer(
     LiteratureReferencesSchemaJSONUIV1
 )
-json_literature_references_v1_search = search_responsify(
+json_literature_references_v1_search = cursor_paginated(search_responsify(
     json_literature_references_v1,
     'application/json',
-)
+))
 json_literature_references_v1_response = record_responsify_nocache(
     json_literature_references_v1,
     'application/json',
@@ -89,10 +90,10 @@ json_literature_citations_v1_response = record_responsify_nocache(
 json_literature_authors_v1 = JSONSerializer(
     LiteratureAuthorsSchemaJSONUIV1
 )
-json_literature_authors_v1_search = search_responsify(
+json_literature_authors_v1_search = cursor_paginated(search_responsify(
     json_literature_authors_v1,
     'application/json',
-)
+))
 json_literature_authors_v1_response = record_responsify_nocache(
     json_literature_authors_v1,
     'application/json',
@@ -135,7 +136,13 @@ latex_v1_response_us = record_responsify_nocache(latex_v1_US,
 marcxml_v1_response = record_responsify_nocache(marcxml_v1,
                                                 'application/marcxml+xml')
 
-bibtex_v1_search = search_responsify(bibtex_v1, 'application/x-bibtex')
-marcxml_v1_search = search_responsify(marcxml_v1, 'application/marcxml+xml')
-latex_v1_search_eu = search_responsify(latex_v1_EU, 'application/vnd.eu+x-latex')
-latex_v1_search_us = search_responsify(latex_v1_US, 'application/vnd.us+x-latex')
+bibtex_v1_search = cursor_paginated(
+    search_responsify(bibtex_v1, 'application/x-bibtex'))
+marcxml_v1_search = cursor_paginated(
+    search_responsify(marcxml_v1, 'application/marcxml+xml'))
+latex_v1_search_eu = cursor_paginated(
+    search_responsify(latex_v1_EU, 'application/vnd.eu+x-latex'))
+latex_v1_search_us = cursor_paginated(
+    search_responsify(latex_v1_US, 'application/vnd.us+x-latex'))
+
+json_v1_search = cursor_paginated(records_rest_json_v1_search)
@@ -27,7 +27,10 @@ Responsible for creating a HTTP response given the output of a serializer.
 
 from __future__ import absolute_import, division, print_function
 
-from flask import current_app
+from flask import current_app, request
+from werkzeug.urls import url_decode, url_encode, url_parse
+
+from inspirehep.modules.search.search_factory import encode_cursor
 
 
 def record_responsify_nocache(serializer, mimetype):
@@ -71,3 +74,52 @@ def facets_responsify(serializer, mimetype):
             response.headers.extend(headers)
         return response
     return view
+
+
+def get_cursor_links(search_result, links):
+    """Get the links of a page of search results paginated with a cursor.
+
+    There is no ``prev`` link, and the ``next`` link, if any, is the ``self``
+    link with the cursor of the last hit of the page.
+
+    The size of the page is read from the ``self`` link, which has the size
+    used by the search, whether requested or the default one.
+    """
+    hits = search_result['hits']['hits']
+    url = url_parse(links['self'])
+    args = url_decode(url.query)
+    size = args.get(
+        'size', current_app.config.get('RECORDS_REST_DEFAULT_RESULTS_SIZE', 10), type=int)
+
+    cursor_links = {'self': links['self']}
+    if hits and len(hits) >= size:
+        args.pop('page', None)
+        args['cursor'] = encode_cursor(hits[-1]['sort'])
+        cursor_links['next'] = url.replace(query=url_encode(args)).to_url()
+
+    return cursor_links
+
+
+def cursor_paginated(search_view):
+    """Make a search response serializer support pagination with a cursor.
+
+    When the search is paginated with a cursor, see
+    ``inspire_cursor_factory``, the links to the previous and next pages are
+    replaced by one to the next page, with the cursor of the last hit.
+
+    Args:
+        search_view: Records-REST search response serializer.
+    """
+    def view(pid_fetcher, search_result, code=200, headers=None, links=None,
+             item_links_factory=None):
+        if links is not None and 'cursor' in request.values:
+            links = get_cursor_links(search_result, links)
+        return search_view(
+            pid_fetcher,
+            search_result,
+            code=code,
+            headers=headers,
+            links=links,
+            item_links_factory=item_links_factory,
+        )
+    return view
@@ -24,25 +24,50 @@
 
 from __future__ import absolute_import, division, print_function
 
+import time
+
 from celery import shared_task
 from celery.utils.log import get_task_logger
 from elasticsearch.helpers import bulk, scan
 from flask import current_app
 from six import iteritems
-from sqlalchemy import tuple_
-from sqlalchemy.orm.exc import NoResultFound, StaleDataError
+from sqlalchemy import tuple_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm.exc import StaleDataError
+from time_execution import time_execution
 
 from invenio_db import db
+from invenio_indexer.api import current_record_to_index
 from invenio_pidstore.models import PersistentIdentifier
+from invenio_records.models import RecordMetadata
 from invenio_search import current_search_client as es
 
 from inspire_dojson.utils import get_recid_from_ref
+from inspirehep.modules.authors.metrics import (
+    get_authors_recids,
+    get_authors_recids_with_changed_metrics,
+)
+from inspirehep.modules.authors.tasks import schedule_authors_metrics_update
 from inspirehep.modules.records.api import InspireRecord
 from inspirehep.modules.records.errors import MissingCitedRecordError
-from inspirehep.modules.records.utils import get_endpoint_from_record
+from inspirehep.modules.records.indexer import (
+    FINGERPRINT_FIELD,
+    WriteBehindQueue,
+    bump_index_generation,
+    filter_unchanged_index_ops,
+)
+from inspirehep.modules.records.utils import (
+    get_endpoint_from_record,
+    get_pid_for_citations,
+)
 from inspirehep.modules.pidstore.utils import get_pid_type_from_schema
+from inspirehep.utils.lock import DistributedLockError, distributed_lock
 from inspirehep.utils.record import create_index_op
-from inspirehep.utils.record_getter import get_db_record, RecordGetterError
+from inspirehep.utils.record_getter import (
+    get_db_record,
+    get_db_records_fields,
+    RecordGetterError,
+)
 
 
 logger = get_task_logger(__name__)
@@ -185,18 +210,107 @@ def get_merged_records():
 
 
 @shared_task(ignore_result=False, max_retries=0)
-def batch_reindex(uuids, request_timeout=None):
-    """Task for bulk reindexing records."""
+def batch_reindex(uuids, request_timeout=None, index=None):
+    """Task for bulk reindexing records.
+
+    All the records of the batch are loaded with a single query, and so are
+    their citation counts, which are then passed to ``create_index_op``.
+
+    When ``INDEXER_SKIP_UNCHANGED`` is set, the records whose document in ES
+    has the same fingerprint as the one that would be indexed are skipped.
+
+    When ``index`` is passed, the records are indexed into it instead of
+    the index they belong to, e.g. to fill a new index before it replaces
+    the live one.
+    """
+    records = InspireRecord.get_records(uuids)
+    missing_uuids = set(str(uuid) for uuid in uuids) - set(str(record.id) for record in records)
+    for uuid in missing_uuids:
+        logger.warn('Record %s failed to load', uuid)
+
+    records = [record for record in records if not record.get('deleted', False)]
+    citations_counts = InspireRecord.get_citations_counts(
+        get_pid_for_citations(record) for record in records
+    )
+
+    index_ops = [
+        create_index_op(
+            record,
+            version_type='force',
+            citations_count=citations_counts.get(get_pid_for_citations(record)),
+            index=index,
+        ) for record in records
+    ]
+
+    index_ops, skipped = filter_unchanged_index_ops(index_ops)
+
+    if not request_timeout:
+        request_timeout = current_app.config['INDEXER_BULK_REQUEST_TIMEOUT']
+
+    success, failures = bulk(
+        es,
+        index_ops,
+        request_timeout=request_timeout,
+        raise_on_error=False,
+        raise_on_exception=False,
+    )
+    bump_index_generation(op['_index'] for op in index_ops)
+
+    return {
+        'success': success,
+        'skipped': skipped,
+        'failures': [failure for failure in failures or []],
+    }
+
+
+@shared_task(ignore_result=False, max_retries=0)
+def batch_update_citations_count(uuids, request_timeout=None):
+    """Task for updating only the ``citation_count`` of records in ES.
+
+    Instead of reindexing the whole documents, partial updates touching only
+    ``citation_count`` are sent in bulk. The document version is forced to
+    the revision of the record in the DB, so that it stays consistent with
+    the external versioning used when indexing records.
+
+    Records whose document is missing from ES are fully reindexed instead.
+    """
+    records = db.session.query(
+        RecordMetadata.id,
+        RecordMetadata.version_id,
+        type_coerce(RecordMetadata.json, JSONB)['$schema'].astext,
+        type_coerce(RecordMetadata.json, JSONB)['control_number'].astext,
+    ).filter(
+        RecordMetadata.id.in_(uuids),
+    ).all()
+
+    records = [
+        {
+            'uuid': str(uuid),
+            'revision_id': version_id - 1,
+            '$schema': schema,
+            'control_number': control_number,
+        } for uuid, version_id, schema, control_number in records
+    ]
+    citations_counts = InspireRecord.get_citations_counts(
+        get_pid_for_citations(record) for record in records
+    )
+
     def actions():
-        for uuid in uuids:
-            try:
-                record = InspireRecord.get_record(uuid)
-                if record.get('deleted', False):
-                    logger.debug("Record already %s deleted, not indexing!", uuid)
-                    continue
-                yield create_index_op(record, version_type='force')
-            except NoResultFound as e:
-                logger.warn('Record %s failed to load: %s', uuid, e)
+        for record in records:
+            index, doc_type = current_record_to_index(record)
+            yield {
+                '_op_type': 'update',
+                '_index': index,
+                '_type': doc_type,
+                '_id': record['uuid'],
+                '_version': record['revision_id'],
+                '_version_type': 'force',
+                'doc': {
+                    'citation_count': citations_counts[get_pid_for_citations(record)],
+                    # The fingerprint no longer matches the document.
+                    FINGERPRINT_FIELD: None,
+                },
+            }
 
     if not request_timeout:
         request_timeout = current_app.config['INDEXER_BULK_REQUEST_TIMEOUT']
@@ -208,15 +322,135 @@ def batch_reindex(uuids, request_timeout=None):
         raise_on_error=False,
         raise_on_exception=False,
     )
+    bump_index_generation(current_record_to_index(record)[0] for record in records)
+
+    failures = failures or []
+    missing_uuids = [
+        failure['update']['_id'] for failure in failures
+        if failure.get('update', {}).get('status') == 404
+    ]
+    failures = [
+        failure for failure in failures
+        if failure.get('update', {}).get('status') != 404
+    ]
+
+    if missing_uuids:
+        logger.info('%s records missing from ES, reindexing them', len(missing_uuids))
+        result = batch_reindex(missing_uuids, request_timeout=request_timeout)
+        success += result['success']
+        failures += result['failures']
 
     return {
         'success': success,
-        'failures': [failure for failure in failures or []],
+        'failures': failures,
+    }
+
+
+def _get_failed_uuids(failures):
+    """Get the UUIDs of the records whose bulk operation failed."""
+    for failure in failures:
+        for result in failure.values():
+            if isinstance(result, dict) and '_id' in result:
+                yield str(result['_id'])
+
+
+@shared_task(ignore_result=False, max_retries=0)
+@time_execution
+def drain_write_behind_queue():
+    """Index in bulk the records queued by ``index_after_commit``.
+
+    The queue is drained in batches of ``INDEXER_WRITE_BEHIND_BATCH_SIZE``
+    records until it is empty. The records are only removed from the queue
+    once they were indexed: those that failed are queued again, and so are
+    those left by a drain that crashed when the next one starts. The queue
+    depth when the drain started and the maximum time a record waited in
+    the queue are logged and returned with the indexing results.
+
+    Once the records are indexed, the update of the citations of the queued
+    records is scheduled, once per record whatever the number of commits.
+
+    Only one drain runs at a time: when another one is running, the drain
+    is scheduled again after the coalescing window.
+    """
+    queue = WriteBehindQueue()
+    try:
+        with distributed_lock(queue.drain_lock_name, expire=60, auto_renewal=True):
+            return _drain_write_behind_queue(queue)
+    except DistributedLockError:
+        logger.info('Another drain of the write-behind indexing queue is running, draining later')
+        drain_write_behind_queue.apply_async(
+            countdown=current_app.config['INDEXER_WRITE_BEHIND_WINDOW'],
+        )
+
+
+def _drain_write_behind_queue(queue):
+    batch_size = current_app.config['INDEXER_WRITE_BEHIND_BATCH_SIZE']
+
+    queue.unschedule()
+    recovered = queue.recover()
+    if recovered:
+        logger.warn('Queued again %s records left by a previous drain', recovered)
+
+    queue_size = queue.size()
+    success = 0
+    skipped = 0
+    failures = []
+    failed_uuids = []
+    max_latency = 0.0
+
+    batch = []
+    try:
+        batch = queue.pop(batch_size)
+        while batch:
+            uuids = [uuid for uuid, _ in batch]
+            result = batch_reindex(uuids)
+            success += result['success']
+            skipped += result['skipped']
+            failures += result['failures']
+
+            batch_failed_uuids = set(_get_failed_uuids(result['failures']))
+            failed_uuids += [uuid for uuid in uuids if uuid in batch_failed_uuids]
+            queue.ack(uuid for uuid in uuids if uuid not in batch_failed_uuids)
+
+            now = time.time()
+            max_latency = max([max_latency] + [now - queued_at for _, queued_at in batch])
+            batch = queue.pop(batch_size)
+    finally:
+        # The records that failed, in the current batch if the drain was
+        # interrupted, are indexed again by the next drain.
+        queue.requeue(failed_uuids + [uuid for uuid, _ in batch])
+
+    # The citations left by a crashed drain are scheduled again by the next one.
+    citations = queue.pop_citations()
+    for pid_type, pid_value, since_version, version in citations:
+        index_modified_citations_from_record.delay(pid_type, pid_value, version, since_version)
+    queue.ack_citations()
+
+    # The records queued again need a drain, unless one is already scheduled.
+    if queue.size() and queue.mark_scheduled():
+        drain_write_behind_queue.apply_async(
+            countdown=current_app.config['INDEXER_WRITE_BEHIND_WINDOW'],
+        )
+
+    logger.info(
+        'Drained write-behind indexing queue: queue size %s, %s indexed, '
+        '%s unchanged, %s failed and queued again, max latency %.2fs, '
+        '%s citation updates scheduled',
+        queue_size, success, skipped, len(failures), max_latency, len(citations),
+    )
+
+    return {
+        'queue_size': queue_size,
+        'max_latency': max_latency,
+        'success': success,
+        'skipped': skipped,
+        'failures': failures,
+        'citations': len(citations),
     }
 
 
 @shared_task(ignore_result=False, bind=True, max_retries=12)
-def index_modified_citations_from_record(self, pid_type, pid_value, db_version):
+def index_modified_citations_from_record(self, pid_type, pid_value, db_version, since_version=None):
     """Index records from the record's citations.
 
     This tasks retries itself in 2 scenarios:
@@ -231,6 +465,9 @@ def index_modified_citations_from_record(self, pid_type, pid_value, db_version):
         pid_value(String): pid value of the record
         db_version(Int): the correct version of the record that we expect
             to index. This prevents loading stale data from the DB.
+        since_version(Int): the first version of the record whose changes
+            were not handled yet, when several commits were coalesced.
+            Defaults to ``db_version``.
 
     Raise:
       MissingCitedRecordError in case cited records are not found
@@ -255,9 +492,16 @@ def index_modified_citations_from_record(self, pid_type, pid_value, db_version):
             )
         raise self.retry(countdown=backoff, exc=e)
 
-    pids = record.get_modified_references()
+    # The metrics of the authors of the record change if they were added or
+    # removed, or if the fields from which they are computed changed, and so
+    # do those of the authors of the records it cites or stopped citing.
+    author_recids = get_authors_recids_with_changed_metrics(
+        record, record.get_previous_version(since_version),
+    )
+    pids = record.get_modified_references(since_version)
 
     if not pids:
+        schedule_authors_metrics_update(author_recids)
         logger.info('No references change for record {}'.format((pid_type, pid_value)))
         return None
     logger.info(
@@ -275,10 +519,23 @@ def index_modified_citations_from_record(self, pid_type, pid_value, db_version):
     ]
 
     if uuids:
+        for cited_record in get_db_records_fields(
+            ['authors.record'],
+            criteria=[RecordMetadata.id.in_(uuids)],
+        ):
+            author_recids |= get_authors_recids(cited_record)
+
         logger.info("({pid_value}) contains pids - starting batch".format(
             pid_value=pid_value)
         )
-        return batch_reindex(uuids)
+        if current_app.config.get('INDEXER_PARTIAL_CITATIONS_UPDATE'):
+            result = batch_update_citations_count(uuids)
+        else:
+            result = batch_reindex(uuids)
+
+        # After the citation counts of the cited records were updated in ES.
+        schedule_authors_metrics_update(author_recids)
+        return result
 
     raise MissingCitedRecordError(
         'Cited records to reindex not found:\nuuids: {}'.format(uuids)
@@ -28,8 +28,17 @@ from itertools import chain
 from unicodedata import normalize
 import re
 import six
+from six import iteritems
+from six.moves.urllib.parse import urlsplit
+
+try:
+    from functools import lru_cache
+except ImportError:
+    from functools32 import lru_cache
 
 from inspire_dojson.utils import get_recid_from_ref
+from inspire_schemas.errors import SchemaNotFound
+from inspire_schemas.utils import load_schema
 from inspire_utils.date import earliest_date
 from inspire_utils.name import generate_name_variations, ParsedName
 from inspire_utils.record import get_value
@@ -80,6 +89,17 @@ def get_endpoint_from_record(record):
     return endpoint
 
 
+def get_pid_for_citations(record):
+    """Return the pid under which references to a record are stored.
+
+    It is the pid extracted by ``get_pid_from_record_uri`` from the JSON
+    references pointing to the record.
+    """
+    endpoint = get_endpoint_from_record(record)
+
+    return endpoint[:3], str(record.get('control_number'))
+
+
 def get_pid_from_record_uri(record_uri):
     """Transform a URI to a record into a (pid_type, pid_value) pair."""
     parts = [part for part in record_uri.split('/') if part]
@@ -92,6 +112,48 @@ def get_pid_from_record_uri(record_uri):
     return pid_type, pid_value
 
 
+def is_superseded(record):
+    """Return whether a record has been superseded by a successor."""
+    return any(
+        related.get('relation') == 'successor'
+        for related in record.get('related_records', [])
+    )
+
+
+def get_cited_pids(record):
+    """Return the pids of the records cited by a record.
+
+    Citations only count when they come from a Literature record which is
+    neither deleted nor superseded, for any other record an empty set is
+    returned.
+
+    Args:
+        record (dict): the metadata of the citing record.
+
+    Returns:
+        Set[Tuple[str, str]]: the ``(pid_type, pid_value)`` pairs of the
+        linked references.
+    """
+    if not record:
+        return set()
+
+    if (
+        'Literature' not in record.get('_collections', []) or
+        record.get('deleted', False) or
+        is_superseded(record)
+    ):
+        return set()
+
+    cited_pids = set()
+    for reference in record.get('references', []):
+        ref = get_value(reference, 'record.$ref')
+        pid = get_pid_from_record_uri(ref) if ref else None
+        if pid:
+            cited_pids.add((pid[0], str(pid[1])))
+
+    return cited_pids
+
+
 def get_author_display_name(name):
     """Returns the display name in format Firstnames Lastnames"""
     parsed_name = ParsedName.loads(name)
@@ -149,9 +211,11 @@ def populate_earliest_date(record):
             record['earliest_date'] = result
 
 
-def populate_citations_count(record):
+def populate_citations_count(record, citations_count=None):
     """Populate citations_count in ES from"""
-    if hasattr(record, 'get_citations_count'):
+    if citations_count is not None:
+        record['citation_count'] = citations_count
+    elif hasattr(record, 'get_citations_count'):
         # Make sure that record has method get_citations_count
         # Session is in commited state here, and I cannot open new one...
         citation_count = record.get_citations_count()
@@ -194,7 +258,171 @@ def populate_inspire_document_type(record):
     record['facet_inspire_doc_type'] = result
 
 
-def populate_recid_from_ref(record):
+_LIST_REF_FIELDS_TRANSLATIONS = {
+    'deleted_records': 'deleted_recids'
+}
+
+_REF = '$ref'
+"""Marks a field holding a JSON reference in compiled reference paths."""
+
+_REF_LIST = '$refs'
+"""Marks a field holding a list of JSON references to translate."""
+
+_ITEMS = '[]'
+"""Key of the compiled reference paths of the items of a list."""
+
+
+def _get_recid_sibling_key(key):
+    # Append '_recid' and remove 'record' from the key name.
+    key_basename = key.replace('record', '').rstrip('_')
+    return '{}_recid'.format(key_basename).lstrip('_')
+
+
+def _is_json_reference_schema(schema):
+    return '$ref' in schema.get('properties', {})
+
+
+def _merge_ref_paths(first, second):
+    for key, value in iteritems(second):
+        if isinstance(first.get(key), dict) and isinstance(value, dict):
+            _merge_ref_paths(first[key], value)
+        else:
+            first[key] = value
+    return first
+
+
+def _compile_ref_paths_node(schema):
+    node = {}
+    for key, subschema in iteritems(schema.get('properties', {})):
+        if _is_json_reference_schema(subschema):
+            node[key] = _REF
+        elif subschema.get('type') == 'array' and key in _LIST_REF_FIELDS_TRANSLATIONS:
+            node[key] = _REF_LIST
+        else:
+            child = _compile_ref_paths_node(subschema)
+            if child:
+                node[key] = child
+
+    items = schema.get('items')
+    # References directly in a list do not get any sibling.
+    if isinstance(items, dict) and not _is_json_reference_schema(items):
+        child = _compile_ref_paths_node(items)
+        if child:
+            node[_ITEMS] = child
+
+    for keyword in ('allOf', 'anyOf', 'oneOf'):
+        for subschema in schema.get(keyword, []):
+            _merge_ref_paths(node, _compile_ref_paths_node(subschema))
+
+    return node
+
+
+@lru_cache()
+def compile_ref_paths(schema):
+    """Compile the paths of the records of a schema that can hold references.
+
+    The result is a tree of nested dictionaries following the structure of
+    the records: the items of a list are under the ``'[]'`` key, and the
+    leaves mark the fields holding a JSON reference. Only the branches
+    leading to such fields are kept.
+
+    Args:
+        schema (str): the ``$schema`` of the records.
+
+    Returns:
+        dict: the compiled reference paths.
+
+    Raises:
+        SchemaNotFound: if the schema cannot be loaded.
+    """
+    return _compile_ref_paths_node(load_schema(urlsplit(schema).path, resolved=True))
+
+
+def _find_refs_recursively(json_root):
+    """Return ``json_root`` with the recid siblings, copying it if needed."""
+    if isinstance(json_root, list):
+        result = json_root
+        for index, value in enumerate(json_root):
+            new_value = _find_refs_recursively(value)
+            if new_value is not value:
+                if result is json_root:
+                    result = list(json_root)
+                result[index] = new_value
+        return result
+
+    if not isinstance(json_root, dict):
+        return json_root
+
+    siblings = {}
+    for key, value in iteritems(json_root):
+        if isinstance(value, dict) and '$ref' in value:
+            siblings[_get_recid_sibling_key(key)] = get_recid_from_ref(value)
+        elif isinstance(value, list) and key in _LIST_REF_FIELDS_TRANSLATIONS:
+            new_list = [get_recid_from_ref(v) for v in value]
+            new_key = _LIST_REF_FIELDS_TRANSLATIONS[key]
+            siblings[new_key] = new_list
+        else:
+            new_value = _find_refs_recursively(value)
+            if new_value is not value:
+                siblings[key] = new_value
+
+    if not siblings:
+        return json_root
+
+    result = dict(json_root)
+    result.update(siblings)
+    return result
+
+
+def _find_refs_on_paths(json_root, ref_paths):
+    """Return ``json_root`` with the recid siblings, copying it if needed.
+
+    Unlike ``_find_refs_recursively``, only the paths in ``ref_paths``, as
+    returned by ``compile_ref_paths``, are visited.
+    """
+    if isinstance(json_root, list):
+        items_ref_paths = ref_paths.get(_ITEMS)
+        if not items_ref_paths:
+            return json_root
+
+        result = json_root
+        for index, value in enumerate(json_root):
+            new_value = _find_refs_on_paths(value, items_ref_paths)
+            if new_value is not value:
+                if result is json_root:
+                    result = list(json_root)
+                result[index] = new_value
+        return result
+
+    if not isinstance(json_root, dict):
+        return json_root
+
+    siblings = {}
+    for key, child in iteritems(ref_paths):
+        value = json_root.get(key)
+        if value is None:
+            continue
+        elif child == _REF:
+            if isinstance(value, dict) and '$ref' in value:
+                siblings[_get_recid_sibling_key(key)] = get_recid_from_ref(value)
+        elif child == _REF_LIST:
+            if isinstance(value, list):
+                new_key = _LIST_REF_FIELDS_TRANSLATIONS[key]
+                siblings[new_key] = [get_recid_from_ref(v) for v in value]
+        else:
+            new_value = _find_refs_on_paths(value, child)
+            if new_value is not value:
+                siblings[key] = new_value
+
+    if not siblings:
+        return json_root
+
+    result = dict(json_root)
+    result.update(siblings)
+    return result
+
+
+def populate_recid_from_ref(record, from_schema=True):
     """Extract recids from all JSON reference fields and add them to ES.
 
     For every field that has as a value a JSON reference, adds a sibling
@@ -235,36 +463,32 @@ def populate_recid_from_ref(record):
             ],
         }
 
-    """
-    list_ref_fields_translations = {
-        'deleted_records': 'deleted_recids'
-    }
+    Only the paths which can hold a JSON reference according to the schema
+    of the record are visited. If ``from_schema`` is ``False``, or if the
+    schema of the record cannot be loaded, all the values of the record are
+    searched for references instead.
+
+    Nested values are never modified in place: the objects and lists which
+    get a new sibling are shallow copies, sharing everything else with the
+    original ones, so that the stored JSON of the record is left untouched
+    when it is enhanced without being cloned first.
 
-    def _recursive_find_refs(json_root):
-        if isinstance(json_root, list):
-            items = enumerate(json_root)
-        elif isinstance(json_root, dict):
-            # Note that items have to be generated before altering the dict.
-            # In this case, iteritems might break during iteration.
-            items = json_root.items()
+    """
+    enhanced_record = None
+    if from_schema and '$schema' in record:
+        try:
+            ref_paths = compile_ref_paths(record['$schema'])
+        except SchemaNotFound:
+            pass
         else:
-            items = []
-
-        for key, value in items:
-            if (isinstance(json_root, dict) and isinstance(value, dict) and '$ref' in value):
-                # Append '_recid' and remove 'record' from the key name.
-                key_basename = key.replace('record', '').rstrip('_')
-                new_key = '{}_recid'.format(key_basename).lstrip('_')
-                json_root[new_key] = get_recid_from_ref(value)
-            elif (isinstance(json_root, dict) and isinstance(value, list) and
-                  key in list_ref_fields_translations):
-                new_list = [get_recid_from_ref(v) for v in value]
-                new_key = list_ref_fields_translations[key]
-                json_root[new_key] = new_list
-            else:
-                _recursive_find_refs(value)
-
-    _recursive_find_refs(record)
+            enhanced_record = _find_refs_on_paths(record, ref_paths)
+
+    if enhanced_record is None:
+        enhanced_record = _find_refs_recursively(record)
+
+    # The top level is updated in place, as it is the record itself.
+    if enhanced_record is not record:
+        record.update(enhanced_record)
 
 
 def populate_abstract_source_suggest(record):
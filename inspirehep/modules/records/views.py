@@ -32,6 +32,7 @@ from invenio_records_rest.views import pass_record
 
 from inspirehep.modules.search import LiteratureSearch
 from inspirehep.modules.search.search_factory import inspire_facets_factory
+from inspirehep.modules.search.utils import execute_facets_search
 from .serializers import json_literature_citations_v1_response, \
     json_literature_search_aggregations_ui_v1
 
@@ -115,7 +116,7 @@ class Facets(ContentNegotiatedMethodView):
         urlkwargs.update(qs_kwargs)
 
         # Execute search
-        search_result = search.execute()
+        search_result = execute_facets_search(search)
 
         return self.make_response(
             query_results=search_result,
@@ -24,6 +24,8 @@
 
 from __future__ import absolute_import, division, print_function
 
+from inspirehep.utils.cache import LRUCache
+
 from .views import blueprint
 
 
@@ -33,5 +35,6 @@ class InspireSearch(object):
             self.init_app(app)
 
     def init_app(self, app):
+        self.query_cache = LRUCache(app.config.get('SEARCH_QUERY_CACHE_SIZE', 0))
         app.register_blueprint(blueprint)
         app.extensions['inspire-search'] = self
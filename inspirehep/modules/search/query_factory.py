@@ -24,15 +24,47 @@
 
 from __future__ import absolute_import, division, print_function
 
+from copy import deepcopy
+
 from elasticsearch_dsl import Q
+from flask import current_app
 
 import inspire_query_parser
 
 
+def _get_query_cache():
+    return current_app.extensions['inspire-search'].query_cache
+
+
+def parse_query(query_string):
+    """Parse a query string into the dict of an Elastic Search DSL query.
+
+    The parsed queries are cached, keyed by the query string without its
+    leading and trailing whitespace, as the same queries are run over and
+    over again.
+
+    Args:
+        query_string (str): the query string.
+
+    Returns:
+        dict: the Elastic Search DSL query, which can be modified by the
+        caller.
+    """
+    query_string = query_string.strip()
+    cache = _get_query_cache()
+
+    query = cache.get(query_string)
+    if query is None:
+        query = inspire_query_parser.parse_query(query_string)
+        cache.set(query_string, query)
+
+    return deepcopy(query)
+
+
 def inspire_query_factory():
     """Create an Elastic Search DSL query instance using the generated Elastic Search query by the parser."""
 
     def inspire_query(query_string, search):
-        return Q(inspire_query_parser.parse_query(query_string))
+        return Q(parse_query(query_string))
 
     return inspire_query
@@ -25,6 +25,7 @@
 from __future__ import absolute_import, division, print_function
 
 import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 
 from flask import current_app, request
 
@@ -123,6 +124,78 @@ def inspire_filter_factory(search, urlkwargs, search_index):
     return search, urlkwargs
 
 
+def encode_cursor(sort_values):
+    """Encode the sort values of a hit into an opaque cursor.
+
+    Args:
+        sort_values (list): the ``sort`` of the last hit of a page.
+
+    Returns:
+        str: the cursor of the next page.
+    """
+    return urlsafe_b64encode(json.dumps(sort_values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor created by ``encode_cursor``.
+
+    Raises:
+        InvalidQueryRESTError: if the cursor is not valid.
+    """
+    try:
+        sort_values = json.loads(urlsafe_b64decode(str(cursor)).decode('utf-8'))
+    except (TypeError, ValueError):
+        raise InvalidQueryRESTError()
+
+    if not isinstance(sort_values, list):
+        raise InvalidQueryRESTError()
+
+    return sort_values
+
+
+def inspire_cursor_factory(search, urlkwargs, sortkwargs):
+    """Paginate with ``search_after`` when a ``cursor`` is passed.
+
+    The hits are sorted by the requested sort, then by ``control_number``
+    so that the order is total, and the page starts after the hit encoded
+    in the cursor, if not empty. Contrary to ``from``, the cost of a page
+    does not depend on how deep it is in the results.
+
+    The cursor of the next page is added to the links by the serializers,
+    see ``cursor_paginated``, which must wrap all the search serializers of
+    the endpoints using this factory.
+
+    Args:
+        search: Elastic search DSL search instance.
+        urlkwargs: the arguments of the links.
+        sortkwargs: the sort arguments of the links.
+
+    Returns: tuple with search and url arguments.
+
+    Raises:
+        InvalidQueryRESTError: if the cursor is not valid, or if it is passed
+            with a page other than the first one.
+    """
+    cursor = request.values.get('cursor')
+    if cursor is None:
+        return search, urlkwargs
+
+    if request.values.get('page', 1, type=int) != 1:
+        raise InvalidQueryRESTError()
+
+    sort = search._sort or ['_score']
+    search = search.sort(*(sort + [{'control_number': {'order': 'asc'}}]))
+    search = search.extra(**{'from': 0})
+    if cursor:
+        search = search.extra(search_after=decode_cursor(cursor))
+
+    for key, value in sortkwargs.items():
+        urlkwargs.add(key, value)
+    urlkwargs.add('cursor', cursor)
+
+    return search, urlkwargs
+
+
 def inspire_search_factory(self, search):
     """Parse query using Inspire-Query-Parser.
 
@@ -145,6 +218,7 @@ def inspire_search_factory(self, search):
     search_index = search._index[0]
     search, urlkwargs = inspire_filter_factory(search, urlkwargs, search_index)
     search, sortkwargs = default_sorter_factory(search, search_index)
+    search, urlkwargs = inspire_cursor_factory(search, urlkwargs, sortkwargs)
     search = select_source(search)
 
     urlkwargs.add('q', query_string)
@@ -22,10 +22,19 @@
 
 from __future__ import absolute_import, division, print_function
 
+import hashlib
+import json
+
+from elasticsearch_dsl.response import Response
 from flask import current_app, request
+from redis import RedisError
 from six import string_types
 from werkzeug.utils import import_string
 
+from invenio_cache import current_cache
+
+from inspirehep.modules.records.indexer import get_index_generation
+
 
 def get_facet_configuration(search_index):
     facet_name = request.values.get('facet_name')
@@ -40,3 +49,51 @@ def get_facet_configuration(search_index):
     if callable(facet):
         facet = facet()
     return facet
+
+
+def get_facets_cache_key(search):
+    """Get the key under which the facets of a search are cached.
+
+    The key is made of the body of the search, which contains the parsed
+    query, the filters and the aggregations, and of the generation of the
+    searched index, so that it changes when documents of the index change.
+    """
+    index = search._index[0]
+    body = json.dumps(search.to_dict(), sort_keys=True)
+    return 'search:facets:{}:{}:{}'.format(
+        index,
+        get_index_generation(index),
+        hashlib.sha1(body.encode('utf-8')).hexdigest(),
+    )
+
+
+def execute_facets_search(search):
+    """Execute a search for facets, or get its response from the cache.
+
+    The responses are cached for ``SEARCH_FACETS_CACHE_TIMEOUT`` seconds,
+    without their hits as only the aggregations are used. When Redis cannot
+    be reached, the search is executed without the cache.
+
+    Args:
+        search: Elastic search DSL search instance.
+
+    Returns:
+        Response: the response of the search.
+    """
+    try:
+        key = get_facets_cache_key(search)
+        response = current_cache.get(key)
+    except RedisError:
+        current_app.logger.exception('Cannot get the cached facets.')
+        return search.execute()
+
+    if response is None:
+        response = search.execute().to_dict()
+        response['hits']['hits'] = []
+        current_cache.set(
+            key,
+            response,
+            timeout=current_app.config['SEARCH_FACETS_CACHE_TIMEOUT'],
+        )
+
+    return Response(search, response)
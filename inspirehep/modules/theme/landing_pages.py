@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Cached data of the collection landing pages."""
+
+from __future__ import absolute_import, division, print_function
+
+from datetime import date
+
+from celery import shared_task
+from dateutil.relativedelta import relativedelta
+from flask import current_app
+
+from invenio_cache import current_cache
+
+from inspirehep.modules.search import (
+    AuthorsSearch,
+    ConferencesSearch,
+    DataSearch,
+    ExperimentsSearch,
+    InstitutionsSearch,
+    JournalsSearch,
+    LiteratureSearch
+)
+
+
+def _get_some_institutions():
+    some_institutions = InstitutionsSearch().query_from_iq(
+        ''
+    )[:250].execute()
+
+    return [hit['_source'] for hit in some_institutions.to_dict()['hits']['hits']]
+
+
+def _get_upcoming_conferences():
+    today = date.today()
+    in_six_months = today + relativedelta(months=+6)
+
+    upcoming_conferences = ConferencesSearch().query_from_iq(
+        'opening_date:{0}->{1}'.format(str(today), str(in_six_months))
+    ).sort(
+        {'opening_date': 'asc'}
+    )[1:100].execute()
+
+    return [hit['_source'] for hit in upcoming_conferences.to_dict()['hits']['hits']]
+
+
+LANDING_PAGES_DATA = {
+    'authors_count': lambda: AuthorsSearch().count(),
+    'conferences_count': lambda: ConferencesSearch().count(),
+    'data_count': lambda: DataSearch().count(),
+    'experiments_count': lambda: ExperimentsSearch().count(),
+    'institutions_count': lambda: InstitutionsSearch().count(),
+    'journals_count': lambda: JournalsSearch().count(),
+    'literature_count': lambda: LiteratureSearch().count(),
+    'some_institutions': _get_some_institutions,
+    'upcoming_conferences': _get_upcoming_conferences,
+}
+"""Functions computing each piece of data of the landing pages from ES."""
+
+
+def _get_cache_key(name):
+    return 'landing_pages::{}'.format(name)
+
+
+def refresh_landing_page_data(name):
+    """Compute a piece of data of the landing pages and cache it.
+
+    Args:
+        name (str): the name of the data, see ``LANDING_PAGES_DATA``.
+
+    Returns:
+        the data.
+    """
+    data = LANDING_PAGES_DATA[name]()
+    current_cache.set(
+        _get_cache_key(name),
+        data,
+        timeout=current_app.config['THEME_LANDING_PAGES_CACHE_TIMEOUT'],
+    )
+    return data
+
+
+def get_landing_page_data(name):
+    """Get a piece of data of the landing pages.
+
+    The data is served from the cache, which is kept warm by
+    ``refresh_landing_pages_data``, so that the landing pages do not query ES.
+    It is only computed when it is not in the cache yet.
+
+    Args:
+        name (str): the name of the data, see ``LANDING_PAGES_DATA``.
+
+    Returns:
+        the data.
+    """
+    data = current_cache.get(_get_cache_key(name))
+    if data is None:
+        data = refresh_landing_page_data(name)
+    return data
+
+
+@shared_task(ignore_result=True)
+def refresh_landing_pages_data():
+    """Refresh all the cached data of the landing pages."""
+    for name in LANDING_PAGES_DATA:
+        refresh_landing_page_data(name)
@@ -25,10 +25,9 @@
 from __future__ import absolute_import, division, print_function
 
 import logging
-from datetime import date, datetime
+from datetime import datetime
 
 from celery import shared_task
-from dateutil.relativedelta import relativedelta
 from flask import (
     Blueprint,
     abort,
@@ -54,13 +53,11 @@ from inspirehep.modules.pidstore.utils import (
 )
 from inspirehep.modules.search import (
     AuthorsSearch,
-    ConferencesSearch,
-    DataSearch,
     ExperimentsSearch,
     InstitutionsSearch,
-    JournalsSearch,
     LiteratureSearch
 )
+from inspirehep.modules.theme.landing_pages import get_landing_page_data
 from inspirehep.utils.citations import get_and_format_citations
 from inspirehep.utils.conferences import (
     render_conferences_contributions,
@@ -227,7 +224,7 @@ blueprint = Blueprint(
 def index():
     """View for literature collection landing page."""
     if current_app.config['INSPIRE_FULL_THEME']:
-        number_of_records = LiteratureSearch().count()
+        number_of_records = get_landing_page_data('literature_count')
 
         return render_template(
             'inspirehep_theme/search/collection_literature.html',
@@ -242,7 +239,7 @@ def index():
 @blueprint.route('/collection/authors', methods=['GET', ])
 def hepnames():
     """View for authors collection landing page."""
-    number_of_records = AuthorsSearch().count()
+    number_of_records = get_landing_page_data('authors_count')
 
     return render_template(
         'inspirehep_theme/search/collection_authors.html',
@@ -254,8 +251,8 @@ def hepnames():
 @blueprint.route('/conferences', methods=['GET', ])
 def conferences():
     """View for conferences collection landing page."""
-    number_of_records = ConferencesSearch().count()
-    upcoming_conferences = _get_upcoming_conferences()
+    number_of_records = get_landing_page_data('conferences_count')
+    upcoming_conferences = get_landing_page_data('upcoming_conferences')
 
     return render_template(
         'inspirehep_theme/search/collection_conferences.html',
@@ -275,8 +272,8 @@ def jobs():
 @blueprint.route('/institutions', methods=['GET', ])
 def institutions():
     """View for institutions collection landing page."""
-    number_of_records = InstitutionsSearch().count()
-    some_institutions = _get_some_institutions()
+    number_of_records = get_landing_page_data('institutions_count')
+    some_institutions = get_landing_page_data('some_institutions')
 
     return render_template(
         'inspirehep_theme/search/collection_institutions.html',
@@ -289,7 +286,7 @@ def institutions():
 @blueprint.route('/experiments', methods=['GET', ])
 def experiments():
     """View for experiments collection landing page."""
-    number_of_records = ExperimentsSearch().count()
+    number_of_records = get_landing_page_data('experiments_count')
 
     return render_template(
         'inspirehep_theme/search/collection_experiments.html',
@@ -301,7 +298,7 @@ def experiments():
 @blueprint.route('/journals', methods=['GET', ])
 def journals():
     """View for journals collection landing page."""
-    number_of_records = JournalsSearch().count()
+    number_of_records = get_landing_page_data('journals_count')
 
     return render_template(
         'inspirehep_theme/search/collection_journals.html',
@@ -313,7 +310,7 @@ def journals():
 @blueprint.route('/data', methods=['GET', ])
 def data():
     """View for data collection landing page."""
-    number_of_records = DataSearch().count()
+    number_of_records = get_landing_page_data('data_count')
 
     return render_template(
         'inspirehep_theme/search/collection_data.html',
@@ -893,28 +890,3 @@ def login_success():
             }
         }
     )
-
-
-#
-# Helpers
-#
-
-def _get_some_institutions():
-    some_institutions = InstitutionsSearch().query_from_iq(
-        ''
-    )[:250].execute()
-
-    return [hit['_source'] for hit in some_institutions.to_dict()['hits']['hits']]
-
-
-def _get_upcoming_conferences():
-    today = date.today()
-    in_six_months = today + relativedelta(months=+6)
-
-    upcoming_conferences = ConferencesSearch().query_from_iq(
-        'opening_date:{0}->{1}'.format(str(today), str(in_six_months))
-    ).sort(
-        {'opening_date': 'asc'}
-    )[1:100].execute()
-
-    return [hit['_source'] for hit in upcoming_conferences.to_dict()['hits']['hits']]
@@ -48,7 +48,6 @@ from invenio_workflows.errors import WorkflowsError
 from invenio_records.models import RecordMetadata
 from inspire_schemas.builders import LiteratureBuilder
 from inspire_schemas.readers import LiteratureReader
-from inspire_schemas.utils import validate
 from inspire_utils.record import get_value
 from inspire_utils.dedupers import dedupe_list
 
@@ -70,6 +69,7 @@ from inspirehep.modules.workflows.utils import (
     with_debug_logging,
 )
 from inspirehep.utils.normalizers import normalize_journal_title
+from inspirehep.utils.schema import validate
 from inspirehep.utils.url import is_pdf_link
 
 EXPERIMENTAL_ARXIV_CATEGORIES = [
@@ -325,7 +325,7 @@ def populate_journal_coverage(obj, eng):
         None
 
     """
-    journals = replace_refs(get_value(obj.data, 'publication_info.journal_record'), 'db')
+    journals = replace_refs(get_value(obj.data, 'publication_info.journal_record'), 'db', prefetch=True)
     if not journals:
         return
 
@@ -580,7 +580,7 @@ def set_refereed_and_fix_document_type(obj, eng):
         None
 
     """
-    journals = replace_refs(get_value(obj.data, 'publication_info.journal_record'), 'db')
+    journals = replace_refs(get_value(obj.data, 'publication_info.journal_record'), 'db', prefetch=True)
     if not journals:
         return
 
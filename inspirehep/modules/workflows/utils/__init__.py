@@ -39,10 +39,9 @@ from timeout_decorator import timeout, TimeoutError
 from fs.opener import fsopen
 from invenio_db import db
 
-from inspire_schemas.utils import \
-    get_validation_errors as _get_validation_errors
 from inspire_utils.logging import getStackTraceLogger
 
+from inspirehep.utils.schema import get_validation_errors as _get_validation_errors
 from inspirehep.utils.url import retrieve_uri
 from inspirehep.modules.workflows.models import (
     WorkflowsAudit,
@@ -40,7 +40,6 @@ from flask import (
 )
 from flask.views import MethodView
 from flask_login import current_user
-from inspire_schemas.api import validate
 from inspire_utils.urls import ensure_scheme
 from invenio_oauth2server.provider import oauth2
 from invenio_db import db
@@ -71,6 +70,7 @@ from inspirehep.modules.workflows.utils import (
     get_validation_errors,
 )
 from inspirehep.utils.record_getter import get_db_record, RecordGetterError
+from inspirehep.utils.schema import validate
 from inspirehep.utils.tickets import get_rt_link_for_ticket
 
 callback_blueprint = Blueprint(
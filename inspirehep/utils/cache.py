@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Caching helpers."""
+
+from __future__ import absolute_import, division, print_function
+
+import threading
+import time
+from collections import OrderedDict
+
+import flask
+from flask import current_app
+from redis import StrictRedis
+
+
+def get_redis_client():
+    """Get the client of the Redis of ``CACHE_REDIS_URL``.
+
+    The client is created once per application context.
+    """
+    redis = getattr(flask.g, 'redis_client', None)
+    if redis is None:
+        redis = StrictRedis.from_url(current_app.config.get('CACHE_REDIS_URL'))
+        flask.g.redis_client = redis
+    return redis
+
+
+class LRUCache(object):
+    """Bounded cache evicting the least recently used entries.
+
+    Entries can also expire after ``ttl`` seconds, for values which can be
+    changed by other processes without this one being notified. The cache
+    is thread-safe, and it counts its hits and misses so that its hit rate
+    can be monitored.
+
+    Args:
+        maxsize (int): the maximum number of entries. With ``0``, nothing
+            is cached.
+        ttl (Optional[float]): the number of seconds after which an entry
+            expires, or ``None`` for entries which never expire.
+    """
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the value of ``key``, or ``default`` if it is not cached."""
+        with self._lock:
+            try:
+                expires, value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires is not None and expires < time.time():
+                self.misses += 1
+                return default
+
+            self._entries[key] = (expires, value)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Cache the value of ``key``, evicting the oldest entries if needed."""
+        if not self.maxsize:
+            return
+
+        expires = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove ``key`` from the cache, if it is there."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all the entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return the counters of the cache.
+
+        Returns:
+            dict: the number of hits and misses, the hit rate and the number
+            of entries of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+        }
+
+
+class _BoundedDict(OrderedDict):
+    """Dict dropping its oldest entries when it has more than ``maxsize``."""
+
+    def __init__(self, maxsize):
+        super(_BoundedDict, self).__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value):
+        super(_BoundedDict, self).__setitem__(key, value)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+def get_request_cache(name, maxsize=None):
+    """Return a cache living as long as the current application context.
+
+    The cache is a dict, shared by everything running in the same request or
+    Celery task and dropped at its end, so that its entries never need to be
+    invalidated. As an application context can live long, e.g. in a CLI
+    command, the cache can be bounded, in which case its oldest entries are
+    dropped.
+
+    Args:
+        name (str): the name of the cache.
+        maxsize (Optional[int]): the maximum number of entries of the cache,
+            or ``None`` for an unbounded cache. It is only taken into
+            account when the cache is created.
+
+    Returns:
+        dict: the cache.
+    """
+    caches = getattr(flask.g, 'inspire_request_caches', None)
+    if caches is None:
+        caches = {}
+        flask.g.inspire_request_caches = caches
+    if name not in caches:
+        caches[name] = {} if maxsize is None else _BoundedDict(maxsize)
+    return caches[name]
@@ -25,13 +25,26 @@
 from __future__ import absolute_import, division, print_function
 
 import time_execution
+from flask_sqlalchemy import models_committed
 from fqn_decorators.decorators import get_fqn
 from inspire_service_orcid import hooks as inspire_service_orcid_hooks
+from invenio_pidstore.models import PersistentIdentifier
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 from rt import AuthorizationError
 from time_execution.backends.threaded import ThreadedBackend
 from time_execution.backends.elasticsearch import ElasticsearchBackend
 
+from .cache import LRUCache
+from .record_getter import (
+    PID_TRACKED_ATTRIBUTES,
+    flag_added_pid,
+    flag_changed_pid,
+    forget_uncommitted_pids,
+    invalidate_pid_after_flush,
+    invalidate_pids_after_commit,
+)
 from .tickets import InspireRt
 
 
@@ -48,6 +61,7 @@ class INSPIREUtils(object):
         """Initialize the application."""
         self.rt_instance = self.create_rt_instance(app)
         self.configure_appmetrics(app)
+        self.configure_pid_cache(app)
         app.extensions["inspire-utils"] = self
 
     def create_rt_instance(self, app):
@@ -73,6 +87,25 @@ class INSPIREUtils(object):
                     "RT login credentials in the app.config are invalid")
             return tracker
 
+    def configure_pid_cache(self, app):
+        """Create the PID cache of ``record_getter`` and its invalidation."""
+        self.pid_cache = LRUCache(
+            app.config.get('RECORD_GETTER_PID_CACHE_SIZE', 0),
+            ttl=app.config.get('RECORD_GETTER_PID_CACHE_TTL'),
+        )
+        for identifier in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(PersistentIdentifier, identifier, invalidate_pid_after_flush):
+                event.listen(PersistentIdentifier, identifier, invalidate_pid_after_flush)
+        for attribute in PID_TRACKED_ATTRIBUTES:
+            attribute = getattr(PersistentIdentifier, attribute)
+            if not event.contains(attribute, 'set', flag_changed_pid):
+                event.listen(attribute, 'set', flag_changed_pid)
+        if not event.contains(Session, 'before_attach', flag_added_pid):
+            event.listen(Session, 'before_attach', flag_added_pid)
+        if not event.contains(Session, 'after_transaction_end', forget_uncommitted_pids):
+            event.listen(Session, 'after_transaction_end', forget_uncommitted_pids)
+        models_committed.connect(invalidate_pids_after_commit)
+
     def configure_appmetrics(self, app):
         if not app.config.get('FEATURE_FLAG_ENABLE_APPMETRICS'):
             return
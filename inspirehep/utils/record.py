@@ -25,10 +25,14 @@ from __future__ import absolute_import, division, print_function
 from invenio_indexer.api import current_record_to_index, RecordIndexer
 
 
-def create_index_op(record, version_type='external_gte'):
+def create_index_op(record, version_type='external_gte', citations_count=None, index=None):
+    from inspirehep.modules.records.indexer import FINGERPRINT_FIELD, compute_fingerprint
     from inspirehep.modules.records.receivers import enhance_before_index
-    index, doc_type = current_record_to_index(record)
-    enhance_before_index(record)
+    record_index, doc_type = current_record_to_index(record)
+    index = index or record_index
+    enhance_before_index(record, citations_count=citations_count)
+    source = RecordIndexer._prepare_record(record, index, doc_type)
+    source[FINGERPRINT_FIELD] = compute_fingerprint(source)
 
     return {
         '_op_type': 'index',
@@ -37,5 +41,5 @@ def create_index_op(record, version_type='external_gte'):
         '_id': str(record.id),
         '_version': record.revision_id,
         '_version_type': version_type,
-        '_source': RecordIndexer._prepare_record(record, index, doc_type),
+        '_source': source,
     }
@@ -25,17 +25,31 @@
 from __future__ import absolute_import, division, print_function
 
 from functools import wraps
+from itertools import islice
 
 from flask import current_app
-from sqlalchemy import tuple_
+from sqlalchemy import func, inspect, literal_column, tuple_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import object_session
 from werkzeug.utils import import_string
 
 from inspire_dojson.utils import get_recid_from_ref
 from inspire_utils.record import get_value
+from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier
 from invenio_records.models import RecordMetadata
+from invenio_search import current_search_client as es
 
 from inspirehep.modules.pidstore.utils import get_endpoint_from_pid_type
+from inspirehep.utils.cache import get_redis_client
+
+PID_CACHE_REDIS_PREFIX = 'record_getter:'
+
+UNCOMMITTED_PIDS_KEY = 'inspire_uncommitted_pids'
+"""Key in ``session.info`` set when PIDs changed in the current transaction."""
+
+PID_TRACKED_ATTRIBUTES = ('pid_type', 'pid_value', 'status', 'object_type', 'object_uuid')
+"""Attributes of ``PersistentIdentifier`` whose changes are tracked, see ``flag_changed_pid``."""
 
 
 class RecordGetterError(Exception):
@@ -66,15 +80,201 @@ def raise_record_getter_error_and_log(f):
     return wrapper
 
 
+def _get_pid_cache():
+    return current_app.extensions['inspire-utils'].pid_cache
+
+
+def _get_pid_cache_redis_client():
+    if not current_app.config.get('RECORD_GETTER_PID_CACHE_REDIS'):
+        return None
+
+    return get_redis_client()
+
+
+def _has_uncommitted_pids():
+    """Whether the session has changes to PIDs which are not committed yet.
+
+    The session is flagged by the listeners on PIDs, see ``flag_added_pid``,
+    ``flag_changed_pid`` and ``invalidate_pid_after_flush``.
+    """
+    return bool(db.session.info.get(UNCOMMITTED_PIDS_KEY))
+
+
+def _flag_uncommitted_pids(session):
+    if session is not None:
+        session.info[UNCOMMITTED_PIDS_KEY] = True
+
+
+def _get_cached_pid_value(key, fetch):
+    """Get a value from the PID caches, or from ``fetch`` and cache it.
+
+    The value is looked up in the cache of this process, then in Redis if
+    ``RECORD_GETTER_PID_CACHE_REDIS`` is set. ``None`` is never cached.
+
+    The caches are not used while the session has uncommitted changes to
+    PIDs, as the value would then come from a state of the DB which might be
+    rolled back.
+    """
+    if _has_uncommitted_pids():
+        return fetch()
+
+    cache = _get_pid_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    redis = _get_pid_cache_redis_client()
+    if redis is not None:
+        value = redis.get(PID_CACHE_REDIS_PREFIX + key)
+        if value is not None:
+            value = value.decode('utf-8')
+
+    if value is None:
+        value = fetch()
+        if value is None:
+            return None
+        if redis is not None:
+            redis.set(
+                PID_CACHE_REDIS_PREFIX + key,
+                value,
+                ex=current_app.config['RECORD_GETTER_PID_CACHE_REDIS_TTL'],
+            )
+
+    cache.set(key, value)
+    return value
+
+
+def get_pid_object_uuid(pid_type, pid_value):
+    """Get the UUID of the object of a PID.
+
+    The UUIDs are cached, so that most lookups do not query the DB. They are
+    removed from the caches when the PID is created, updated (e.g. redirected)
+    or deleted, see ``invalidate_pid_cache``.
+
+    Args:
+        pid_type (str): the type of the PID.
+        pid_value (Union[str, int]): the value of the PID.
+
+    Returns:
+        Optional[str]: the UUID of the object, or ``None`` if the PID has no
+        object assigned.
+
+    Raises:
+        PIDDoesNotExistError: if the PID does not exist.
+    """
+    def _fetch():
+        object_uuid = PersistentIdentifier.get(pid_type, pid_value).object_uuid
+        return str(object_uuid) if object_uuid else None
+
+    return _get_cached_pid_value('pid:{}:{}'.format(pid_type, pid_value), _fetch)
+
+
+def get_pid_type_from_uuid(uuid):
+    """Get the PID type of the record with the given UUID, see ``get_pid_object_uuid``.
+
+    Raises:
+        NoResultFound: if the record has no PID.
+        MultipleResultsFound: if the record has several PIDs.
+    """
+    def _fetch():
+        return PersistentIdentifier.query.filter_by(object_uuid=uuid).one().pid_type
+
+    return _get_cached_pid_value('uuid:{}'.format(uuid), _fetch)
+
+
+def invalidate_pid_cache(pid_type, pid_value, object_uuids=()):
+    """Remove a PID, and the UUIDs of its objects, from the PID caches.
+
+    Args:
+        pid_type (str): the type of the PID.
+        pid_value (Union[str, int]): the value of the PID.
+        object_uuids (Iterable[str]): the UUIDs of the objects the PID
+            pointed to.
+    """
+    keys = ['pid:{}:{}'.format(pid_type, pid_value)]
+    keys.extend('uuid:{}'.format(uuid) for uuid in object_uuids if uuid)
+
+    cache = _get_pid_cache()
+    for key in keys:
+        cache.delete(key)
+
+    redis = _get_pid_cache_redis_client()
+    if redis is not None:
+        redis.delete(*[PID_CACHE_REDIS_PREFIX + key for key in keys])
+
+
+def clear_pid_cache():
+    """Empty the PID cache of this process.
+
+    The entries in Redis are left to expire.
+    """
+    _get_pid_cache().clear()
+
+
+def invalidate_pid_after_flush(mapper, connection, target):
+    """Remove a PID from the caches when it is inserted, updated or deleted.
+
+    The previous object of the PID is also removed when it changed, which is
+    the case when the PID is redirected. The session is flagged, so that the
+    uncommitted state of the PID is not cached until the end of the
+    transaction.
+    """
+    object_uuids = [target.object_uuid]
+    object_uuids.extend(inspect(target).attrs.object_uuid.history.deleted)
+    invalidate_pid_cache(target.pid_type, target.pid_value, object_uuids)
+
+    _flag_uncommitted_pids(object_session(target))
+
+
+def flag_added_pid(session, instance):
+    """Flag the session when a PID is added to it, before it is flushed."""
+    if isinstance(instance, PersistentIdentifier):
+        _flag_uncommitted_pids(session)
+
+
+def flag_changed_pid(target, value, oldvalue, initiator):
+    """Flag the session of a PID when one of its attributes is set, before it is flushed.
+
+    The PIDs which are not in a session yet are flagged when added to one,
+    see ``flag_added_pid``.
+    """
+    _flag_uncommitted_pids(object_session(target))
+
+
+def invalidate_pids_after_commit(sender, changes):
+    """Remove the committed PIDs from the caches.
+
+    They are removed again after the commit, as their previous state might
+    have been cached again in the meantime.
+    """
+    for model_instance, change in changes:
+        if isinstance(model_instance, PersistentIdentifier):
+            invalidate_pid_cache(
+                model_instance.pid_type,
+                model_instance.pid_value,
+                [model_instance.object_uuid],
+            )
+
+
+def forget_uncommitted_pids(session, transaction):
+    """Forget that PIDs were flushed in a transaction when it is over.
+
+    Only the outermost transaction is taken into account, as the changes of
+    a nested one are not committed before the outermost one is.
+    """
+    if transaction.parent is None:
+        session.info.pop(UNCOMMITTED_PIDS_KEY, None)
+
+
 @raise_record_getter_error_and_log
 def get_es_record(pid_type, recid, **kwargs):
-    pid = PersistentIdentifier.get(pid_type, recid)
+    uuid = get_pid_object_uuid(pid_type, recid)
 
     endpoint = get_endpoint_from_pid_type(pid_type)
     search_conf = current_app.config['RECORDS_REST_ENDPOINTS'][endpoint]
     search_class = import_string(search_conf['search_class'])()
 
-    return search_class.get_source(pid.object_uuid, **kwargs)
+    return search_class.get_source(uuid, **kwargs)
 
 
 def get_es_records(pid_type, recids, **kwargs):
@@ -93,11 +293,117 @@ def get_es_records(pid_type, recids, **kwargs):
     return search_class.mget(uuids, **kwargs)
 
 
+def get_es_records_by_pids(pids, **kwargs):
+    """Get records of any PID type from ElasticSearch.
+
+    The UUIDs of all the records are found with a single query to the DB,
+    and the records are then fetched with a single ``mget``.
+
+    Args:
+        pids (Iterable[Tuple[str, Union[str, int]]): a list of (pid_type, pid_value) tuples.
+
+    Returns:
+        dict: the records found in ElasticSearch, keyed by their
+        (pid_type, pid_value) tuple, with ``pid_value`` as a string.
+    """
+    pids = [(pid_type, str(pid_value)) for (pid_type, pid_value) in pids]
+    if not pids:
+        return {}
+
+    query = PersistentIdentifier.query.with_entities(
+        PersistentIdentifier.object_uuid,
+        PersistentIdentifier.pid_type,
+        PersistentIdentifier.pid_value,
+    ).filter(
+        PersistentIdentifier.object_type == 'rec',  # So it can use the 'idx_object' index
+        tuple_(PersistentIdentifier.pid_type, PersistentIdentifier.pid_value).in_(pids)
+    )
+
+    pids_by_uuid = {}
+    docs = []
+    for uuid, pid_type, pid_value in query:
+        uuid = str(uuid)
+        if uuid not in pids_by_uuid:
+            endpoint = get_endpoint_from_pid_type(pid_type)
+            search_conf = current_app.config['RECORDS_REST_ENDPOINTS'][endpoint]
+            search_class = import_string(search_conf['search_class'])
+            docs.append({
+                '_index': search_class.Meta.index,
+                '_type': search_class.Meta.doc_types,
+                '_id': uuid,
+            })
+        pids_by_uuid.setdefault(uuid, []).append((pid_type, pid_value))
+
+    if not docs:
+        return {}
+
+    documents = es.mget(body={'docs': docs}, **kwargs)['docs']
+    return {
+        pid: document['_source']
+        for document in documents if document.get('found')
+        for pid in pids_by_uuid[document['_id']]
+    }
+
+
+def get_es_records_by_control_numbers(pid_type, control_numbers, _source=None,
+                                      batch_size=1000, **kwargs):
+    """Get records of a PID type from ElasticSearch by their control numbers.
+
+    The records are found with a ``terms`` query on ``control_number``, so
+    that the DB is not queried at all. The control numbers are queried in
+    batches of ``batch_size``, and the records of each batch are yielded
+    before the next one is queried.
+
+    Args:
+        pid_type (str): the PID type of the records.
+        control_numbers (Iterable[Union[str, int]]): the control numbers of
+            the records.
+        _source (Optional[List[str]]): if passed, only these fields of the
+            records are returned, along with ``control_number``.
+        batch_size (int): the number of control numbers in each query.
+
+    Yields:
+        Optional[dict]: the record of each control number, in the order of
+        the input, or ``None`` when it is not found.
+    """
+    endpoint = get_endpoint_from_pid_type(pid_type)
+    search_conf = current_app.config['RECORDS_REST_ENDPOINTS'][endpoint]
+    search_class = import_string(search_conf['search_class'])
+    if _source is not None:
+        _source = sorted(set(_source) | {'control_number'})
+
+    control_numbers = iter(control_numbers)
+    while True:
+        batch = [int(control_number) for control_number in islice(control_numbers, batch_size)]
+        if not batch:
+            return
+
+        body = {
+            'query': {'terms': {'control_number': batch}},
+            'size': len(batch),
+        }
+        if _source is not None:
+            body['_source'] = _source
+
+        results = es.search(
+            index=search_class.Meta.index,
+            doc_type=search_class.Meta.doc_types,
+            body=body,
+            **kwargs
+        )
+        records = {
+            hit['_source']['control_number']: hit['_source']
+            for hit in results['hits']['hits']
+        }
+        for control_number in batch:
+            yield records.get(control_number)
+
+
 @raise_record_getter_error_and_log
 def get_es_record_by_uuid(uuid):
-    pid = PersistentIdentifier.query.filter_by(object_uuid=uuid).one()
+    pid_type = get_pid_type_from_uuid(uuid)
 
-    endpoint = get_endpoint_from_pid_type(pid.pid_type)
+    endpoint = get_endpoint_from_pid_type(pid_type)
     search_conf = current_app.config['RECORDS_REST_ENDPOINTS'][endpoint]
     search_class = import_string(search_conf['search_class'])()
 
@@ -107,15 +413,16 @@ def get_es_record_by_uuid(uuid):
 @raise_record_getter_error_and_log
 def get_db_record(pid_type, recid):
     from inspirehep.modules.records.api import InspireRecord
-    pid = PersistentIdentifier.get(pid_type, recid)
-    return InspireRecord.get_record(pid.object_uuid)
+    return InspireRecord.get_record(get_pid_object_uuid(pid_type, recid))
 
 
-def get_db_records(pids):
+def get_db_records(pids, paths=None):
     """Get an iterator on record metadata from the DB.
 
     Args:
         pids (Iterable[Tuple[str, Union[str, int]]): a list of (pid_type, pid_value) tuples.
+        paths (Optional[List[str]]): if passed, only these fields of the
+            records are read, see ``get_db_records_fields``.
 
     Yields:
         dict: metadata of a record found in the database.
@@ -129,15 +436,128 @@ def get_db_records(pids):
     if not pids:
         return
 
-    query = RecordMetadata.query.join(
+    query = db.session.query(
+        _get_json_projection(paths) if paths else RecordMetadata.json
+    ).select_from(
+        RecordMetadata
+    ).join(
         PersistentIdentifier, RecordMetadata.id == PersistentIdentifier.object_uuid
     ).filter(
         PersistentIdentifier.object_type == 'rec',  # So it can use the 'idx_object' index
         tuple_(PersistentIdentifier.pid_type, PersistentIdentifier.pid_value).in_(pids)
     )
 
-    for record in query.yield_per(100):
-        yield record.json
+    for json, in query.yield_per(100):
+        yield json
+
+
+def _get_paths_tree(paths):
+    tree = {}
+    for path in paths:
+        node = tree
+        for key in path.split('.'):
+            node = node.setdefault(key, {})
+    return tree
+
+
+def _get_object_projection(expression, tree, depth):
+    fields = []
+    for key, subtree in sorted(tree.items()):
+        value = "{}->'{}'".format(expression, key.replace("'", "''"))
+        if subtree:
+            element = 'e{}'.format(depth)
+            value = (
+                "CASE jsonb_typeof({value}) "
+                "WHEN 'array' THEN (SELECT jsonb_agg({element_projection} ORDER BY {element}.n) "
+                "FROM jsonb_array_elements({value}) WITH ORDINALITY AS {element}(value, n)) "
+                "WHEN 'object' THEN {value_projection} END"
+            ).format(
+                value=value,
+                element=element,
+                element_projection=_get_object_projection(
+                    '{}.value'.format(element), subtree, depth + 1),
+                value_projection=_get_object_projection(value, subtree, depth + 1),
+            )
+        fields.append("'{}', {}".format(key.replace("'", "''"), value))
+
+    return 'jsonb_build_object({})'.format(', '.join(fields))
+
+
+def _get_json_projection(paths):
+    """Get the SQL expression of the record JSON restricted to some fields.
+
+    The fields are given as paths like ``authors.full_name``, in which a key
+    applies to all the elements of an array. Missing fields are left out,
+    rather than set to ``null``.
+    """
+    column = 'CAST({}.json AS JSONB)'.format(RecordMetadata.__tablename__)
+    sql = 'jsonb_strip_nulls({})'.format(
+        _get_object_projection(column, _get_paths_tree(paths), 0))
+    return type_coerce(literal_column(sql), JSONB)
+
+
+def get_db_records_fields(paths, criteria=(), id_range=None, batch_size=1000):
+    """Get an iterator on some fields of the records in the DB.
+
+    Only the requested fields are read from the JSON of the records, by the
+    DB, which avoids transferring whole records when a few fields are
+    needed. The records are streamed with a server-side cursor.
+
+    Args:
+        paths (List[str]): the paths of the fields to read, like
+            ``authors.full_name``, in which a key applies to all the
+            elements of an array.
+        criteria (Iterable): SQLAlchemy filters on ``RecordMetadata``.
+        id_range (Optional[Tuple[Optional[str], Optional[str]]]): if passed,
+            only the records whose UUID is between its lower bound, included,
+            and upper bound, excluded, are read. ``None`` means no bound.
+            See ``get_record_id_ranges``.
+        batch_size (int): the number of records fetched from the cursor at
+            once.
+
+    Yields:
+        dict: the requested fields of a record, without the missing ones.
+    """
+    query = db.session.query(_get_json_projection(paths)).select_from(
+        RecordMetadata
+    ).filter(*criteria)
+    if id_range is not None:
+        lower, upper = id_range
+        if lower is not None:
+            query = query.filter(RecordMetadata.id >= lower)
+        if upper is not None:
+            query = query.filter(RecordMetadata.id < upper)
+
+    for json, in query.yield_per(batch_size):
+        yield json
+
+
+def get_record_id_ranges(parts, criteria=()):
+    """Split the records into ranges of UUIDs of about the same size.
+
+    The ranges can be read by different workers with
+    ``get_db_records_fields``.
+
+    Args:
+        parts (int): the number of ranges.
+        criteria (Iterable): SQLAlchemy filters on ``RecordMetadata``.
+
+    Returns:
+        List[Tuple[Optional[str], Optional[str]]]: the lower and upper bounds
+        of each range, with ``None`` for no bound.
+    """
+    bucket = func.ntile(parts).over(order_by=RecordMetadata.id).label('bucket')
+    buckets = db.session.query(RecordMetadata.id, bucket).filter(*criteria).subquery()
+    lower_bounds = [
+        str(lower_bound) for lower_bound, in db.session.query(
+            func.min(buckets.c.id)
+        ).group_by(buckets.c.bucket).order_by(func.min(buckets.c.id))
+    ]
+    if not lower_bounds:
+        return [(None, None)]
+
+    upper_bounds = lower_bounds[1:] + [None]
+    return list(zip([None] + lower_bounds[1:], upper_bounds))
 
 
 def get_conference_record(record, default=None):
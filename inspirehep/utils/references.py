@@ -32,7 +32,7 @@ from inspire_utils.dedupers import dedupe_list_of_dicts
 from inspire_utils.record import get_value
 
 from inspirehep.utils.jinja2 import render_template_to_string
-from inspirehep.utils.record_getter import get_es_records
+from inspirehep.utils.record_getter import get_es_records_by_control_numbers
 from inspirehep.utils.url import retrieve_uri
 
 
@@ -44,13 +44,9 @@ def get_and_format_references(record):
     out = []
     references = record.get('references')
     if references:
-        reference_recids = [
-            str(ref['recid']) for ref in references if ref.get('recid')
-        ]
-
-        resolved_references = get_es_records(
+        resolved_references = get_es_records_by_control_numbers(
             'lit',
-            reference_recids,
+            [ref['recid'] for ref in references if ref.get('recid')],
             _source=[
                 'authors',
                 'citation_count',
@@ -63,15 +59,12 @@ def get_and_format_references(record):
             ]
         )
 
-        # Create mapping to keep reference order
-        recid_to_reference = {
-            ref['control_number']: ref for ref in resolved_references
-        }
         for reference in references:
             row = []
-            ref_record = recid_to_reference.get(
-                reference.get('recid'), {}
-            )
+            # The resolved references come in the order of the references.
+            ref_record = {}
+            if reference.get('recid'):
+                ref_record = next(resolved_references) or {}
             if 'reference' in reference:
                 reference.update(reference['reference'])
                 del reference['reference']
@@ -23,6 +23,23 @@
 from __future__ import absolute_import, division, print_function
 
 from flask import url_for
+from jsonschema import Draft4Validator
+from six import string_types
+from six.moves.urllib.parse import urlsplit
+
+from inspire_schemas.errors import SchemaKeyNotFound
+from inspire_schemas.utils import (
+    LocalRefResolver,
+    get_validation_errors as _get_validation_errors,
+    inspire_format_checker,
+    load_schema,
+    validate as _validate,
+)
+
+try:
+    from functools import lru_cache
+except ImportError:
+    from functools32 import lru_cache
 
 
 def ensure_valid_schema(record):
@@ -37,3 +54,71 @@ def ensure_valid_schema(record):
             schema_path="records/{0}".format(record['$schema']),
             _external=True,
         )
+
+
+@lru_cache(maxsize=32)
+def get_validator(schema):
+    """Return the validator of a schema, created once per process.
+
+    The validator uses the resolved version of the schema, so that no
+    ``$ref`` has to be resolved while validating, and it is not checked
+    against the metaschema every time like ``jsonschema.validate`` does.
+
+    Args:
+        schema (str): the name, path or URL of the schema, like ``hep``
+            or ``http://localhost:5000/schemas/records/hep.json``.
+
+    Returns:
+        jsonschema.Draft4Validator: the validator.
+
+    Raises:
+        SchemaNotFound: if the schema was not found.
+    """
+    resolved_schema = load_schema(schema, resolved=True)
+    return Draft4Validator(
+        resolved_schema,
+        resolver=LocalRefResolver.from_schema(resolved_schema),
+        format_checker=inspire_format_checker,
+    )
+
+
+def _get_validator_for_record(data, schema):
+    if schema is None:
+        if '$schema' not in data:
+            raise SchemaKeyNotFound(data=data)
+        schema = data['$schema']
+
+    return get_validator(urlsplit(schema).path)
+
+
+def validate(data, schema=None):
+    """Validate a record, with the same arguments as ``inspire_schemas.utils.validate``.
+
+    When the schema is given by name, or taken from the ``$schema`` of the
+    record, a validator cached by ``get_validator`` is used.
+
+    Raises:
+        SchemaNotFound: if the given schema was not found.
+        SchemaKeyNotFound: if ``schema`` is ``None`` and no ``$schema`` key was
+            found in ``data``.
+        jsonschema.ValidationError: if the data is invalid.
+    """
+    if schema is not None and not isinstance(schema, string_types):
+        return _validate(data, schema)
+
+    _get_validator_for_record(data, schema).validate(data)
+
+
+def get_validation_errors(data, schema=None):
+    """Get the validation errors of a record, like ``inspire_schemas.utils.get_validation_errors``.
+
+    When the schema is given by name, or taken from the ``$schema`` of the
+    record, a validator cached by ``get_validator`` is used.
+
+    Yields:
+        jsonschema.exceptions.ValidationError: validation errors.
+    """
+    if schema is not None and not isinstance(schema, string_types):
+        return _get_validation_errors(data, schema)
+
+    return _get_validator_for_record(data, schema).iter_errors(data)
@@ -22,6 +22,8 @@
 
 from __future__ import absolute_import, division, print_function
 
+import numpy as np
+
 
 def calculate_h_index(citations):
     """
@@ -59,3 +61,89 @@ def calculate_i10_index(citations):
     :return: i10-index of the dictionary of citations.
     """
     return len([_ for _, count in citations.items() if count >= 10])
+
+
+def calculate_h_index_from_histogram(histogram):
+    """
+    Calculate the h-index from a histogram of citation counts.
+
+    :param histogram: a dictionary in the format {citation_count: number of
+        papers with this citation count}, such as the buckets of an ES
+        histogram aggregation.
+    :return: h-index of the histogram.
+    """
+    h_index = 0
+    papers = 0
+    for citation_count in sorted(histogram, reverse=True):
+        papers += histogram[citation_count]
+        h_index = max(h_index, min(int(citation_count), papers))
+
+    return h_index
+
+
+def calculate_i10_index_from_histogram(histogram):
+    """
+    Calculate the i10-index from a histogram of citation counts.
+
+    :param histogram: a dictionary in the format {citation_count: number of
+        papers with this citation count}.
+    :return: i10-index of the histogram.
+    """
+    return sum(papers for citation_count, papers in histogram.items() if citation_count >= 10)
+
+
+def calculate_authors_metrics(authors, papers, citation_counts):
+    """
+    Calculate the metrics of many authors at once.
+
+    The arrays describe the papers of all the authors, one element per
+    (author, paper) pair; duplicated pairs are counted once. The pairs are
+    then sorted by author and decreasing citation count, so that the h-index
+    of an author is the number of its papers whose citation count is at
+    least their rank.
+
+    :param authors: array of the recids of the authors.
+    :param papers: array of the recids of the papers, aligned with ``authors``.
+    :param citation_counts: array of the citation counts of the papers,
+        aligned with ``authors``.
+    :return: the sorted array of the distinct authors, and a dictionary
+        with the ``citations``, ``publications``, ``hindex`` and
+        ``i10index`` arrays, aligned with it.
+    """
+    authors = np.asarray(authors, dtype=np.int64)
+    papers = np.asarray(papers, dtype=np.int64)
+    citation_counts = np.asarray(citation_counts, dtype=np.int64)
+
+    order = np.lexsort((papers, authors))
+    authors = authors[order]
+    papers = papers[order]
+    citation_counts = citation_counts[order]
+
+    distinct = np.ones(len(authors), dtype=bool)
+    distinct[1:] = (authors[1:] != authors[:-1]) | (papers[1:] != papers[:-1])
+    authors = authors[distinct]
+    citation_counts = citation_counts[distinct]
+
+    order = np.lexsort((-citation_counts, authors))
+    authors = authors[order]
+    citation_counts = citation_counts[order]
+
+    if not len(authors):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, {
+            'citations': empty,
+            'publications': empty,
+            'hindex': empty,
+            'i10index': empty,
+        }
+
+    starts = np.flatnonzero(np.r_[True, authors[1:] != authors[:-1]])
+    publications = np.diff(np.r_[starts, len(authors)])
+    ranks = np.arange(1, len(authors) + 1) - np.repeat(starts, publications)
+
+    return authors[starts], {
+        'citations': np.add.reduceat(citation_counts, starts),
+        'publications': publications,
+        'hindex': np.add.reduceat((citation_counts >= ranks).astype(np.int64), starts),
+        'i10index': np.add.reduceat((citation_counts >= 10).astype(np.int64), starts),
+    }
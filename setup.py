@@ -270,15 +270,19 @@ setup(
             'inspirehep_editor = inspirehep.modules.editor:blueprint',
         ],
         'invenio_celery.tasks': [
+            'inspire_authors = inspirehep.modules.authors.tasks',
             'inspire_migrator = inspirehep.modules.migrator.tasks',
             'inspire_orcid = inspirehep.modules.orcid.tasks',
             'inspire_records = inspirehep.modules.records.tasks',
             'inspire_refextract = inspirehep.modules.refextract.tasks',
+            'inspire_theme = inspirehep.modules.theme.landing_pages',
         ],
         'invenio_db.alembic': [
             'inspirehep = inspirehep:alembic',
         ],
         'invenio_db.models': [
+            'inspire_authors = inspirehep.modules.authors.models',
+            'inspire_records = inspirehep.modules.records.models',
             'inspire_workflows_audit = inspirehep.modules.workflows.models',
         ],
         'invenio_jsonschemas.schemas': [
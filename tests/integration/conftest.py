@@ -41,6 +41,8 @@ from invenio_search import current_search_client as es
 from inspirehep.factory import create_app
 from inspirehep.modules.fixtures.files import init_all_storage_paths
 from inspirehep.modules.fixtures.users import init_users_and_permissions, init_authentication_token
+from inspirehep.modules.records.json_ref_loader import clear_resolved_records
+from inspirehep.utils.record_getter import clear_pid_cache
 
 # Use the helpers folder to store test helpers.
 # See: http://stackoverflow.com/a/33515264/374865
@@ -150,6 +152,8 @@ def isolated_app(app):
     connection.close()
     db.session = original_session
     invenio_records_factory_cleanup()
+    clear_resolved_records()
+    clear_pid_cache()
 
 
 # TODO: all fixtures using ``app`` must be replaced by ones that use ``isolated_app``.
@@ -32,6 +32,7 @@ from jsonschema import ValidationError
 from six.moves.urllib.parse import quote
 
 from inspirehep.modules.records.api import InspireRecord
+from inspirehep.modules.records.models import RecordCitations
 from inspirehep.utils.record_getter import get_db_record
 from factories.db.invenio_records import TestRecordMetadata
 
@@ -123,6 +124,42 @@ def test_citations_count_non_zero(isolated_app):
     assert record_1.get_citations_count() == 3L
 
 
+def test_citations_count_decreases_when_reference_is_removed(isolated_app):
+    record_json = {
+        'control_number': 321,
+    }
+    record_1 = TestRecordMetadata.create_from_kwargs(json=record_json).inspire_record
+
+    ref = {'control_number': 4321, 'references': [{'record': {'$ref': record_1._get_ref()}}]}
+    citing_record = TestRecordMetadata.create_from_kwargs(json=ref).record_metadata
+
+    assert record_1.get_citations_count() == 1
+
+    citing_record = InspireRecord.get_record(citing_record.id)
+    del citing_record['references']
+    citing_record.commit()
+
+    assert record_1.get_citations_count() == 0
+
+
+def test_citations_are_stored_in_records_citations(isolated_app):
+    record_json = {
+        'control_number': 321,
+    }
+    record_1 = TestRecordMetadata.create_from_kwargs(json=record_json).inspire_record
+
+    ref = {'control_number': 4321, 'references': [{'record': {'$ref': record_1._get_ref()}}]}
+    citing_record = TestRecordMetadata.create_from_kwargs(json=ref).record_metadata
+
+    expected = [(citing_record.id, 'lit', '321')]
+    result = [
+        (row.citer_id, row.cited_pid_type, row.cited_pid_value)
+        for row in RecordCitations.query.filter_by(citer_id=citing_record.id)
+    ]
+
+    assert expected == result
+
+
 def test_doubled_citations_should_not_count_to_citation_count(isolated_app):
     record_json = {
         'control_number': 321,
@@ -431,6 +431,50 @@ def test_check_enhance_after_index_receiver_when_sender_is_not_a_record(isolated
     assert 'citation_count' in record.model._enhanced_record
 
 
+def test_enhance_record_does_not_modify_the_record(isolated_app):
+    json_rec = {
+        "titles": [
+            {
+                "title": "Some title"
+            },
+        ],
+        "$schema": "https://qa.inspirehep.net/schemas/records/hep.json",
+        "authors": [
+            {
+                "uuid": "e4110d73-5f9e-46a5-b7d8-668d727a3acf",
+                "full_name": "Raczka, P.A.",
+                "affiliations": [
+                    {
+                        "value": "Warsaw U.",
+                        "record": {
+                            "$ref": "http://localhost:5000/api/institutions/903335",
+                        },
+                    },
+                ],
+            }
+        ],
+        "abstracts": [
+            {
+                "source": "arXiv",
+                "value": "Abstract value"
+            }
+        ],
+        "control_number": 425593,
+    }
+    record = TestRecordMetadata.create_from_kwargs(json=json_rec).inspire_record
+    expected = record.to_dict()
+    after_record_update.send(
+        isolated_app,
+        record=record
+    )
+
+    enhanced_record = record.model._enhanced_record
+    assert enhanced_record['authors'][0]['name_variations']
+    assert enhanced_record['authors'][0]['affiliations'][0]['recid'] == 903335
+    assert enhanced_record['abstracts'][0]['abstract_source_suggest']
+    assert record == expected
+
+
 def test_check_enhance_after_index_receiver_when_record_not_provided(isolated_app):
     json_rec = {
         "titles": [
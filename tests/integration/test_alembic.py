@@ -32,6 +32,17 @@ def test_downgrade(isolated_app):
     alembic = Alembic(isolated_app)
     alembic.upgrade()
 
+    alembic.downgrade(target='20ce41197865')
+    assert 'citeable_h_index' not in _get_columns('authors_metrics')
+
+    alembic.downgrade(target='0aebbb921dc8')
+    assert 'authors_metrics' not in _get_table_names()
+
+    alembic.downgrade(target='2dd443feeb63')
+    assert 'records_citations' not in _get_table_names()
+    assert 'ix_records_metadata_json_referenced_records_2_0' in _get_indexes(
+        'records_metadata')
+
     # downgrade 0bc0a6ee1bc0 == downgrade to 2f5368ff6d20
 
     alembic.downgrade(target='0bc0a6ee1bc0')
@@ -180,6 +191,25 @@ def test_upgrade(app):
     assert 'ix_records_metadata_json_referenced_records' not in _get_indexes(
         'records_metadata')
 
+    alembic.upgrade(target='0aebbb921dc8')
+    assert 'records_citations' in _get_table_names()
+    assert 'ix_records_citations_cited_pid' in _get_indexes('records_citations')
+    assert 'ix_records_metadata_json_referenced_records_2_0' not in _get_indexes(
+        'records_metadata')
+
+    alembic.upgrade(target='20ce41197865')
+    assert 'authors_metrics' in _get_table_names()
+    assert 'ix_authors_metrics_h_index' in _get_indexes('authors_metrics')
+
+    alembic.upgrade(target='184a0d235f11')
+    assert 'citeable_h_index' in _get_columns('authors_metrics')
+
+
+def _get_columns(tablename):
+    inspector = inspect(db.engine)
+
+    return [column['name'] for column in inspector.get_columns(tablename)]
+
 
 def _get_indexes(tablename):
     query = text('''
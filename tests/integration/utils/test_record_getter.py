@@ -22,9 +22,23 @@
 
 from __future__ import absolute_import, division, print_function
 
+import pytest
+from sqlalchemy import type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+from invenio_db import db
+from invenio_records.models import RecordMetadata
+
+from factories.db.invenio_records import TestRecordMetadata
 from inspirehep.utils.record_getter import (
+    RecordGetterError,
+    get_db_record,
     get_db_records,
+    get_db_records_fields,
     get_es_records,
+    get_es_records_by_control_numbers,
+    get_es_records_by_pids,
+    get_record_id_ranges,
 )
 
 
@@ -55,6 +69,33 @@ def test_get_es_records_finds_right_results(app):
     assert recids == set(literature)
 
 
+def test_get_es_records_by_pids_handles_empty_lists(app):
+    assert get_es_records_by_pids([]) == {}
+
+
+def test_get_es_records_by_pids_accept_multiple_pid_types(app):
+    pids = [('lit', 1498175), ('lit', '1090628'), ('aut', 983059), ('lit', 983059)]
+
+    results = get_es_records_by_pids(pids)
+
+    assert set(results) == {('lit', '1498175'), ('lit', '1090628'), ('aut', '983059')}
+    assert results[('aut', '983059')]['control_number'] == 983059
+
+
+def test_get_es_records_by_control_numbers_keeps_input_order(app):
+    control_numbers = [1498175, '4328', 983059, 1090628]
+
+    results = list(get_es_records_by_control_numbers('lit', control_numbers, batch_size=3))
+
+    assert [result and result['control_number'] for result in results] == [1498175, 4328, None, 1090628]
+
+
+def test_get_es_records_by_control_numbers_projects_source(app):
+    results = list(get_es_records_by_control_numbers('lit', [4328], _source=['titles']))
+
+    assert set(results[0]) == {'control_number', 'titles'}
+
+
 def test_get_db_records_handles_empty_lists(app):
     assert list(get_db_records([])) == []
 
@@ -77,3 +118,45 @@ def test_get_db_records_accept_multiple_pid_types(app):
     results = list(get_db_records(records))
 
     assert len(results) == 3
+
+
+def test_get_db_record_does_not_use_cached_uuid_of_deleted_pid(isolated_app):
+    factory = TestRecordMetadata.create_from_kwargs(json={'control_number': 111})
+    recid = factory.record_metadata.json['control_number']
+
+    assert get_db_record('lit', recid)['control_number'] == recid
+
+    db.session.delete(factory.persistent_identifier)
+    db.session.flush()
+
+    with pytest.raises(RecordGetterError):
+        get_db_record('lit', recid)
+
+
+def test_get_db_records_reads_only_requested_paths(app):
+    records = list(get_db_records([('lit', 4328)], paths=['control_number', 'titles.title']))
+
+    expected = [
+        {
+            'control_number': 4328,
+            'titles': [{'title': 'Partial Symmetries of Weak Interactions'}],
+        },
+    ]
+
+    assert expected == records
+
+
+def test_get_db_records_fields_reads_each_range_once(app):
+    criteria = [
+        type_coerce(RecordMetadata.json, JSONB)['control_number'].astext.in_(['4328', '1498175', '1090628']),
+    ]
+
+    ranges = get_record_id_ranges(2, criteria)
+    results = [
+        record['control_number']
+        for id_range in ranges
+        for record in get_db_records_fields(['control_number'], criteria, id_range=id_range)
+    ]
+
+    assert len(ranges) == 2
+    assert sorted(results) == [4328, 1090628, 1498175]
@@ -42,6 +42,8 @@ from invenio_search import current_search_client as es
 from inspirehep.factory import create_app
 from inspirehep.modules.fixtures.files import init_all_storage_paths
 from inspirehep.modules.fixtures.users import init_users_and_permissions
+from inspirehep.modules.records.json_ref_loader import clear_resolved_records
+from inspirehep.utils.record_getter import clear_pid_cache
 
 # Use the helpers folder to store test helpers.
 # See: http://stackoverflow.com/a/33515264/374865
@@ -89,6 +91,8 @@ def clear_environment(app):
         list(_es.delete(ignore=[404]))
         list(_es.create(ignore=[400]))
         es.indices.refresh('records-hep')
+        clear_resolved_records()
+        clear_pid_cache()
 
         init_all_storage_paths()
         init_users_and_permissions()
@@ -29,11 +29,15 @@ import pytest
 
 from mock import patch
 
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_search import current_search_client as es
+
 from inspirehep.modules.records.api import RecordMetadata
 from inspirehep.modules.records.cli import (
     get_query_records_to_index,
     simpleindex,
 )
+from inspirehep.modules.records.indexer import ReindexJob
 
 
 def test_simpleindex_no_records_to_index(
@@ -233,6 +237,123 @@ def test_simpleindex_only_authors(
     assert '0 failed' in result.output_bytes
 
 
+def test_simpleindex_resumes_interrupted_reindex(
+    app_cli,
+    celery_app_with_context,
+    celery_session_worker,
+    create_records,
+):
+    create_records(n=3)
+    first_pid = PersistentIdentifier.query.filter_by(
+        pid_type='lit',
+    ).order_by(PersistentIdentifier.id).first()
+
+    job = ReindexJob(['lit'])
+    job.reset()
+    job.add_results('lit', first_pid.id, success=1)
+
+    result = app_cli.invoke(
+        simpleindex,
+        ['--yes-i-know', '-t', 'lit', '-s', '1', '--queue-name', ''],
+    )
+    assert result.exit_code == 0
+    assert 'Resuming the interrupted reindexing: 1 succeeded' in result.output_bytes
+    assert '2 succeeded' in result.output_bytes
+    assert not job.exists()
+
+
+def test_simpleindex_restarts_interrupted_reindex(
+    app_cli,
+    celery_app_with_context,
+    celery_session_worker,
+    create_records,
+):
+    create_records(n=3)
+    last_pid = PersistentIdentifier.query.filter_by(
+        pid_type='lit',
+    ).order_by(PersistentIdentifier.id.desc()).first()
+
+    job = ReindexJob(['lit'])
+    job.reset()
+    job.add_results('lit', last_pid.id)
+
+    result = app_cli.invoke(
+        simpleindex,
+        ['--yes-i-know', '-t', 'lit', '--queue-name', '', '--restart'],
+    )
+    assert result.exit_code == 0
+    assert '3 succeeded' in result.output_bytes
+
+
+def test_simpleindex_retries_failed_records(
+    app_cli,
+    celery_app_with_context,
+    celery_session_worker,
+    create_records,
+):
+    records = create_records(n=2)
+
+    job = ReindexJob(['lit'])
+    job.reset()
+    job.add_failed([str(records[0].id)])
+
+    result = app_cli.invoke(
+        simpleindex,
+        ['--yes-i-know', '-t', 'lit', '--queue-name', '', '--retry-failed'],
+    )
+    assert result.exit_code == 0
+    assert '1 succeeded' in result.output_bytes
+    assert job.failed_count() == 0
+
+
+def test_simpleindex_retries_records_of_interrupted_retrying(
+    app_cli,
+    celery_app_with_context,
+    celery_session_worker,
+    create_records,
+):
+    records = create_records(n=2)
+
+    job = ReindexJob(['lit'])
+    job.reset()
+    job.add_failed([str(record.id) for record in records])
+    # Interrupted before the batch was done.
+    assert len(job.pop_failed(1)) == 1
+
+    result = app_cli.invoke(
+        simpleindex,
+        ['--yes-i-know', '-t', 'lit', '--queue-name', '', '--retry-failed'],
+    )
+    assert result.exit_code == 0
+    assert '2 succeeded' in result.output_bytes
+    assert job.failed_count() == 0
+    assert job.recover_retrying() == 0
+
+
+def test_simpleindex_replaces_index_with_new_one(
+    app_cli,
+    celery_app_with_context,
+    celery_session_worker,
+    create_records,
+):
+    create_records(n=2, pid_type='aut')
+
+    result = app_cli.invoke(
+        simpleindex,
+        ['--yes-i-know', '-t', 'aut', '--queue-name', '', '--new-index'],
+    )
+    assert result.exit_code == 0
+    assert '2 succeeded' in result.output_bytes
+
+    assert es.indices.exists_alias(name='records-authors')
+    new_indexes = list(es.indices.get_alias(index='records-authors'))
+    assert len(new_indexes) == 1
+    assert new_indexes[0].startswith('records-authors-')
+    assert es.indices.exists_alias(index=new_indexes[0], name='records')
+    assert es.count(index='records-authors')['count'] == 2
+    assert not ReindexJob(['aut']).exists()
+
+
 def _get_deleted_records_by_uuids(uuids):
     records = RecordMetadata.query.filter(RecordMetadata.id.in_(uuids)).all()
     return [r for r in records if r.json.get('deleted')]
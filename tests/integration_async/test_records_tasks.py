@@ -26,7 +26,10 @@ import pytest
 
 from uuid import uuid4
 
-from inspirehep.modules.records.tasks import batch_reindex
+from inspirehep.modules.records.tasks import (
+    batch_reindex,
+    batch_update_citations_count,
+)
 from inspirehep.utils.record_getter import get_es_record, RecordGetterError
 
 
@@ -38,7 +41,7 @@ def test_batch_reindex_no_records(
     task = batch_reindex.apply_async(kwargs={'uuids': [str(uuid4())]})
 
     result = task.get(timeout=10)
-    expected = {'failures': [], 'success': 0}
+    expected = {'failures': [], 'skipped': 0, 'success': 0}
 
     assert result == expected
 
@@ -55,7 +58,7 @@ def test_batch_reindex_one_record(
     task = batch_reindex.apply_async(kwargs={'uuids': [uuid]})
 
     result = task.get(timeout=10)
-    expected = {'failures': [], 'success': 1}
+    expected = {'failures': [], 'skipped': 0, 'success': 1}
     assert result == expected
 
     control_number = records[0].json['control_number']
@@ -74,7 +77,7 @@ def test_batch_reindex_one_deleted_record(
     task = batch_reindex.apply_async(kwargs={'uuids': [uuid]})
 
     result = task.get(timeout=10)
-    expected = {'failures': [], 'success': 0}
+    expected = {'failures': [], 'skipped': 0, 'success': 0}
     assert result == expected
 
     control_number = records[0].json['control_number']
@@ -95,7 +98,7 @@ def test_batch_reindex_two_records(
     task = batch_reindex.apply_async(kwargs={'uuids': uuids})
 
     result = task.get(timeout=10)
-    expected = {'failures': [], 'success': 2}
+    expected = {'failures': [], 'skipped': 0, 'success': 2}
     assert result == expected
 
     control_number = records[0].json['control_number']
@@ -121,7 +124,7 @@ def test_batch_reindex_two_records_and_one_fails(
     task = batch_reindex.apply_async(kwargs={'uuids': uuids})
 
     result = task.get(timeout=10)
-    expected = {'failures': [failing_record.id], 'success': 2}
+    expected = {'failures': [failing_record.id], 'skipped': 0, 'success': 2}
     assert result == expected
 
     control_number = records[0].json['control_number']
@@ -147,7 +150,7 @@ def test_batch_reindex_one_records_and_skips_one_deleted(
     task = batch_reindex.apply_async(kwargs={'uuids': uuids})
 
     result = task.get(timeout=10)
-    expected = {'failures': [], 'success': 1}
+    expected = {'failures': [], 'skipped': 0, 'success': 1}
     assert result == expected
 
     control_number = records[0].json['control_number']
@@ -156,3 +159,74 @@ def test_batch_reindex_one_records_and_skips_one_deleted(
     control_number = failing_record.json['control_number']
     with pytest.raises(RecordGetterError):
         get_es_record('lit', control_number)
+
+
+def test_batch_reindex_skips_unchanged_record(
+    app,
+    create_records,
+    celery_app_with_context,
+    celery_session_worker
+):
+    records = create_records(n=1)
+    uuid = str(records[0].id)
+
+    batch_reindex.apply_async(kwargs={'uuids': [uuid]}).get(timeout=10)
+    task = batch_reindex.apply_async(kwargs={'uuids': [uuid]})
+
+    result = task.get(timeout=10)
+    expected = {'failures': [], 'skipped': 1, 'success': 0}
+    assert result == expected
+
+    control_number = records[0].json['control_number']
+    assert get_es_record('lit', control_number)['_fingerprint']
+
+
+def test_batch_update_citations_count_reindexes_records_missing_from_es(
+    app,
+    create_records,
+    celery_app_with_context,
+    celery_session_worker
+):
+    records = create_records(n=1)
+    uuid = str(records[0].id)
+
+    task = batch_update_citations_count.apply_async(kwargs={'uuids': [uuid]})
+
+    result = task.get(timeout=10)
+    expected = {'failures': [], 'success': 1}
+    assert result == expected
+
+    control_number = records[0].json['control_number']
+    assert get_es_record('lit', control_number)['citation_count'] == 0
+
+
+def test_batch_update_citations_count_updates_citation_count(
+    app,
+    create_records,
+    celery_app_with_context,
+    celery_session_worker
+):
+    cited_record = create_records(n=1)[0]
+    uuid = str(cited_record.id)
+    control_number = cited_record.json['control_number']
+
+    batch_reindex.apply_async(kwargs={'uuids': [uuid]}).get(timeout=10)
+    assert get_es_record('lit', control_number)['citation_count'] == 0
+
+    create_records(n=1, additional_props={
+        'references': [
+            {
+                'record': {
+                    '$ref': 'http://localhost:5000/api/literature/{}'.format(control_number),
+                },
+            },
+        ],
+    })
+
+    task = batch_update_citations_count.apply_async(kwargs={'uuids': [uuid]})
+
+    result = task.get(timeout=10)
+    expected = {'failures': [], 'success': 1}
+    assert result == expected
+
+    assert get_es_record('lit', control_number)['citation_count'] == 1
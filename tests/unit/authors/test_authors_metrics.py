@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+import mock
+import pytest
+
+from inspirehep.modules.authors.metrics import (
+    get_authors_recids,
+    get_authors_recids_with_changed_metrics,
+)
+from inspirehep.modules.authors.rest.stats import AuthorAPIStats
+from inspirehep.modules.authors.tasks import (
+    AUTHORS_METRICS_PENDING_KEY,
+    refresh_pending_authors_metrics,
+    schedule_authors_metrics_update,
+)
+
+
+def test_get_authors_recids():
+    record = {
+        'authors': [
+            {
+                'full_name': 'Smith, John',
+                'record': {'$ref': 'http://localhost:5000/api/authors/1'},
+            },
+            {
+                'full_name': 'Doe, Jane',
+            },
+            {
+                'full_name': 'Smith, J.',
+                'record': {'$ref': 'http://localhost:5000/api/authors/1'},
+            },
+            {
+                'full_name': 'Roe, Richard',
+                'record': {'$ref': 'http://localhost:5000/api/authors/2'},
+            },
+        ],
+    }
+
+    assert {1, 2} == get_authors_recids(record)
+
+
+def test_get_authors_recids_without_authors():
+    assert set() == get_authors_recids({})
+
+
+@mock.patch('inspirehep.modules.authors.rest.stats.refresh_authors_metrics')
+@mock.patch('inspirehep.modules.authors.rest.stats.get_stored_author_statistics')
+def test_stats_serialize_returns_stored_statistics(mock_stored, mock_refresh):
+    mock_stored.return_value = {'citations': 1}
+
+    result = AuthorAPIStats().serialize(mock.Mock(pid_value='1'), None)
+
+    assert '{"citations": 1}' == result
+    mock_refresh.delay.assert_not_called()
+
+
+@mock.patch('inspirehep.modules.authors.rest.stats.refresh_authors_metrics')
+@mock.patch('inspirehep.modules.authors.rest.stats.get_author_statistics')
+@mock.patch('inspirehep.modules.authors.rest.stats.get_stored_author_statistics')
+def test_stats_serialize_computes_missing_statistics_and_stores_them_later(
+    mock_stored, mock_statistics, mock_refresh
+):
+    mock_stored.return_value = None
+    mock_statistics.return_value = {'citations': 2}
+
+    result = AuthorAPIStats().serialize(mock.Mock(pid_value='1'), None)
+
+    assert '{"citations": 2}' == result
+    mock_statistics.assert_called_once_with('1')
+    mock_refresh.delay.assert_called_once_with([1])
+
+
+def test_get_authors_recids_with_changed_metrics_returns_added_and_removed_authors():
+    previous_record = {
+        'authors': [
+            {'record': {'$ref': 'http://localhost:5000/api/authors/1'}},
+            {'record': {'$ref': 'http://localhost:5000/api/authors/2'}},
+        ],
+        'titles': [{'title': 'A title'}],
+    }
+    record = {
+        'authors': [
+            {'record': {'$ref': 'http://localhost:5000/api/authors/2'}},
+            {'record': {'$ref': 'http://localhost:5000/api/authors/3'}},
+        ],
+        'titles': [{'title': 'Another title'}],
+    }
+
+    assert {1, 3} == get_authors_recids_with_changed_metrics(record, previous_record)
+
+
+def test_get_authors_recids_with_changed_metrics_returns_all_authors_when_metrics_fields_changed():
+    previous_record = {
+        'authors': [
+            {'record': {'$ref': 'http://localhost:5000/api/authors/1'}},
+        ],
+        'refereed': False,
+    }
+    record = {
+        'authors': [
+            {'record': {'$ref': 'http://localhost:5000/api/authors/1'}},
+        ],
+        'refereed': True,
+    }
+
+    assert {1} == get_authors_recids_with_changed_metrics(record, previous_record)
+
+
+@mock.patch('inspirehep.modules.authors.tasks.get_redis_client')
+def test_schedule_authors_metrics_update(mock_get_redis_client):
+    schedule_authors_metrics_update({3, 1, 2})
+
+    mock_get_redis_client.return_value.sadd.assert_called_once_with(
+        AUTHORS_METRICS_PENDING_KEY, 1, 2, 3,
+    )
+
+
+@mock.patch('inspirehep.modules.authors.tasks.get_redis_client')
+def test_schedule_authors_metrics_update_does_nothing_without_authors(mock_get_redis_client):
+    schedule_authors_metrics_update(set())
+
+    mock_get_redis_client.return_value.sadd.assert_not_called()
+
+
+@mock.patch('inspirehep.modules.authors.tasks.refresh_authors_metrics')
+@mock.patch('inspirehep.modules.authors.tasks.get_redis_client')
+def test_refresh_pending_authors_metrics_updates_pending_authors_in_batches(
+    mock_get_redis_client, mock_refresh, app
+):
+    redis = mock_get_redis_client.return_value
+    redis.srandmember.side_effect = [[b'1', b'2'], [b'3'], []]
+    redis.pipeline.return_value.execute.side_effect = [[1, 0], [1]]
+
+    with mock.patch.dict(app.config, {'AUTHORS_METRICS_UPDATE_BATCH_SIZE': 2}):
+        result = refresh_pending_authors_metrics()
+
+    assert result == 2
+    assert mock_refresh.call_args_list == [mock.call([1]), mock.call([3])]
+
+
+@mock.patch('inspirehep.modules.authors.tasks.refresh_authors_metrics', side_effect=Exception)
+@mock.patch('inspirehep.modules.authors.tasks.get_redis_client')
+def test_refresh_pending_authors_metrics_queues_failed_authors_again(
+    mock_get_redis_client, mock_refresh, app
+):
+    redis = mock_get_redis_client.return_value
+    redis.srandmember.return_value = [b'1', b'2']
+    redis.pipeline.return_value.execute.return_value = [1, 1]
+
+    with pytest.raises(Exception):
+        refresh_pending_authors_metrics()
+
+    redis.sadd.assert_called_once_with(AUTHORS_METRICS_PENDING_KEY, 1, 2)
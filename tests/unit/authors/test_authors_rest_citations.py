@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+import mock
+
+from inspirehep.modules.authors.rest.citations import get_citations
+
+
+def _ref(recid):
+    return {'$ref': 'http://localhost:5000/api/literature/{}'.format(recid)}
+
+
+@mock.patch('inspirehep.modules.authors.rest.citations.LiteratureSearch')
+def test_get_citations_searches_citers_once_per_batch(mock_search):
+    publications = [
+        {'control_number': 1, 'self': _ref(1), 'authors': [{'recid': 10}]},
+        {'control_number': 2, 'self': _ref(2), 'authors': [{'recid': 10}, {'recid': 20}]},
+        {'control_number': 3, 'self': _ref(3), 'authors': [{'recid': 10}]},
+    ]
+    citer = mock.Mock()
+    citer.to_dict.return_value = {
+        'authors': [{'recid': 20}, {'full_name': 'Smith, J.'}],
+        'collections': [{'primary': 'Published'}],
+        'control_number': '4',
+        'earliest_date': '2018-01-01',
+        'references': [{'recid': 1}, {'recid': 2}, {'recid': 5}, {}],
+        'self': _ref(4),
+    }
+    mock_search.return_value.query.return_value.params.return_value.scan.return_value = [citer]
+
+    expected = [
+        {
+            'citee': {'id': 1, 'record': _ref(1)},
+            'citers': [
+                {
+                    'citer': {'id': 4, 'record': _ref(4)},
+                    'date': '2018-01-01',
+                    'published_paper': True,
+                    'self_citation': False,
+                },
+            ],
+        },
+        {
+            'citee': {'id': 2, 'record': _ref(2)},
+            'citers': [
+                {
+                    'citer': {'id': 4, 'record': _ref(4)},
+                    'date': '2018-01-01',
+                    'published_paper': True,
+                    'self_citation': True,
+                },
+            ],
+        },
+        {
+            'citee': {'id': 3, 'record': _ref(3)},
+            'citers': [],
+        },
+    ]
+    result = list(get_citations(publications))
+
+    assert expected == result
+    assert mock_search.return_value.query.call_count == 1
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+import mock
+import pytest
+from redis import RedisError
+
+from invenio_records_rest.errors import InvalidQueryRESTError
+
+from inspirehep.modules.authors.rest.coauthors import (
+    AuthorAPICoauthors,
+    get_coauthors,
+    get_coauthors_page_and_size,
+)
+
+
+def _coauthor_bucket(recid, count):
+    return {
+        'key': recid,
+        'doc_count': count,
+        'author': {
+            'hits': {
+                'hits': [
+                    {
+                        '_source': {
+                            'full_name': 'Author {}'.format(recid),
+                            'recid': recid,
+                            'record': {
+                                '$ref': 'http://localhost:5000/api/authors/{}'.format(recid),
+                            },
+                        },
+                    },
+                ],
+            },
+        },
+    }
+
+
+@pytest.fixture
+def mock_coauthors_search():
+    with mock.patch('inspirehep.modules.authors.rest.coauthors.LiteratureSearch') as mock_search:
+        search = mock_search.return_value.query.return_value.extra.return_value
+        search.execute.return_value.to_dict.return_value = {
+            'aggregations': {
+                'authors': {
+                    'coauthors': {
+                        'buckets': [
+                            _coauthor_bucket(1, 10),
+                            _coauthor_bucket(2, 8),
+                            _coauthor_bucket(3, 5),
+                            _coauthor_bucket(4, 1),
+                        ],
+                    },
+                },
+            },
+        }
+        yield search
+
+
+def test_get_coauthors_excludes_the_author(mock_coauthors_search):
+    expected = [
+        {
+            'count': 8,
+            'full_name': 'Author 2',
+            'id': 2,
+            'record': {'$ref': 'http://localhost:5000/api/authors/2'},
+        },
+        {
+            'count': 5,
+            'full_name': 'Author 3',
+            'id': 3,
+            'record': {'$ref': 'http://localhost:5000/api/authors/3'},
+        },
+    ]
+    result = get_coauthors('1', page=1, size=2)
+
+    assert expected == result
+
+
+def test_get_coauthors_returns_the_requested_page(mock_coauthors_search):
+    result = get_coauthors('2', page=2, size=2)
+
+    assert [4] == [coauthor['id'] for coauthor in result]
+
+
+def test_get_coauthors_page_and_size(app):
+    with app.test_request_context('/?page=3&size=20'):
+        assert (3, 20) == get_coauthors_page_and_size()
+
+
+def test_get_coauthors_page_and_size_defaults_and_limits_size(app):
+    with app.test_request_context('/'):
+        assert (1, app.config['AUTHORS_COAUTHORS_DEFAULT_SIZE']) == get_coauthors_page_and_size()
+
+    with app.test_request_context('/?size=100000'):
+        assert (1, app.config['AUTHORS_COAUTHORS_MAX_SIZE']) == get_coauthors_page_and_size()
+
+
+def test_get_coauthors_page_and_size_raises_on_invalid_page(app):
+    with app.test_request_context('/?page=0'):
+        with pytest.raises(InvalidQueryRESTError):
+            get_coauthors_page_and_size()
+
+
+def test_get_coauthors_page_and_size_raises_on_page_after_max_results(app):
+    config = {
+        'AUTHORS_COAUTHORS_MAX_RESULTS': 100,
+    }
+
+    with mock.patch.dict(app.config, config):
+        with app.test_request_context('/?page=10&size=10'):
+            assert (10, 10) == get_coauthors_page_and_size()
+
+        with app.test_request_context('/?page=11&size=10'):
+            with pytest.raises(InvalidQueryRESTError):
+                get_coauthors_page_and_size()
+
+
+@mock.patch('inspirehep.modules.authors.rest.coauthors.get_coauthors_cache_key')
+@mock.patch('inspirehep.modules.authors.rest.coauthors.current_cache')
+@mock.patch('inspirehep.modules.authors.rest.coauthors.get_coauthors')
+def test_serialize_returns_coauthors_when_they_cannot_be_cached(
+    mock_get_coauthors, mock_cache, mock_get_key, app
+):
+    mock_get_coauthors.return_value = [{'id': 3}]
+    mock_cache.get.return_value = None
+    mock_cache.set.side_effect = RedisError
+
+    with app.test_request_context('/'):
+        result = AuthorAPICoauthors().serialize(mock.Mock(pid_value='2'), None)
+
+    assert '[{"id": 3}]' == result
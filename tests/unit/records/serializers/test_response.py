@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from werkzeug.urls import url_decode, url_parse
+
+from inspirehep.modules.records.serializers.response import get_cursor_links
+from inspirehep.modules.search.search_factory import decode_cursor
+
+
+def test_get_cursor_links_links_next_page_after_last_hit(app):
+    search_result = {'hits': {'hits': [{'sort': [1.0, 1]}, {'sort': [0.5, 2]}]}}
+    links = {
+        'self': 'http://localhost/api/literature/?q=foo&cursor=&page=1&size=2',
+        'next': 'http://localhost/api/literature/?q=foo&cursor=&page=2&size=2',
+    }
+
+    with app.test_request_context('/api/literature/?q=foo&cursor=&size=2'):
+        result = get_cursor_links(search_result, links)
+
+    next_args = url_decode(url_parse(result['next']).query)
+
+    assert result['self'] == links['self']
+    assert decode_cursor(next_args['cursor']) == [0.5, 2]
+    assert next_args['q'] == 'foo'
+    assert 'page' not in next_args
+
+
+def test_get_cursor_links_has_no_next_link_on_last_page(app):
+    search_result = {'hits': {'hits': [{'sort': [1.0, 1]}]}}
+    links = {
+        'self': 'http://localhost/api/literature/?cursor=abc&page=1&size=2',
+        'prev': 'http://localhost/api/literature/?cursor=abc&page=1&size=2',
+    }
+
+    with app.test_request_context('/api/literature/?cursor=abc&size=2'):
+        result = get_cursor_links(search_result, links)
+
+    assert result == {'self': links['self']}
+
+
+def test_get_cursor_links_uses_the_size_of_the_search(app):
+    search_result = {'hits': {'hits': [{'sort': [1.0, 1]}, {'sort': [0.5, 2]}]}}
+    links = {
+        'self': 'http://localhost/api/literature/?cursor=&page=1&size=2',
+    }
+
+    with app.test_request_context('/api/literature/?cursor='):
+        result = get_cursor_links(search_result, links)
+
+    assert 'next' in result
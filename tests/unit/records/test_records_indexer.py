@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+from mock import patch
+from redis import RedisError
+
+from inspirehep.modules.records.indexer import (
+    bump_index_generation,
+    compute_fingerprint,
+    filter_unchanged_index_ops,
+    swap_index_alias,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_bump_index_generation():
+    with patch('inspirehep.modules.records.indexer.bump_index_generation') as mock_bump:
+        yield mock_bump
+
+
+@patch('inspirehep.modules.records.indexer.es')
+def test_swap_index_alias_moves_all_aliases_at_once(mocked_es):
+    mocked_es.indices.get_alias.return_value = {
+        'records-hep-20190101000000': {'aliases': {'records': {}, 'records-hep': {}}},
+    }
+
+    old_indexes = swap_index_alias('records-hep', 'records-hep-20190201000000')
+
+    assert old_indexes == ['records-hep-20190101000000']
+    mocked_es.indices.delete.assert_not_called()
+    mocked_es.indices.update_aliases.assert_called_once_with(body={'actions': [
+        {'remove': {'index': 'records-hep-20190101000000', 'alias': 'records'}},
+        {'remove': {'index': 'records-hep-20190101000000', 'alias': 'records-hep'}},
+        {'add': {'index': 'records-hep-20190201000000', 'alias': 'records'}},
+        {'add': {'index': 'records-hep-20190201000000', 'alias': 'records-hep'}},
+    ]})
+
+
+@patch('inspirehep.modules.records.indexer.es')
+def test_swap_index_alias_replaces_index_with_alias(mocked_es):
+    mocked_es.indices.get_alias.return_value = {
+        'records-hep': {'aliases': {'records': {}}},
+    }
+
+    old_indexes = swap_index_alias('records-hep', 'records-hep-20190201000000', delete_live_index=True)
+
+    assert old_indexes == []
+    mocked_es.indices.delete.assert_not_called()
+    mocked_es.indices.update_aliases.assert_called_once_with(body={'actions': [
+        {'remove_index': {'index': 'records-hep'}},
+        {'add': {'index': 'records-hep-20190201000000', 'alias': 'records'}},
+        {'add': {'index': 'records-hep-20190201000000', 'alias': 'records-hep'}},
+    ]})
+
+
+@patch('inspirehep.modules.records.indexer.es')
+def test_swap_index_alias_does_not_delete_live_index_by_default(mocked_es):
+    mocked_es.indices.get_alias.return_value = {
+        'records-hep': {'aliases': {'records': {}}},
+    }
+
+    with pytest.raises(ValueError):
+        swap_index_alias('records-hep', 'records-hep-20190201000000')
+
+    mocked_es.indices.delete.assert_not_called()
+    mocked_es.indices.update_aliases.assert_not_called()
+
+
+def test_compute_fingerprint_ignores_the_fingerprint():
+    source = {'control_number': 1, '_updated': '2019-01-01T00:00:00'}
+    fingerprinted_source = dict(source, _fingerprint='foo')
+
+    assert compute_fingerprint(source) == compute_fingerprint(fingerprinted_source)
+
+
+def test_compute_fingerprint_ignores_updated():
+    source = {'control_number': 1, '_updated': '2019-01-01T00:00:00'}
+    updated_source = dict(source, _updated='2019-02-01T00:00:00')
+
+    assert compute_fingerprint(source) == compute_fingerprint(updated_source)
+
+
+@patch('inspirehep.modules.records.indexer.get_indexed_fingerprints', return_value={
+    'aaa': ('fingerprint-aaa', '2019-01-01T00:00:00'),
+    'bbb': ('fingerprint-bbb', '2019-01-01T00:00:00'),
+})
+def test_filter_unchanged_index_ops_updates_only_updated(mock_get_indexed_fingerprints):
+    index_ops = [
+        {
+            '_index': 'records-hep',
+            '_type': 'hep',
+            '_id': recid,
+            '_source': {'_fingerprint': 'fingerprint-' + recid, '_updated': updated},
+        } for recid, updated in (('aaa', '2019-01-01T00:00:00'), ('bbb', '2019-02-01T00:00:00'))
+    ]
+
+    result, skipped = filter_unchanged_index_ops(index_ops)
+
+    assert skipped == 2
+    assert result == [{
+        '_op_type': 'update',
+        '_index': 'records-hep',
+        '_type': 'hep',
+        '_id': 'bbb',
+        'doc': {'_updated': '2019-02-01T00:00:00'},
+    }]
+
+
+@patch('inspirehep.modules.records.indexer.get_redis_client')
+def test_bump_index_generation_logs_redis_errors(mock_get_redis_client):
+    mock_get_redis_client.return_value.pipeline.return_value.execute.side_effect = RedisError
+
+    with patch('inspirehep.modules.records.indexer.LOGGER') as mock_logger:
+        bump_index_generation(['records-hep'])
+
+    mock_logger.exception.assert_called_once()
@@ -22,16 +22,42 @@
 
 from __future__ import absolute_import, division, print_function
 
+import pytest
 from flask import current_app
 from mock import patch
+from redis import RedisError
 
 from jsonref import JsonRef
 
 from inspirehep.modules.records.json_ref_loader import (
-    AbstractRecordLoader, DatabaseJsonLoader, ESJsonLoader, replace_refs)
+    AbstractRecordLoader, DatabaseJsonLoader, ESJsonLoader, clear_resolved_records,
+    invalidate_resolved_records, replace_refs)
+from inspirehep.utils.cache import get_request_cache
 from inspirehep.utils.record_getter import RecordGetterError
 
 
+@pytest.fixture(autouse=True)
+def resolved_records_generations():
+    generations = {}
+
+    def incr(key):
+        generations[key] = generations.get(key, 0) + 1
+
+    with patch('inspirehep.modules.records.json_ref_loader.get_redis_client') as mock_get_redis_client:
+        redis = mock_get_redis_client.return_value
+        redis.pipeline.return_value = redis
+        redis.incr.side_effect = incr
+        redis.mget.side_effect = lambda keys: [generations.get(key) for key in keys]
+        yield redis
+
+
+@pytest.fixture(autouse=True)
+def resolved_records_caches():
+    clear_resolved_records()
+    yield
+    clear_resolved_records()
+
+
 def _build_url(endpoint='literature', recid='42'):
     server = current_app.config['SERVER_NAME']
     if not server.startswith('http://'):
@@ -182,3 +208,101 @@ def test_specific_loaders_return_none(get_db_rec, get_es_rec, g_p_t_f_e):
         assert expect_none == None  # noqa: E711
         assert get_db_rec.call_count == 1
         assert get_es_rec.call_count == 1
+
+
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_db_record')
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_db_records')
+def test_replace_refs_prefetch_from_db(get_db_recs, get_db_rec):
+    get_db_recs.return_value = [
+        {'$schema': 'http://localhost:5000/schemas/records/hep.json', 'control_number': 1},
+        {'$schema': 'http://localhost:5000/schemas/records/hep.json', 'control_number': 2},
+    ]
+    obj = {
+        'references': [
+            {'record': {'$ref': _build_url(recid='1')}},
+            {'record': {'$ref': _build_url(recid='2')}},
+            {'record': {'$ref': _build_url(recid='1')}},
+            {'record': {'$ref': _build_url(recid='3')}},
+        ],
+    }
+
+    result = replace_refs(obj, 'db', prefetch=True)
+
+    assert [reference['record'] for reference in result['references']] == [
+        {'$schema': 'http://localhost:5000/schemas/records/hep.json', 'control_number': 1},
+        {'$schema': 'http://localhost:5000/schemas/records/hep.json', 'control_number': 2},
+        {'$schema': 'http://localhost:5000/schemas/records/hep.json', 'control_number': 1},
+        None,
+    ]
+    assert get_db_recs.call_count == 1
+    assert sorted(get_db_recs.call_args[0][0]) == [('lit', '1'), ('lit', '2'), ('lit', '3')]
+    assert get_db_rec.call_count == 0
+
+
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_es_record')
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_es_records_by_pids')
+def test_replace_refs_prefetch_from_es(get_es_recs, get_es_rec):
+    get_es_recs.return_value = {
+        ('lit', '1'): {'control_number': 1},
+        ('con', '2'): {'control_number': 2},
+    }
+    obj = [
+        {'$ref': _build_url(recid='1')},
+        {'$ref': _build_url(endpoint='conferences', recid='2')},
+    ]
+
+    result = replace_refs(obj, 'es', prefetch=True)
+
+    assert result == [{'control_number': 1}, {'control_number': 2}]
+    assert get_es_recs.call_count == 1
+    assert get_es_rec.call_count == 0
+
+
+@patch('inspirehep.modules.records.json_ref_loader.get_request_cache')
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_db_record')
+def test_db_loader_caches_records_across_requests(get_db_rec, get_request_cache):
+    request_caches = [{}, {}, {}, {}]
+    get_request_cache.side_effect = lambda name, maxsize=None: request_caches[0 if name == 'resolved_records' else 1]
+    get_db_rec.return_value = {'control_number': 42}
+
+    assert replace_refs({'$ref': _build_url()}, 'db') == {'control_number': 42}
+    assert replace_refs({'$ref': _build_url()}, 'db') == {'control_number': 42}
+    assert get_db_rec.call_count == 1
+    assert request_caches[1] == {'misses': 1, 'hits': 1}
+
+    # A new request only has the records of the shared cache.
+    request_caches.pop(0)
+    request_caches.pop(0)
+    assert replace_refs({'$ref': _build_url()}, 'db') == {'control_number': 42}
+    assert get_db_rec.call_count == 1
+    assert request_caches[1] == {'shared_hits': 1}
+
+    invalidate_resolved_records('lit', 42)
+    assert replace_refs({'$ref': _build_url()}, 'db') == {'control_number': 42}
+    assert get_db_rec.call_count == 2
+
+
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_db_record')
+def test_db_loader_shared_cache_returns_copies(get_db_rec):
+    get_db_rec.return_value = {'control_number': 42, 'titles': []}
+    replace_refs({'$ref': _build_url()}, 'db')
+
+    get_request_cache('resolved_records').clear()
+    record = replace_refs({'$ref': _build_url()}, 'db')
+    record['titles'].append({'title': 'Modified'})
+
+    get_request_cache('resolved_records').clear()
+    assert replace_refs({'$ref': _build_url()}, 'db')['titles'] == []
+    assert get_db_rec.call_count == 1
+
+
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_db_record')
+def test_db_loader_does_not_use_shared_cache_without_redis(get_db_rec, resolved_records_generations):
+    resolved_records_generations.mget.side_effect = RedisError
+    get_db_rec.return_value = {'control_number': 42}
+
+    replace_refs({'$ref': _build_url()}, 'db')
+    get_request_cache('resolved_records').clear()
+    replace_refs({'$ref': _build_url()}, 'db')
+
+    assert get_db_rec.call_count == 2
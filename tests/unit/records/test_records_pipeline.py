@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+from flask import current_app
+from mock import MagicMock, patch
+from six.moves.queue import Queue
+
+from inspirehep.modules.records.pipeline import BulkIndexPipeline
+
+
+@pytest.fixture(autouse=True)
+def mock_bump_index_generation():
+    with patch('inspirehep.modules.records.pipeline.bump_index_generation') as mock_bump:
+        yield mock_bump
+
+
+@patch('inspirehep.modules.records.pipeline.filter_unchanged_index_ops', side_effect=lambda ops: (ops[1:], 1))
+@patch('inspirehep.modules.records.pipeline.bulk', return_value=(2, [{'index': {'_id': 'ccc'}}]))
+def test_bulk_index_pipeline_send(mocked_bulk, mocked_filter_unchanged_index_ops):
+    pipeline = BulkIndexPipeline(processes=1)
+    send_queue = Queue()
+    send_queue.put((['aaa', 'bbb', 'ccc'], [{'_id': 'aaa'}, {'_id': 'bbb'}, {'_id': 'ccc'}]))
+    send_queue.put(None)
+
+    pipeline._send(current_app._get_current_object(), send_queue)
+
+    assert mocked_bulk.call_args[0][1] == [{'_id': 'bbb'}, {'_id': 'ccc'}]
+    assert pipeline.success == 2
+    assert pipeline.skipped == 1
+    assert pipeline.failures == [{'index': {'_id': 'ccc'}}]
+    assert pipeline.stats['send']['records'] == 3
+
+
+def test_bulk_index_pipeline_collect_records_failed_batches():
+    pipeline = BulkIndexPipeline(processes=1)
+    send_queue = Queue()
+    result = MagicMock()
+    result.get.side_effect = ValueError('broken record')
+
+    pipeline._collect((['aaa', 'bbb'], result), send_queue)
+
+    assert send_queue.empty()
+    assert pipeline.failures == [{'ids': ['aaa', 'bbb'], 'error': "ValueError('broken record',)"}]
+
+
+def test_bulk_index_pipeline_collect_passes_index_ops_to_senders():
+    pipeline = BulkIndexPipeline(processes=1)
+    send_queue = Queue()
+    result = MagicMock()
+    result.get.return_value = ([{'_id': 'aaa'}], 0.5)
+
+    pipeline._collect((['aaa', 'bbb_deleted'], result), send_queue)
+
+    assert send_queue.get() == (['aaa', 'bbb_deleted'], [{'_id': 'aaa'}])
+    assert pipeline.stats['enhance'] == {'records': 1, 'seconds': 0.5}
+
+
+def test_bulk_index_pipeline_report():
+    pipeline = BulkIndexPipeline(processes=1)
+    pipeline._add_stats('fetch', 100, 2.0)
+    pipeline._add_stats('send', 100, 4.0)
+    pipeline.elapsed = 10.0
+
+    result = pipeline.report()
+
+    assert result['rate'] == 10.0
+    assert result['stages']['fetch'] == {'records': 100, 'seconds': 2.0, 'rate': 50.0}
+    assert result['stages']['enhance'] == {'records': 0, 'seconds': 0.0, 'rate': 0.0}
+    assert result['stages']['send']['rate'] == 25.0
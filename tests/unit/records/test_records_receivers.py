@@ -27,9 +27,13 @@ import pytest
 import mock
 
 from inspire_schemas.api import load_schema, validate
+from flask import current_app
+from invenio_records.models import RecordMetadata
+
 from inspirehep.modules.records.receivers import (
     assign_phonetic_block,
     assign_uuid,
+    index_after_commit,
 )
 
 
@@ -256,3 +260,38 @@ def test_assign_uuid_does_not_touch_existing_uuids(mock_uuid4):
 
     assert validate(result, subschema) is None
     assert expected == result
+
+
+@mock.patch('inspirehep.modules.records.receivers.index_modified_citations_from_record')
+@mock.patch('inspirehep.modules.records.receivers.drain_write_behind_queue')
+@mock.patch('inspirehep.modules.records.receivers.WriteBehindQueue')
+@mock.patch('inspirehep.modules.records.receivers.RecordIndexer')
+def test_index_after_commit_queues_records_with_write_behind(
+    mock_indexer,
+    mock_queue,
+    mock_drain,
+    mock_index_citations,
+):
+    mock_queue.return_value.mark_scheduled.return_value = True
+    model = RecordMetadata(
+        id=UUID('727238f3-8ed6-40b6-97d2-dc3cd1429131'),
+        json={
+            '$schema': 'http://localhost:5000/schemas/records/hep.json',
+            'control_number': 1,
+        },
+        version_id=2,
+    )
+
+    config = {
+        'INDEXER_WRITE_BEHIND': True,
+        'INDEXER_WRITE_BEHIND_WINDOW': 5,
+    }
+
+    with mock.patch.dict(current_app.config, config):
+        index_after_commit(None, [(model, 'update')])
+
+    mock_indexer.return_value.index.assert_not_called()
+    mock_queue.return_value.push.assert_called_once_with([model.id])
+    mock_queue.return_value.push_citations.assert_called_once_with([('lit', 1, 2)])
+    mock_drain.apply_async.assert_called_once_with(countdown=5)
+    mock_index_citations.delay.assert_not_called()
@@ -22,10 +22,22 @@
 
 from __future__ import absolute_import, division, print_function
 
+import pytest
 from flask import current_app
 from mock import patch
 
-from inspirehep.modules.records.tasks import update_links, batch_reindex
+from inspirehep.modules.records.tasks import (
+    batch_reindex,
+    drain_write_behind_queue,
+    update_links,
+)
+from inspirehep.utils.lock import DistributedLockError
+
+
+@pytest.fixture(autouse=True)
+def mock_bump_index_generation():
+    with patch('inspirehep.modules.records.tasks.bump_index_generation') as mock_bump:
+        yield mock_bump
 
 
 def test_update_links():
@@ -148,13 +160,22 @@ def test_update_links_ignores_non_whitelisted_paths():
         }
 
 
-def record_generator(uuid):
-    record = {
-        '$schema': 'http://localhost:5000/schemas/record/hep.json',
-    }
-    if uuid.endswith("_deleted"):
-        record['deleted'] = True
-    return record
+class MockedRecord(dict):
+    def __init__(self, uuid, *args, **kwargs):
+        super(MockedRecord, self).__init__(*args, **kwargs)
+        self.id = uuid
+
+
+def records_generator(uuids):
+    records = []
+    for uuid in uuids:
+        record = MockedRecord(uuid, {
+            '$schema': 'http://localhost:5000/schemas/record/hep.json',
+        })
+        if uuid.endswith("_deleted"):
+            record['deleted'] = True
+        records.append(record)
+    return records
 
 
 def mocked_bulk(es, records, **kwargs):
@@ -164,10 +185,12 @@ def mocked_bulk(es, records, **kwargs):
     return (count, 0)
 
 
-@patch('inspirehep.modules.records.tasks.InspireRecord.get_record', side_effect=record_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_citations_counts', return_value={})
 @patch('inspirehep.modules.records.tasks.create_index_op', side_effect=None)
+@patch('inspirehep.modules.records.indexer.get_indexed_fingerprints', return_value={})
 @patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
-def test_record_task_batch_logic_check_reindex_records_count(get_record, create_index_op, mocked_bulk):
+def test_record_task_batch_logic_check_reindex_records_count(mocked_bulk, get_indexed_fingerprints, create_index_op, get_citations_counts, get_records):
     records = ['000', 'aaa', 'bbb', 'ccc']
     output = batch_reindex(uuids=records)
     assert create_index_op.call_count == 4
@@ -175,10 +198,12 @@ def test_record_task_batch_logic_check_reindex_records_count(get_record, create_
     assert output['failures'] == []
 
 
-@patch('inspirehep.modules.records.tasks.InspireRecord.get_record', side_effect=record_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_citations_counts', return_value={})
 @patch('inspirehep.modules.records.tasks.create_index_op', side_effect=None)
+@patch('inspirehep.modules.records.indexer.get_indexed_fingerprints', return_value={})
 @patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
-def test_record_task_batch_logic_reindex_skips_deleted_records(get_record, create_index_op, mocked_bulk):
+def test_record_task_batch_logic_reindex_skips_deleted_records(mocked_bulk, get_indexed_fingerprints, create_index_op, get_citations_counts, get_records):
     records = ['000', 'aaa_deleted', 'bbb', 'ccc']
     output = batch_reindex(uuids=records)
     assert create_index_op.call_count == 3
@@ -186,10 +211,12 @@ def test_record_task_batch_logic_reindex_skips_deleted_records(get_record, creat
     assert output['failures'] == []
 
 
-@patch('inspirehep.modules.records.tasks.InspireRecord.get_record', side_effect=record_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_citations_counts', return_value={})
 @patch('inspirehep.modules.records.tasks.create_index_op', side_effect=None)
+@patch('inspirehep.modules.records.indexer.get_indexed_fingerprints', return_value={})
 @patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
-def test_record_task_batch_logic_reindex_only_deleted_records(get_record, create_index_op, mocked_bulk):
+def test_record_task_batch_logic_reindex_only_deleted_records(mocked_bulk, get_indexed_fingerprints, create_index_op, get_citations_counts, get_records):
     records = ['000_deleted', 'aaa_deleted', 'bbb_deleted', 'ccc_deleted']
     output = batch_reindex(uuids=records)
     assert create_index_op.call_count == 0
@@ -197,12 +224,158 @@ def test_record_task_batch_logic_reindex_only_deleted_records(get_record, create
     assert output['failures'] == []
 
 
-@patch('inspirehep.modules.records.tasks.InspireRecord.get_record', side_effect=record_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_citations_counts', return_value={})
 @patch('inspirehep.modules.records.tasks.create_index_op', side_effect=None)
+@patch('inspirehep.modules.records.indexer.get_indexed_fingerprints', return_value={})
 @patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
-def test_record_task_batch_logic_nothing_to_reindex(get_record, create_index_op, mocked_bulk):
+def test_record_task_batch_logic_nothing_to_reindex(mocked_bulk, get_indexed_fingerprints, create_index_op, get_citations_counts, get_records):
     records = []
     output = batch_reindex(uuids=records)
     assert create_index_op.call_count == 0
     assert output['success'] == 0
     assert output['failures'] == []
+
+
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_citations_counts', return_value={('lit', 'None'): 3})
+@patch('inspirehep.modules.records.tasks.create_index_op', side_effect=None)
+@patch('inspirehep.modules.records.indexer.get_indexed_fingerprints', return_value={})
+@patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
+def test_record_task_batch_logic_passes_citations_counts(mocked_bulk, get_indexed_fingerprints, create_index_op, get_citations_counts, get_records):
+    records = ['000', 'aaa_deleted']
+    batch_reindex(uuids=records)
+    assert get_records.call_count == 1
+    assert get_citations_counts.call_count == 1
+    create_index_op.assert_called_once_with(
+        {'$schema': 'http://localhost:5000/schemas/record/hep.json'},
+        version_type='force',
+        citations_count=3,
+    )
+
+
+def index_op_generator(record, **kwargs):
+    return {
+        '_id': record.id,
+        '_source': {'_fingerprint': 'fingerprint-' + record.id},
+    }
+
+
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_citations_counts', return_value={})
+@patch('inspirehep.modules.records.tasks.create_index_op', side_effect=index_op_generator)
+@patch('inspirehep.modules.records.indexer.get_indexed_fingerprints', return_value={
+    'aaa': ('fingerprint-aaa', None),
+    'bbb': ('outdated-fingerprint', None),
+})
+@patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
+def test_record_task_batch_logic_reindex_skips_unchanged_records(mocked_bulk, get_indexed_fingerprints, create_index_op, get_citations_counts, get_records):
+    records = ['aaa', 'bbb', 'ccc']
+    output = batch_reindex(uuids=records)
+    assert output['success'] == 2
+    assert output['skipped'] == 1
+    assert output['failures'] == []
+
+    indexed = [op['_id'] for op in mocked_bulk.call_args[0][1]]
+    assert indexed == ['bbb', 'ccc']
+
+
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_citations_counts', return_value={})
+@patch('inspirehep.modules.records.tasks.create_index_op', side_effect=index_op_generator)
+@patch('inspirehep.modules.records.indexer.get_indexed_fingerprints', return_value={
+    'aaa': ('fingerprint-aaa', None),
+})
+@patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
+def test_record_task_batch_logic_reindex_does_not_skip_when_disabled(mocked_bulk, get_indexed_fingerprints, create_index_op, get_citations_counts, get_records):
+    config = {'INDEXER_SKIP_UNCHANGED': False}
+
+    with patch.dict(current_app.config, config):
+        output = batch_reindex(uuids=['aaa', 'bbb'])
+
+    assert output['success'] == 2
+    assert output['skipped'] == 0
+    get_indexed_fingerprints.assert_not_called()
+
+
+@patch('inspirehep.modules.records.tasks.distributed_lock')
+@patch('inspirehep.modules.records.tasks.batch_reindex')
+@patch('inspirehep.modules.records.tasks.WriteBehindQueue')
+def test_drain_write_behind_queue_queues_failed_records_again(mock_queue, mock_batch_reindex, mock_lock):
+    queue = mock_queue.return_value
+    queue.recover.return_value = 0
+    queue.size.return_value = 0
+    queue.pop.side_effect = [[('aaa', 0.0), ('bbb', 0.0)], []]
+    queue.pop_citations.return_value = []
+    mock_batch_reindex.return_value = {
+        'success': 1,
+        'skipped': 0,
+        'failures': [{'index': {'_id': 'bbb', 'status': 400}}],
+    }
+
+    result = drain_write_behind_queue()
+
+    assert result['success'] == 1
+    assert list(queue.ack.call_args[0][0]) == ['aaa']
+    queue.requeue.assert_called_once_with(['bbb'])
+    queue.unschedule.assert_called_once_with()
+
+
+@patch('inspirehep.modules.records.tasks.index_modified_citations_from_record')
+@patch('inspirehep.modules.records.tasks.distributed_lock')
+@patch('inspirehep.modules.records.tasks.batch_reindex')
+@patch('inspirehep.modules.records.tasks.WriteBehindQueue')
+def test_drain_write_behind_queue_schedules_citations_once_per_record(
+    mock_queue, mock_batch_reindex, mock_lock, mock_index_citations
+):
+    queue = mock_queue.return_value
+    queue.recover.return_value = 0
+    queue.size.return_value = 0
+    queue.pop.side_effect = [[('aaa', 0.0)], []]
+    queue.pop_citations.return_value = [('lit', '1', 2, 4)]
+    mock_batch_reindex.return_value = {
+        'success': 1,
+        'skipped': 0,
+        'failures': [],
+    }
+
+    result = drain_write_behind_queue()
+
+    assert result['citations'] == 1
+    mock_index_citations.delay.assert_called_once_with('lit', '1', 4, 2)
+    queue.ack_citations.assert_called_once_with()
+
+
+@patch('inspirehep.modules.records.tasks.distributed_lock')
+@patch('inspirehep.modules.records.tasks.batch_reindex', side_effect=Exception)
+@patch('inspirehep.modules.records.tasks.WriteBehindQueue')
+def test_drain_write_behind_queue_queues_batch_again_on_error(mock_queue, mock_batch_reindex, mock_lock):
+    queue = mock_queue.return_value
+    queue.recover.return_value = 0
+    queue.pop.side_effect = [[('aaa', 0.0), ('bbb', 0.0)], []]
+
+    with pytest.raises(Exception):
+        drain_write_behind_queue()
+
+    queue.ack.assert_not_called()
+    queue.requeue.assert_called_once_with(['aaa', 'bbb'])
+    queue.unschedule.assert_called_once_with()
+
+
+@patch('inspirehep.modules.records.tasks.drain_write_behind_queue.apply_async')
+@patch('inspirehep.modules.records.tasks.distributed_lock', side_effect=DistributedLockError)
+@patch('inspirehep.modules.records.tasks.batch_reindex')
+@patch('inspirehep.modules.records.tasks.WriteBehindQueue')
+def test_drain_write_behind_queue_drains_later_when_another_drain_runs(
+    mock_queue, mock_batch_reindex, mock_lock, mock_apply_async
+):
+    queue = mock_queue.return_value
+
+    drain_write_behind_queue()
+
+    queue.unschedule.assert_not_called()
+    queue.recover.assert_not_called()
+    mock_batch_reindex.assert_not_called()
+    mock_apply_async.assert_called_once_with(
+        countdown=current_app.config['INDEXER_WRITE_BEHIND_WINDOW'],
+    )
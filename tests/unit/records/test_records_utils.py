@@ -30,6 +30,8 @@ from inspire_utils.name import generate_name_variations
 from inspirehep.modules.records.api import InspireRecord
 from invenio_records.models import RecordMetadata
 from inspirehep.modules.records.utils import (
+    compile_ref_paths,
+    get_cited_pids,
     get_endpoint_from_record,
     get_pid_from_record_uri,
     populate_abstract_source_suggest,
@@ -600,6 +602,81 @@ def test_populate_recid_from_ref():
     assert record['embedded_record']['recid'] == 5
 
 
+def test_populate_recid_from_ref_does_not_modify_nested_values():
+    json_dict = {
+        'embedded_list': [
+            {'record': {'$ref': 'http://x/y/4'}},
+            {'value': 'no reference'},
+        ],
+        'embedded_record': {'record': {'$ref': 'http://x/y/5'}},
+    }
+    record = InspireRecord(json_dict, model=RecordMetadata)
+
+    populate_recid_from_ref(record)
+
+    assert record['embedded_list'][0]['recid'] == 4
+    assert record['embedded_record']['recid'] == 5
+    assert 'recid' not in json_dict['embedded_list'][0]
+    assert 'recid' not in json_dict['embedded_record']
+    assert record['embedded_list'][1] is json_dict['embedded_list'][1]
+
+
+def test_compile_ref_paths():
+    ref_paths = compile_ref_paths('http://localhost:5000/schemas/records/hep.json')
+
+    assert ref_paths['authors']['[]']['record'] == '$ref'
+    assert ref_paths['authors']['[]']['affiliations']['[]']['record'] == '$ref'
+    assert ref_paths['deleted_records'] == '$refs'
+    assert 'titles' not in ref_paths
+
+
+def test_populate_recid_from_ref_from_schema_is_same_as_recursively():
+    json_dict = {
+        '$schema': 'http://localhost:5000/schemas/records/hep.json',
+        'authors': [
+            {
+                'full_name': 'Smith, John',
+                'record': {'$ref': 'http://x/y/1'},
+                'affiliations': [
+                    {
+                        'value': 'CERN',
+                        'record': {'$ref': 'http://x/y/2'},
+                    },
+                ],
+            },
+            {
+                'full_name': 'Doe, John',
+            },
+        ],
+        'deleted_records': [
+            {'$ref': 'http://x/y/3'},
+        ],
+        'publication_info': [
+            {'journal_record': {'$ref': 'http://x/y/4'}},
+        ],
+        'references': [
+            {
+                'record': {'$ref': 'http://x/y/5'},
+                'reference': {'title': {'title': 'Some title'}},
+            },
+        ],
+        'self': {'$ref': 'http://x/y/6'},
+    }
+    from_schema = InspireRecord(json_dict, model=RecordMetadata)
+    recursively = InspireRecord(json_dict, model=RecordMetadata)
+
+    populate_recid_from_ref(from_schema)
+    populate_recid_from_ref(recursively, from_schema=False)
+
+    assert from_schema['authors'][0]['recid'] == 1
+    assert from_schema['authors'][0]['affiliations'][0]['recid'] == 2
+    assert from_schema['deleted_recids'] == [3]
+    assert from_schema['publication_info'][0]['journal_recid'] == 4
+    assert from_schema['references'][0]['recid'] == 5
+    assert from_schema['self_recid'] == 6
+    assert from_schema == recursively
+
+
 def test_populate_recid_from_ref_handles_deleted_records():
     json_dict = {
         'deleted_records': [
@@ -983,6 +1060,63 @@ def test_get_pid_from_record_uri_non_url():
     assert not get_pid_from_record_uri(record_uri)
 
 
+def test_get_cited_pids():
+    record = {
+        '_collections': ['Literature'],
+        'references': [
+            {'record': {'$ref': 'http://localhost:5000/api/literature/1'}},
+            {'record': {'$ref': 'http://localhost:5000/api/data/2'}},
+            {'record': {'$ref': 'http://localhost:5000/api/literature/1'}},
+            {'reference': {'title': {'title': 'Not linked'}}},
+        ],
+    }
+
+    expected = {('lit', '1'), ('dat', '2')}
+    result = get_cited_pids(record)
+
+    assert expected == result
+
+
+def test_get_cited_pids_ignores_deleted_records():
+    record = {
+        '_collections': ['Literature'],
+        'deleted': True,
+        'references': [
+            {'record': {'$ref': 'http://localhost:5000/api/literature/1'}},
+        ],
+    }
+
+    assert get_cited_pids(record) == set()
+
+
+def test_get_cited_pids_ignores_superseded_records():
+    record = {
+        '_collections': ['Literature'],
+        'related_records': [
+            {
+                'record': {'$ref': 'http://localhost:5000/api/literature/3'},
+                'relation': 'successor',
+            },
+        ],
+        'references': [
+            {'record': {'$ref': 'http://localhost:5000/api/literature/1'}},
+        ],
+    }
+
+    assert get_cited_pids(record) == set()
+
+
+def test_get_cited_pids_ignores_other_collections():
+    record = {
+        '_collections': ['HERMES Internal Notes'],
+        'references': [
+            {'record': {'$ref': 'http://localhost:5000/api/literature/1'}},
+        ],
+    }
+
+    assert get_cited_pids(record) == set()
+
+
 @patch('inspirehep.modules.records.utils.get_linked_records_in_field')
 def test_populate_facet_author_name(mocked_get_linked_records_in_field):
     authors_json = [
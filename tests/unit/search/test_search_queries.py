@@ -22,11 +22,20 @@
 
 from __future__ import absolute_import, division, print_function
 
+import pytest
 from elasticsearch_dsl import Q
+from invenio_records_rest.errors import InvalidQueryRESTError
 from mock import patch
-
-from inspirehep.modules.search.search_factory import select_source
+from werkzeug.datastructures import MultiDict
+
+from inspirehep.modules.search.search_factory import (
+    decode_cursor,
+    encode_cursor,
+    inspire_cursor_factory,
+    select_source,
+)
 from inspirehep.modules.search.api import LiteratureSearch, AuthorsSearch
+from inspirehep.modules.search.query_factory import parse_query
 import inspire_query_parser
 
 
@@ -107,3 +116,60 @@ def test_empty_search_query_in_authors_search():
     query = search_dict['query']
 
     assert query == expected_query
+
+
+@patch('inspirehep.modules.search.query_factory.inspire_query_parser.parse_query')
+def test_parse_query_caches_parsed_queries(mock_parse_query, app):
+    app.extensions['inspire-search'].query_cache.clear()
+    mock_parse_query.return_value = {'match': {'titles.full_title': 'foo'}}
+
+    first = parse_query(' t foo ')
+    first['match']['titles.full_title'] = 'bar'
+    second = parse_query('t foo')
+    parse_query('t bar')
+
+    assert second == {'match': {'titles.full_title': 'foo'}}
+    assert mock_parse_query.call_count == 2
+    assert app.extensions['inspire-search'].query_cache.stats()['hits'] == 1
+
+
+def test_decode_cursor_returns_encoded_sort_values():
+    assert decode_cursor(encode_cursor([1.5, 'foo', 42])) == [1.5, 'foo', 42]
+
+
+def test_decode_cursor_raises_on_invalid_cursor():
+    with pytest.raises(InvalidQueryRESTError):
+        decode_cursor('not a cursor')
+
+
+def test_inspire_cursor_factory_does_nothing_without_cursor(app):
+    search = LiteratureSearch()[20:30]
+
+    with app.test_request_context('/api/literature/'):
+        result, urlkwargs = inspire_cursor_factory(search, MultiDict(), {})
+
+    assert result.to_dict() == search.to_dict()
+    assert 'cursor' not in urlkwargs
+
+
+def test_inspire_cursor_factory_searches_after_cursor(app):
+    search = LiteratureSearch()[0:10].sort({'earliest_date': {'order': 'desc'}})
+    cursor = encode_cursor(['2019-01-01', 42])
+
+    with app.test_request_context('/api/literature/?cursor=' + cursor):
+        result, urlkwargs = inspire_cursor_factory(search, MultiDict(), {'sort': 'mostrecent'})
+
+    body = result.to_dict()
+
+    assert body['sort'] == [{'earliest_date': {'order': 'desc'}}, {'control_number': {'order': 'asc'}}]
+    assert body['search_after'] == ['2019-01-01', 42]
+    assert body['from'] == 0
+    assert urlkwargs.to_dict() == {'sort': 'mostrecent', 'cursor': cursor}
+
+
+def test_inspire_cursor_factory_raises_on_cursor_with_page(app):
+    search = LiteratureSearch()[10:20]
+
+    with app.test_request_context('/api/literature/?page=2&cursor='):
+        with pytest.raises(InvalidQueryRESTError):
+            inspire_cursor_factory(search, MultiDict(), {})
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import patch
+from redis import RedisError
+
+from inspirehep.modules.search.api import LiteratureSearch
+from inspirehep.modules.search.utils import execute_facets_search, get_facets_cache_key
+
+
+@patch('inspirehep.modules.search.utils.get_index_generation', return_value=3)
+def test_get_facets_cache_key_depends_on_query_and_index_generation(mock_get_index_generation):
+    search = LiteratureSearch().query('match', titles__full_title='foo')
+
+    key = get_facets_cache_key(search)
+
+    assert key.startswith('search:facets:records-hep:3:')
+    assert key == get_facets_cache_key(LiteratureSearch().query('match', titles__full_title='foo'))
+    assert key != get_facets_cache_key(LiteratureSearch().query('match', titles__full_title='bar'))
+
+    mock_get_index_generation.return_value = 4
+
+    assert key != get_facets_cache_key(search)
+
+
+@patch('inspirehep.modules.search.utils.get_index_generation', return_value=0)
+@patch('inspirehep.modules.search.utils.current_cache')
+def test_execute_facets_search_uses_cached_response(mock_cache, mock_get_index_generation):
+    mock_cache.get.return_value = {
+        'hits': {'total': 1, 'hits': []},
+        'aggregations': {'doc_type': {'buckets': [{'key': 'article', 'doc_count': 1}]}},
+    }
+    search = LiteratureSearch()
+
+    with patch.object(LiteratureSearch, 'execute') as mock_execute:
+        result = execute_facets_search(search)
+
+    mock_execute.assert_not_called()
+    assert result.hits.total == 1
+    assert result.to_dict()['aggregations']['doc_type']['buckets'][0]['key'] == 'article'
+
+
+@patch('inspirehep.modules.search.utils.get_index_generation', return_value=0)
+@patch('inspirehep.modules.search.utils.current_cache')
+def test_execute_facets_search_caches_response_without_hits(mock_cache, mock_get_index_generation, app):
+    mock_cache.get.return_value = None
+    search = LiteratureSearch()
+
+    with patch.object(LiteratureSearch, 'execute') as mock_execute:
+        mock_execute.return_value.to_dict.return_value = {
+            'hits': {'total': 1, 'hits': [{'_id': 'aaa'}]},
+            'aggregations': {},
+        }
+        execute_facets_search(search)
+
+    mock_cache.set.assert_called_once_with(
+        get_facets_cache_key(search),
+        {'hits': {'total': 1, 'hits': []}, 'aggregations': {}},
+        timeout=app.config['SEARCH_FACETS_CACHE_TIMEOUT'],
+    )
+
+
+@patch('inspirehep.modules.search.utils.get_index_generation', side_effect=RedisError)
+@patch('inspirehep.modules.search.utils.current_cache')
+def test_execute_facets_search_skips_cache_when_redis_fails(mock_cache, mock_get_index_generation):
+    search = LiteratureSearch()
+
+    with patch.object(LiteratureSearch, 'execute') as mock_execute:
+        result = execute_facets_search(search)
+
+    assert result == mock_execute.return_value
+    mock_cache.get.assert_not_called()
+    mock_cache.set.assert_not_called()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import mock
+
+from inspirehep.modules.theme.landing_pages import (
+    get_landing_page_data,
+    refresh_landing_pages_data,
+)
+
+
+@mock.patch('inspirehep.modules.theme.landing_pages.LiteratureSearch')
+@mock.patch('inspirehep.modules.theme.landing_pages.current_cache')
+def test_get_landing_page_data_serves_cached_data(mock_cache, mock_search):
+    mock_cache.get.return_value = 42
+
+    assert get_landing_page_data('literature_count') == 42
+    mock_cache.get.assert_called_once_with('landing_pages::literature_count')
+    mock_search.assert_not_called()
+
+
+@mock.patch('inspirehep.modules.theme.landing_pages.LiteratureSearch')
+@mock.patch('inspirehep.modules.theme.landing_pages.current_cache')
+def test_get_landing_page_data_computes_and_caches_missing_data(mock_cache, mock_search, app):
+    mock_cache.get.return_value = None
+    mock_search.return_value.count.return_value = 42
+
+    assert get_landing_page_data('literature_count') == 42
+    mock_cache.set.assert_called_once_with(
+        'landing_pages::literature_count',
+        42,
+        timeout=app.config['THEME_LANDING_PAGES_CACHE_TIMEOUT'],
+    )
+
+
+@mock.patch('inspirehep.modules.theme.landing_pages.LANDING_PAGES_DATA', {
+    'foo_count': lambda: 1,
+    'bar_count': lambda: 2,
+})
+@mock.patch('inspirehep.modules.theme.landing_pages.current_cache')
+def test_refresh_landing_pages_data_caches_all_data(mock_cache):
+    refresh_landing_pages_data()
+
+    cached = {call[0][0]: call[0][1] for call in mock_cache.set.call_args_list}
+
+    assert cached == {'landing_pages::foo_count': 1, 'landing_pages::bar_count': 2}
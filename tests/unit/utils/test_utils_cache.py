@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Unit tests for the caching utils."""
+
+from __future__ import absolute_import, division, print_function
+
+from mock import patch
+
+from inspirehep.utils.cache import LRUCache, get_request_cache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_with_no_size_caches_nothing():
+    cache = LRUCache(0)
+    cache.set('a', 1)
+
+    assert cache.get('a', 'default') == 'default'
+
+
+@patch('inspirehep.utils.cache.time.time')
+def test_lru_cache_expires_entries(mocked_time):
+    cache = LRUCache(10, ttl=60)
+    mocked_time.return_value = 1000
+    cache.set('a', 1)
+
+    mocked_time.return_value = 1059
+    assert cache.get('a') == 1
+
+    mocked_time.return_value = 1061
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_stats():
+    cache = LRUCache(10)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('a')
+    cache.get('b')
+    cache.delete('a')
+    cache.get('a')
+
+    assert cache.stats() == {'hits': 2, 'misses': 2, 'hit_rate': 0.5, 'size': 0}
+
+    cache.clear()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'size': 0}
+
+
+def test_get_request_cache_returns_the_same_cache_by_name():
+    get_request_cache('test')['a'] = 1
+
+    assert get_request_cache('test') == {'a': 1}
+    assert get_request_cache('other test') == {}
+
+
+def test_get_request_cache_drops_oldest_entries_when_bounded():
+    cache = get_request_cache('bounded test', maxsize=2)
+    cache['a'] = 1
+    cache['b'] = 2
+    cache['c'] = 3
+
+    assert get_request_cache('bounded test') == {'b': 2, 'c': 3}
@@ -22,8 +22,11 @@
 
 from __future__ import absolute_import, division, print_function
 
+import mock
 import pytest
 
+from invenio_db import db
+
 from inspirehep.utils import record_getter
 
 
@@ -40,3 +43,103 @@ def test_error_decorator():
 
     with pytest.raises(record_getter.RecordGetterError):
         badfn(None, None)
+
+
+@pytest.fixture(autouse=True)
+def empty_pid_cache():
+    record_getter.clear_pid_cache()
+    yield
+    record_getter.clear_pid_cache()
+
+
+@mock.patch('inspirehep.utils.record_getter.PersistentIdentifier')
+def test_get_pid_object_uuid_caches_uuids(mock_pid):
+    mock_pid.get.return_value.object_uuid = '8ae8a1a4-d2c8-4d40-a3ae-ee5e2dfc1a8a'
+
+    assert record_getter.get_pid_object_uuid('lit', 1) == '8ae8a1a4-d2c8-4d40-a3ae-ee5e2dfc1a8a'
+    assert record_getter.get_pid_object_uuid('lit', '1') == '8ae8a1a4-d2c8-4d40-a3ae-ee5e2dfc1a8a'
+    mock_pid.get.assert_called_once_with('lit', 1)
+
+
+@mock.patch('inspirehep.utils.record_getter.PersistentIdentifier')
+def test_get_pid_object_uuid_does_not_cache_pids_without_object(mock_pid):
+    mock_pid.get.return_value.object_uuid = None
+
+    assert record_getter.get_pid_object_uuid('lit', 1) is None
+    assert record_getter.get_pid_object_uuid('lit', 1) is None
+    assert mock_pid.get.call_count == 2
+
+
+@mock.patch('inspirehep.utils.record_getter.PersistentIdentifier')
+def test_invalidate_pid_cache_removes_pid_and_its_objects(mock_pid):
+    mock_pid.get.return_value.object_uuid = '8ae8a1a4-d2c8-4d40-a3ae-ee5e2dfc1a8a'
+    mock_pid.query.filter_by.return_value.one.return_value.pid_type = 'lit'
+
+    record_getter.get_pid_object_uuid('lit', 1)
+    record_getter.get_pid_type_from_uuid('8ae8a1a4-d2c8-4d40-a3ae-ee5e2dfc1a8a')
+    record_getter.invalidate_pid_cache('lit', 1, ['8ae8a1a4-d2c8-4d40-a3ae-ee5e2dfc1a8a'])
+    record_getter.get_pid_object_uuid('lit', 1)
+    record_getter.get_pid_type_from_uuid('8ae8a1a4-d2c8-4d40-a3ae-ee5e2dfc1a8a')
+
+    assert mock_pid.get.call_count == 2
+    assert mock_pid.query.filter_by.call_count == 2
+
+
+@mock.patch('inspirehep.utils.record_getter.PersistentIdentifier')
+def test_get_pid_object_uuid_does_not_cache_while_pids_are_uncommitted(mock_pid):
+    mock_pid.get.return_value.object_uuid = '8ae8a1a4-d2c8-4d40-a3ae-ee5e2dfc1a8a'
+    with mock.patch.dict(db.session.info, {record_getter.UNCOMMITTED_PIDS_KEY: True}):
+        record_getter.get_pid_object_uuid('lit', 1)
+        record_getter.get_pid_object_uuid('lit', 1)
+    record_getter.get_pid_object_uuid('lit', 1)
+    record_getter.get_pid_object_uuid('lit', 1)
+
+    assert mock_pid.get.call_count == 3
+
+
+def test_flag_added_pid_flags_the_session_of_pids():
+    session = mock.Mock(info={})
+
+    record_getter.flag_added_pid(session, record_getter.PersistentIdentifier())
+
+    assert session.info[record_getter.UNCOMMITTED_PIDS_KEY]
+
+
+def test_flag_added_pid_ignores_other_instances():
+    session = mock.Mock(info={})
+
+    record_getter.flag_added_pid(session, object())
+
+    assert record_getter.UNCOMMITTED_PIDS_KEY not in session.info
+
+
+@mock.patch('inspirehep.utils.record_getter.object_session')
+def test_flag_changed_pid_flags_the_session_of_the_pid(mock_object_session):
+    mock_object_session.return_value = mock.Mock(info={})
+
+    record_getter.flag_changed_pid(mock.Mock(), 'R', 'K', None)
+
+    assert mock_object_session.return_value.info[record_getter.UNCOMMITTED_PIDS_KEY]
+
+
+def test_get_paths_tree_merges_common_prefixes():
+    paths = ['control_number', 'authors.full_name', 'authors.affiliations.value']
+
+    expected = {
+        'authors': {
+            'affiliations': {'value': {}},
+            'full_name': {},
+        },
+        'control_number': {},
+    }
+    result = record_getter._get_paths_tree(paths)
+
+    assert expected == result
+
+
+def test_get_json_projection_reads_only_requested_fields():
+    result = str(record_getter._get_json_projection(['control_number', 'authors.full_name']))
+
+    assert "'control_number', CAST(records_metadata.json AS JSONB)->'control_number'" in result
+    assert "jsonb_array_elements(CAST(records_metadata.json AS JSONB)->'authors')" in result
+    assert "'full_name', e0.value->'full_name'" in result
@@ -22,7 +22,26 @@
 
 from __future__ import absolute_import, division, print_function
 
-from inspirehep.utils.schema import ensure_valid_schema
+import pytest
+from inspire_schemas.errors import SchemaKeyNotFound
+from jsonschema import ValidationError
+
+from inspirehep.utils.schema import (
+    ensure_valid_schema,
+    get_validation_errors,
+    get_validator,
+    validate,
+)
+
+
+@pytest.fixture
+def hep_record():
+    return {
+        '$schema': 'http://localhost:5000/schemas/records/hep.json',
+        '_collections': ['Literature'],
+        'document_type': ['article'],
+        'titles': [{'title': 'A title'}],
+    }
 
 
 def test_ensure_valid_schema_invalid():
@@ -49,3 +68,42 @@ def test_ensure_valid_schema_already_valid():
     ensure_valid_schema(record)
 
     assert record == expected
+
+
+def test_validate_reuses_the_validator_of_the_schema(hep_record):
+    get_validator.cache_clear()
+
+    validate(hep_record)
+    validate(hep_record, 'hep')
+    validate(hep_record, 'https://labs.inspirehep.net/schemas/records/hep.json')
+
+    assert get_validator.cache_info().misses == 2
+    assert get_validator.cache_info().hits == 1
+
+
+def test_validate_raises_on_invalid_record(hep_record):
+    hep_record['titles'] = [{'subtitle': 'No title'}]
+
+    with pytest.raises(ValidationError):
+        validate(hep_record)
+
+
+def test_validate_raises_without_schema():
+    with pytest.raises(SchemaKeyNotFound):
+        validate({'control_number': 1})
+
+
+def test_get_validation_errors(hep_record):
+    hep_record['document_type'] = ['not a document type']
+    hep_record['titles'] = [{'subtitle': 'No title'}]
+
+    errors = list(get_validation_errors(hep_record, 'hep'))
+
+    assert sorted(list(error.absolute_path) for error in errors) == [
+        ['document_type', 0],
+        ['titles', 0],
+    ]
+
+
+def test_get_validation_errors_with_valid_record(hep_record):
+    assert list(get_validation_errors(hep_record)) == []
@@ -24,9 +24,17 @@
 
 from __future__ import absolute_import, division, print_function
 
+import random
+
 import pytest
 
-from inspirehep.utils.stats import calculate_h_index, calculate_i10_index
+from inspirehep.utils.stats import (
+    calculate_authors_metrics,
+    calculate_h_index,
+    calculate_h_index_from_histogram,
+    calculate_i10_index,
+    calculate_i10_index_from_histogram,
+)
 
 
 @pytest.fixture
@@ -101,3 +109,82 @@ def test_calculate_i10_index_ignores_none_values(citations_with_none_values):
     result = calculate_i10_index(citations_with_none_values)
 
     assert expected == result
+
+
+def test_calculate_h_index_from_histogram():
+    histogram_with_h_index_5 = {34: 1, 3: 1, 5: 1, 7: 1, 8: 1, 12: 1, 2: 1}
+
+    expected = 5
+    result = calculate_h_index_from_histogram(histogram_with_h_index_5)
+
+    assert expected == result
+
+
+def test_calculate_h_index_from_histogram_with_many_papers_per_bucket():
+    histogram_with_h_index_3 = {10.0: 3, 1.0: 20}
+
+    expected = 3
+    result = calculate_h_index_from_histogram(histogram_with_h_index_3)
+
+    assert expected == result
+
+
+def test_calculate_h_index_from_empty_histogram():
+    assert calculate_h_index_from_histogram({}) == 0
+
+
+def test_calculate_i10_index_from_histogram():
+    histogram_with_i10_index_4 = {34: 1, 10: 2, 9: 5, 12: 1}
+
+    expected = 4
+    result = calculate_i10_index_from_histogram(histogram_with_i10_index_4)
+
+    assert expected == result
+
+
+def test_calculate_authors_metrics():
+    authors = [2, 1, 1, 2, 1, 2, 3]
+    papers = [10, 10, 11, 12, 12, 12, 13]
+    citation_counts = [15, 15, 0, 3, 3, 3, 1]
+
+    expected_authors = [1, 2, 3]
+    expected_metrics = {
+        'citations': [18, 18, 1],
+        'publications': [3, 2, 1],
+        'hindex': [2, 2, 1],
+        'i10index': [1, 1, 0],
+    }
+    authors, metrics = calculate_authors_metrics(authors, papers, citation_counts)
+
+    assert expected_authors == authors.tolist()
+    assert expected_metrics == {metric: values.tolist() for metric, values in metrics.items()}
+
+
+def test_calculate_authors_metrics_without_papers():
+    authors, metrics = calculate_authors_metrics([], [], [])
+
+    assert [] == authors.tolist()
+    assert all(values.tolist() == [] for values in metrics.values())
+
+
+def test_calculate_authors_metrics_is_the_same_as_with_dicts():
+    rng = random.Random(42)
+    citation_counts = {paper: rng.choice([0, 1, 5, 9, 10, 11, rng.randint(0, 500)]) for paper in range(200)}
+    pairs = [(rng.randint(1, 20), rng.randint(0, 199)) for _ in range(1000)]
+
+    citations = {}
+    for author, paper in pairs:
+        citations.setdefault(author, {})[paper] = citation_counts[paper]
+
+    authors, metrics = calculate_authors_metrics(
+        [author for author, _ in pairs],
+        [paper for _, paper in pairs],
+        [citation_counts[paper] for _, paper in pairs],
+    )
+
+    assert sorted(citations) == authors.tolist()
+    for index, author in enumerate(authors.tolist()):
+        assert calculate_h_index(citations[author]) == metrics['hindex'][index]
+        assert calculate_i10_index(citations[author]) == metrics['i10index'][index]
+        assert sum(citations[author].values()) == metrics['citations'][index]
+        assert len(citations[author]) == metrics['publications'][index]